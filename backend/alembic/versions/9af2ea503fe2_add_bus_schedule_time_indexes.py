@@ -0,0 +1,31 @@
+"""add_bus_schedule_time_indexes
+
+Revision ID: 9af2ea503fe2
+Revises: df7207d0f0c4
+Create Date: 2026-10-16 10:12:44.318209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9af2ea503fe2'
+down_revision: Union[str, None] = 'df7207d0f0c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Composite indexes for timetable lookups:
+    # WHERE day_of_week = ? AND direction = ? ORDER BY/compare arrival_time or departure_time
+    # (add_perf_indexes ran before bus_schedules existed, so its versions were never created)
+    op.create_index('ix_bus_day_dir_arr', 'bus_schedules', ['day_of_week', 'direction', 'arrival_time'])
+    op.create_index('ix_bus_day_dir_dep', 'bus_schedules', ['day_of_week', 'direction', 'departure_time'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bus_day_dir_dep', table_name='bus_schedules')
+    op.drop_index('ix_bus_day_dir_arr', table_name='bus_schedules')
@@ -0,0 +1,27 @@
+"""add_events_hash_to_day_plans
+
+Revision ID: c41d7e9b2a10
+Revises: 9af2ea503fe2
+Create Date: 2026-10-16 14:03:27.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e9b2a10'
+down_revision: Union[str, None] = '9af2ea503fe2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets the nightly precompute skip days whose calendar has not changed
+    op.add_column('day_plans', sa.Column('events_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('day_plans', 'events_hash')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Time, Integer, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, Time, Integer, Boolean, Enum as SQLEnum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -23,6 +23,11 @@ class BusSchedule(Base):
     Each row represents one bus departure time.
     """
     __tablename__ = "bus_schedules"
+    __table_args__ = (
+        # Timetable lookups filter on day + direction and range over a time column
+        Index("ix_bus_day_dir_arr", "day_of_week", "direction", "arrival_time"),
+        Index("ix_bus_day_dir_dep", "day_of_week", "direction", "departure_time"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     route = Column(SQLEnum(Route), nullable=False, default=Route.westside)  # Route type
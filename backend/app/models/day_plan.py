@@ -15,5 +15,6 @@ class DayPlan(Base):
     events = Column(JSON, nullable=False)  # Cached events from Google Calendar
     free_blocks = Column(JSON, nullable=False)  # Calculated free blocks
     recommendations = Column(JSON, nullable=False)  # AI-generated recommendations
+    events_hash = Column(String(64), nullable=True)  # sha256 of the source events, set by nightly precompute
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
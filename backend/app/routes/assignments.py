@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import date, timedelta
 
 from app.database import get_db
 from app.models.user import User
 from app.models.assignment import Assignment
 from app.schemas.assignment import AssignmentCreate, AssignmentUpdate, AssignmentResponse
 from app.utils.auth_middleware import get_current_user
-from app.utils.cache import invalidate_day_plan_cache
+from app.utils.cache import mark_day_plans_dirty
 
 router = APIRouter(prefix="/assignments", tags=["assignments"])
 
@@ -58,12 +59,12 @@ async def create_assignment(
         )
 
         db.add(db_assignment)
+        # Invalidate day plan cache in the same transaction (committing separately
+        # would expire the assignment and cost another SELECT to serialize it)
+        mark_day_plans_dirty(db, current_user.id, (date.today(), date.today() + timedelta(days=1)), commit=False)
         db.commit()
         db.refresh(db_assignment)
 
-        # Invalidate day plan cache since assignments changed
-        invalidate_day_plan_cache(db, current_user.id)
-
         return db_assignment
 
     except Exception as e:
@@ -84,12 +85,9 @@ async def update_assignment(
     """
     try:
         # Find assignment and verify ownership
-        db_assignment = db.query(Assignment).filter(
-            Assignment.id == assignment_id,
-            Assignment.user_id == current_user.id
-        ).first()
+        db_assignment = db.get(Assignment, assignment_id)
 
-        if not db_assignment:
+        if db_assignment is None or db_assignment.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Assignment not found")
 
         # Update only provided fields
@@ -97,12 +95,12 @@ async def update_assignment(
         for field, value in update_data.items():
             setattr(db_assignment, field, value)
 
+        # Invalidate day plan cache in the same transaction (committing separately
+        # would expire the assignment and cost another SELECT to serialize it)
+        mark_day_plans_dirty(db, current_user.id, (date.today(), date.today() + timedelta(days=1)), commit=False)
         db.commit()
         db.refresh(db_assignment)
 
-        # Invalidate day plan cache since assignments changed
-        invalidate_day_plan_cache(db, current_user.id)
-
         return db_assignment
 
     except HTTPException:
@@ -124,20 +122,16 @@ async def delete_assignment(
     """
     try:
         # Find assignment and verify ownership
-        db_assignment = db.query(Assignment).filter(
-            Assignment.id == assignment_id,
-            Assignment.user_id == current_user.id
-        ).first()
+        db_assignment = db.get(Assignment, assignment_id)
 
-        if not db_assignment:
+        if db_assignment is None or db_assignment.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Assignment not found")
 
         db.delete(db_assignment)
+        # Invalidate day plan cache in the same transaction
+        mark_day_plans_dirty(db, current_user.id, (date.today(), date.today() + timedelta(days=1)), commit=False)
         db.commit()
 
-        # Invalidate day plan cache since assignments changed
-        invalidate_day_plan_cache(db, current_user.id)
-
         return None
 
     except HTTPException:
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 from app.database import get_db
 from app.models.user import User
@@ -16,13 +16,14 @@ from app.schemas.events import (
 )
 from app.utils.auth_middleware import get_current_user
 from app.utils.token_refresh import get_valid_user_token
-from app.utils.cache import cleanup_old_day_plans, invalidate_day_plan_cache
+from app.utils.cache import mark_day_plans_dirty
 from app.services.google_calendar import (
     get_todays_events, get_week_events, create_calendar_event,
     create_assignment_block_event, create_bus_event, delete_calendar_event
 )
-from app.services.bus_service import get_all_buses_for_day
+from app.services.bus_service import get_all_buses_for_day, get_bus_suggestions_for_week
 from app.services.day_plan_orchestrator import orchestrate_day_plan
+from app.services.nightly_precompute import compute_events_hash, store_day_plan
 
 router = APIRouter(prefix="/calendar", tags=["calendar"])
 
@@ -50,6 +51,19 @@ def _get_user_calendar_token(user_id: str, db: Session) -> UserToken:
     return get_valid_user_token(user_token, db)
 
 
+def _cached_day_plan_response(today: date, cached_plan: DayPlan) -> DayPlanResponse:
+    """Rebuild the response from a stored day plan row."""
+    # Convert JSON back to Pydantic models
+    from app.schemas.calendar import CalendarEvent, FreeBlock, Recommendations
+
+    return DayPlanResponse(
+        date=today.isoformat(),
+        events=[CalendarEvent(**event) for event in cached_plan.events],
+        free_blocks=[FreeBlock(**block) for block in cached_plan.free_blocks],
+        recommendations=Recommendations(**cached_plan.recommendations)
+    )
+
+
 @router.get("/day-plan", response_model=DayPlanResponse)
 async def get_day_plan(
     force_refresh: bool = False,
@@ -59,6 +73,9 @@ async def get_day_plan(
     """
     Get today's events + AI-generated day plan with recommendations.
     Uses cached plan if available for today, otherwise generates new one.
+    A cached plan that stored an events hash (e.g. the nightly precompute) is
+    only reused while today's Google Calendar events still hash the same, since
+    edits made directly in Google Calendar never mark it dirty.
 
     Query params:
     - force_refresh: Set to true to bypass cache and regenerate plan
@@ -66,11 +83,6 @@ async def get_day_plan(
     try:
         today = date.today()
 
-        # Opportunistic cleanup: Remove day plans older than 7 days (run in background)
-        # This prevents database bloat without impacting response time
-        import asyncio
-        asyncio.create_task(asyncio.to_thread(cleanup_old_day_plans, db, days_to_keep=7))
-
         # Check if we have a cached plan for today (skip if force_refresh is True)
         cached_plan = None
         if not force_refresh:
@@ -79,39 +91,38 @@ async def get_day_plan(
                 DayPlan.date == today
             ).first()
 
-        if cached_plan:
-            # Convert JSON back to Pydantic models
-            from app.schemas.calendar import CalendarEvent, FreeBlock, Recommendations
-
-            events = [CalendarEvent(**event) for event in cached_plan.events]
-            free_blocks = [FreeBlock(**block) for block in cached_plan.free_blocks]
-            recommendations = Recommendations(**cached_plan.recommendations)
+        if cached_plan and cached_plan.events_hash is None:
+            return _cached_day_plan_response(today, cached_plan)
 
-            # Return cached plan
-            return DayPlanResponse(
-                date=today.strftime("%Y-%m-%d"),
-                events=events,
-                free_blocks=free_blocks,
-                recommendations=recommendations
-            )
-
-        # No cached plan - generate new one
         # Get user's validated Google tokens
         user_token = _get_user_calendar_token(str(current_user.id), db)
 
-        # Fetch events from Google Calendar (async wrapper for blocking call)
+        # Fetch events from Google Calendar in a worker thread while the
+        # assignments query runs here (the session stays on this thread).
+        # run_in_executor submits right away; a task wouldn't start until we yield.
         import asyncio
-        events = await asyncio.to_thread(
+        events_future = asyncio.get_running_loop().run_in_executor(
+            None,
             get_todays_events,
             user_token.access_token,
             user_token.refresh_token
         )
 
         # Fetch incomplete assignments
-        assignments = db.query(Assignment).filter(
-            Assignment.user_id == current_user.id,
-            Assignment.completed == False,
-        ).all()
+        try:
+            assignments = db.query(Assignment).filter(
+                Assignment.user_id == current_user.id,
+                Assignment.completed == False,
+            ).all()
+        finally:
+            events = await events_future
+
+        # Hash before orchestration adds assignment blocks to the list
+        events_hash = compute_events_hash(events)
+
+        # The calendar is unchanged since the plan was stored - skip the LLM call
+        if cached_plan and cached_plan.events_hash == events_hash:
+            return _cached_day_plan_response(today, cached_plan)
 
         # Orchestrate entire day plan generation (efficient, modular)
         events, free_blocks, recommendations = await asyncio.to_thread(
@@ -121,32 +132,15 @@ async def get_day_plan(
             today=today,
             events=events,
             assignments=assignments,
+            force_refresh=force_refresh,
         )
 
-        # Convert Pydantic models to dicts for JSON storage
-        events_dict = [event.model_dump(mode='json') for event in events]
-        free_blocks_dict = [block.model_dump(mode='json') for block in free_blocks]
-        recommendations_dict = recommendations.model_dump(mode='json')
-
-        # Delete old cached plan for today if it exists (for force_refresh case)
-        db.query(DayPlan).filter(
-            DayPlan.user_id == current_user.id,
-            DayPlan.date == today
-        ).delete()
-
-        # Cache the new plan
-        day_plan = DayPlan(
-            user_id=current_user.id,
-            date=today,
-            events=events_dict,
-            free_blocks=free_blocks_dict,
-            recommendations=recommendations_dict
-        )
-        db.add(day_plan)
-        db.commit()
+        # Cache the new plan (replaces any stale row for the force_refresh case)
+        store_day_plan(db, current_user.id, today, events, free_blocks,
+                       recommendations, events_hash)
 
         return DayPlanResponse(
-            date=today.strftime("%Y-%m-%d"),
+            date=today.isoformat(),
             events=events,
             free_blocks=free_blocks,
             recommendations=recommendations
@@ -234,6 +228,54 @@ async def get_bus_schedule(
         raise HTTPException(status_code=500, detail=f"Failed to get bus schedule: {str(e)}")
 
 
+@router.get("/week-bus-suggestions")
+async def get_week_bus_suggestions(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get morning/evening bus suggestions for every weekday of the current week
+    that has calendar events, using one events fetch and one preferences query.
+    """
+    try:
+        user_token = _get_user_calendar_token(current_user.id, db)
+
+        # Fetch the week's events from Google Calendar
+        import asyncio
+        events = await asyncio.to_thread(
+            get_week_events,
+            user_token.access_token,
+            user_token.refresh_token
+        )
+
+        # Group events by the day they start on
+        events_by_date = {}
+        for event in events:
+            events_by_date.setdefault(event.start.date(), []).append(event)
+
+        suggestions = get_bus_suggestions_for_week(
+            db,
+            current_user.id,
+            sorted(events_by_date),
+            events_by_date
+        )
+
+        return {
+            "days": [
+                {
+                    "date": day.isoformat(),
+                    "morning": morning.to_dict(day) if morning else None,
+                    "evening": evening.to_dict(day) if evening else None
+                }
+                for day, (morning, evening) in suggestions.items()
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get week bus suggestions: {str(e)}")
+
+
 @router.get("/bus-preferences", response_model=BusPreferencesResponse)
 async def get_bus_preferences(
     current_user: User = Depends(get_current_user),
@@ -337,7 +379,7 @@ async def create_event(
         )
 
         # Invalidate day plan cache so next fetch gets fresh data
-        invalidate_day_plan_cache(db, current_user.id, date.today())
+        mark_day_plans_dirty(db, current_user.id, (date.today(), event.start_time.date()))
 
         return EventCreateResponse(
             event_id=event_id,
@@ -364,12 +406,9 @@ async def sync_assignment_block(
         user_token = _get_user_calendar_token(str(current_user.id), db)
 
         # Get assignment details
-        assignment = db.query(Assignment).filter(
-            Assignment.id == request.assignment_id,
-            Assignment.user_id == current_user.id
-        ).first()
+        assignment = db.get(Assignment, request.assignment_id)
 
-        if not assignment:
+        if assignment is None or assignment.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Assignment not found")
 
         # Create the event
@@ -383,7 +422,7 @@ async def sync_assignment_block(
         )
 
         # Invalidate day plan cache so next fetch gets fresh data
-        invalidate_day_plan_cache(db, current_user.id, date.today())
+        mark_day_plans_dirty(db, current_user.id, (date.today(), request.start_time.date()))
 
         return EventCreateResponse(
             event_id=event_id,
@@ -431,7 +470,7 @@ async def sync_bus(
         )
 
         # Invalidate day plan cache so next fetch gets fresh data
-        invalidate_day_plan_cache(db, current_user.id, date.today())
+        mark_day_plans_dirty(db, current_user.id, (date.today(), request.departure_time.date()))
 
         return EventCreateResponse(
             event_id=event_id,
@@ -481,7 +520,8 @@ async def delete_event(
         )
 
         # Invalidate day plan cache so next fetch gets fresh data
-        invalidate_day_plan_cache(db, current_user.id, date.today())
+        # The event's date is unknown here, so drop today's plan and tomorrow's precomputed one
+        mark_day_plans_dirty(db, current_user.id, (date.today(), date.today() + timedelta(days=1)))
 
         return EventDeleteResponse(
             success=True,
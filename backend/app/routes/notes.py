@@ -1,4 +1,8 @@
+import asyncio
+
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from uuid import UUID
@@ -16,12 +20,18 @@ from app.schemas.notes import (
 )
 from app.utils.auth_middleware import get_current_user
 from app.utils.rate_limiter import limiter
-from app.services.storage import save_uploaded_file, get_file_path
-from app.services.ocr_service import extract_text_from_image
-from app.services.gemini_service import generate_study_material, generate_combined_study_guide
+from app.utils.logger import log_error
+from app.services.storage import save_file_bytes, delete_file
+from app.services.ocr_service import extract_text_from_bytes
+from app.services.gemini_service import (
+    generate_study_material, generate_combined_study_guide, stream_study_material
+)
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
+# Image formats Tesseract can OCR reliably
+IMAGE_TYPES = frozenset({"image/png", "image/jpeg", "image/webp", "image/tiff", "image/bmp"})
+
 
 @router.get("/", response_model=List[NoteDocumentResponse])
 async def get_all_notes(
@@ -71,12 +81,9 @@ async def delete_note(
     """
     Delete a note document and its associated study materials.
     """
-    note_doc = db.query(NoteDocument).filter(
-        NoteDocument.id == note_document_id,
-        NoteDocument.user_id == current_user.id
-    ).first()
+    note_doc = db.get(NoteDocument, note_document_id)
 
-    if not note_doc:
+    if note_doc is None or note_doc.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Note document not found")
 
     db.delete(note_doc)
@@ -102,28 +109,47 @@ async def upload_note(
     if file and text and text.strip() != "":
         raise HTTPException(status_code=400, detail="Provide either file or text, not both")
 
+    # Reject unsupported uploads before anything is written to disk
+    if file and file.content_type not in IMAGE_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail="Only image files (PNG, JPEG, WebP, TIFF, BMP) are supported for upload"
+        )
+
     try:
         extracted_text = ""
         file_url = None
 
         if file:
-            # Save uploaded file
-            file_url = save_uploaded_file(file, subfolder="notes")
+            # Read once, then write to storage and OCR the in-memory copy concurrently
+            # (async wrappers for blocking disk I/O and Tesseract calls).
+            # gather() rather than a TaskGroup: a TaskGroup would cancel the save on
+            # OCR failure, but the worker thread still writes the file and we'd lose
+            # its path. Letting both finish means the orphan can be removed below.
+            contents = await file.read()
+            save_result, ocr_result = await asyncio.gather(
+                asyncio.to_thread(save_file_bytes, contents, file.filename, "notes"),
+                asyncio.to_thread(extract_text_from_bytes, contents),
+                return_exceptions=True,
+            )
+            if isinstance(save_result, Exception):
+                raise save_result
+            file_url = save_result
 
-            # Check if it's an image (for OCR)
-            if file.content_type and file.content_type.startswith("image/"):
-                # Perform OCR (async wrapper for blocking Tesseract call)
-                import asyncio
-                full_path = get_file_path(file_url)
-                extracted_text = await asyncio.to_thread(extract_text_from_image, full_path)
+            try:
+                if isinstance(ocr_result, Exception):
+                    raise ocr_result
+                extracted_text = ocr_result
 
                 if not extracted_text or len(extracted_text.strip()) < 10:
                     raise HTTPException(
                         status_code=400,
                         detail="No meaningful text could be extracted from the image. Please ensure the image is clear and contains readable text."
                     )
-            else:
-                raise HTTPException(status_code=400, detail="Only image files are supported for upload")
+            except Exception:
+                # Don't keep an upload we aren't going to reference
+                delete_file(file_url)
+                raise
 
         else:
             # Use provided text
@@ -145,11 +171,48 @@ async def upload_note(
             extracted_text=extracted_text
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to upload note: {str(e)}")
 
 
+def _duplicate_material_data(db: Session, note_doc: NoteDocument) -> Optional[dict]:
+    """Study material of another of the owner's notes with the same text, if any."""
+    duplicate_material = db.query(StudyMaterial).join(
+        NoteDocument, StudyMaterial.note_document_id == NoteDocument.id
+    ).filter(
+        NoteDocument.user_id == note_doc.user_id,
+        NoteDocument.id != note_doc.id,
+        NoteDocument.extracted_text == note_doc.extracted_text
+    ).first()
+
+    if duplicate_material is None:
+        return None
+    return {
+        'summary_short': duplicate_material.summary_short,
+        'summary_detailed': duplicate_material.summary_detailed,
+        'flashcards': duplicate_material.flashcards,
+        'practice_questions': duplicate_material.practice_questions
+    }
+
+
+def _save_study_material(db: Session, note_document_id: UUID, material_data: dict) -> StudyMaterial:
+    """Store generated study material for a note and commit."""
+    study_material = StudyMaterial(
+        note_document_id=note_document_id,
+        summary_short=material_data['summary_short'],
+        summary_detailed=material_data['summary_detailed'],
+        flashcards=material_data['flashcards'],
+        practice_questions=material_data['practice_questions']
+    )
+    db.add(study_material)
+    db.commit()
+    db.refresh(study_material)
+    return study_material
+
+
 @router.post("/generate-study", response_model=StudyMaterialResponse)
 @limiter.limit("10/hour")  # Limit to 10 generations per hour per user
 async def generate_study(
@@ -163,13 +226,10 @@ async def generate_study(
     Rate limited to prevent API abuse (10 requests per hour).
     """
     try:
-        # Get note document
-        note_doc = db.query(NoteDocument).filter(
-            NoteDocument.id == body.note_document_id,
-            NoteDocument.user_id == current_user.id
-        ).first()
+        # Get note document (identity-map lookup by primary key, then ownership check)
+        note_doc = db.get(NoteDocument, body.note_document_id)
 
-        if not note_doc:
+        if note_doc is None or note_doc.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Note document not found")
 
         # Check if study material already exists
@@ -186,26 +246,16 @@ async def generate_study(
                 practice_questions=existing_material.practice_questions
             )
 
-        # Generate new study material using Gemini (async wrapper for blocking call)
-        import asyncio
-        topic_hint = body.topic_hint if hasattr(body, 'topic_hint') else None
-        material_data = await asyncio.to_thread(
-            generate_study_material,
-            note_doc.extracted_text,
-            topic_hint
-        )
+        # Re-uploads of the same notes (retries, the same PDF again) reuse the
+        # material already generated for the earlier copy instead of calling the AI
+        material_data = _duplicate_material_data(db, note_doc)
+        if material_data is None:
+            # Generate new study material
+            topic_hint = body.topic_hint if hasattr(body, 'topic_hint') else None
+            material_data = await generate_study_material(note_doc.extracted_text, topic_hint)
 
         # Save to database
-        study_material = StudyMaterial(
-            note_document_id=note_doc.id,
-            summary_short=material_data['summary_short'],
-            summary_detailed=material_data['summary_detailed'],
-            flashcards=material_data['flashcards'],
-            practice_questions=material_data['practice_questions']
-        )
-        db.add(study_material)
-        db.commit()
-        db.refresh(study_material)
+        study_material = _save_study_material(db, note_doc.id, material_data)
 
         return StudyMaterialResponse(
             summary_short=study_material.summary_short,
@@ -218,12 +268,88 @@ async def generate_study(
         raise
     except Exception as e:
         db.rollback()
-        # Log the full error for debugging
-        import traceback
-        print(f"ERROR in generate_study: {str(e)}")
-        print(traceback.format_exc())
+        # Log the full error (with traceback) for debugging
+        log_error("notes", "generate_study failed", e)
+        raise HTTPException(status_code=500, detail=f"Failed to generate study material: {str(e)}")
+
+
+@router.post("/generate-study/stream")
+@limiter.limit("10/hour")  # Shares the cost of /generate-study, so the same limit
+async def generate_study_stream(
+    request: Request,
+    body: GenerateStudyRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate study material as newline-delimited JSON, so flashcards show up
+    while the rest is still being written.
+
+    Sends {"flashcard": {...}} for each card as soon as it is generated, then
+    {"material": {...}} with the complete result, which is saved like
+    /generate-study. A failure after streaming has started is sent as
+    {"error": "..."} since the status code is already out.
+    """
+    try:
+        note_doc = db.get(NoteDocument, body.note_document_id)
+
+        if note_doc is None or note_doc.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Note document not found")
+
+        existing_material = db.query(StudyMaterial).filter(
+            StudyMaterial.note_document_id == note_doc.id
+        ).first()
+
+        if existing_material:
+            material_data = {
+                'summary_short': existing_material.summary_short,
+                'summary_detailed': existing_material.summary_detailed,
+                'flashcards': existing_material.flashcards,
+                'practice_questions': existing_material.practice_questions
+            }
+        else:
+            material_data = _duplicate_material_data(db, note_doc)
+            if material_data is not None:
+                _save_study_material(db, note_doc.id, material_data)
+
+        if material_data is not None:
+            return StreamingResponse(
+                iter([orjson.dumps({"material": material_data}) + b"\n"]),
+                media_type="application/x-ndjson"
+            )
+
+        note_document_id = note_doc.id
+        extracted_text = note_doc.extracted_text
+        topic_hint = body.topic_hint if hasattr(body, 'topic_hint') else None
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        log_error("notes", "generate_study_stream failed", e)
         raise HTTPException(status_code=500, detail=f"Failed to generate study material: {str(e)}")
 
+    def _events():
+        # Runs after the handler returns and get_db has closed the session;
+        # the final save checks out a fresh connection, so the session is
+        # closed again here. Closing the AI stream also covers a client that
+        # disconnects mid-stream (GeneratorExit at the yield).
+        events = stream_study_material(extracted_text, topic_hint)
+        try:
+            for event in events:
+                if "material" in event:
+                    _save_study_material(db, note_document_id, event["material"])
+                yield orjson.dumps(event) + b"\n"
+        except Exception as e:
+            db.rollback()
+            log_error("notes", "generate_study_stream failed", e)
+            yield orjson.dumps({"error": f"Failed to generate study material: {str(e)}"}) + b"\n"
+        finally:
+            events.close()
+            db.close()
+
+    return StreamingResponse(_events(), media_type="application/x-ndjson")
+
 
 @router.get("/{note_document_id}/study", response_model=StudyMaterialResponse)
 async def get_study_material(
@@ -236,12 +362,9 @@ async def get_study_material(
     """
     try:
         # Verify note belongs to user
-        note_doc = db.query(NoteDocument).filter(
-            NoteDocument.id == note_document_id,
-            NoteDocument.user_id == current_user.id
-        ).first()
+        note_doc = db.get(NoteDocument, note_document_id)
 
-        if not note_doc:
+        if note_doc is None or note_doc.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Note document not found")
 
         # Get study material
@@ -298,12 +421,9 @@ async def combine_notes(
         # Fetch all note documents and verify ownership
         note_docs = []
         for note_id in body.note_document_ids:
-            note_doc = db.query(NoteDocument).filter(
-                NoteDocument.id == note_id,
-                NoteDocument.user_id == current_user.id
-            ).first()
+            note_doc = db.get(NoteDocument, note_id)
 
-            if not note_doc:
+            if note_doc is None or note_doc.user_id != current_user.id:
                 raise HTTPException(
                     status_code=404,
                     detail=f"Note document {note_id} not found or you don't have access"
@@ -323,33 +443,37 @@ async def combine_notes(
                     detail=f"Note '{note_titles[i]}' has insufficient content to combine"
                 )
 
-        # Generate combined study guide using Gemini (async wrapper)
-        import asyncio
+        # Start generating the combined study guide right away so building the
+        # combined note below overlaps with the AI round-trip.
         topic_hint = body.topic_hint if hasattr(body, 'topic_hint') else None
-        combined_material = await asyncio.to_thread(
-            generate_combined_study_guide,
-            note_texts,
-            note_titles,
-            topic_hint
+        generation_task = asyncio.create_task(
+            generate_combined_study_guide(note_texts, note_titles, topic_hint)
         )
 
-        # If user wants to save to library, create a new note document and study material
+        # If user wants to save to library, prepare the combined note document
+        # (nothing touches the database until generation has finished)
+        note_doc = None
         if body.save_to_library:
             # Generate combined title
             combined_title = body.combined_title if body.combined_title else f"Combined: {', '.join(note_titles[:3])}{'...' if len(note_titles) > 3 else ''}"
 
             # Create combined text from all notes
-            combined_text = "\n\n=== COMBINED NOTES ===\n\n"
-            for title, text in zip(note_titles, note_texts):
-                combined_text += f"\n--- {title} ---\n{text}\n"
+            combined_text = "\n\n=== COMBINED NOTES ===\n\n" + "".join(
+                f"\n--- {title} ---\n{text}\n"
+                for title, text in zip(note_titles, note_texts)
+            )
 
-            # Create note document
             note_doc = NoteDocument(
                 user_id=current_user.id,
                 title=combined_title,
                 original_file_url=None,  # No file for combined notes
                 extracted_text=combined_text
             )
+
+        combined_material = await generation_task
+
+        if note_doc is not None:
+            # Flush only now, so the write transaction isn't held open during generation
             db.add(note_doc)
             db.flush()  # Get the ID without committing
 
@@ -376,10 +500,9 @@ async def combine_notes(
     except HTTPException:
         raise
     except Exception as e:
-        # Log the full error for debugging
-        import traceback
-        print(f"ERROR in combine_notes: {str(e)}")
-        print(traceback.format_exc())
+        db.rollback()
+        # Log the full error (with traceback) for debugging
+        log_error("notes", "combine_notes failed", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to combine notes: {str(e)}"
@@ -36,12 +36,9 @@ async def autoschedule_assignment_today(
         today = date.today()
 
         # Fetch the specific assignment
-        assignment = db.query(Assignment).filter(
-            Assignment.id == assignment_id,
-            Assignment.user_id == current_user.id,
-        ).first()
+        assignment = db.get(Assignment, assignment_id)
 
-        if not assignment:
+        if assignment is None or assignment.user_id != current_user.id:
             raise HTTPException(status_code=404, detail="Assignment not found")
 
         if assignment.completed:
@@ -69,8 +66,10 @@ async def autoschedule_assignment_today(
         # Calculate free blocks
         free_blocks = calculate_free_blocks(events)
 
-        # Run planning agent with only this assignment
-        kept_blocks, agent_decision = agent_filter_schedule_for_today(
+        # Run planning agent with only this assignment (blocking LLM call, kept
+        # off the event loop so other requests' AI calls aren't serialized behind it)
+        kept_blocks, agent_decision = await asyncio.to_thread(
+            agent_filter_schedule_for_today,
             today=today,
             events=events,
             free_blocks=free_blocks,
@@ -3,14 +3,23 @@ Unified AI service that supports multiple providers with fallback.
 Priority: Groq (fastest) → GPT (reliable) → Gemini (fallback)
 """
 
-import json
-from typing import Any
-from groq import Groq
-from openai import OpenAI
-import google.generativeai as genai
+import asyncio
+import hashlib
+import math
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Iterator
+import httpx
+from groq import Groq, AsyncGroq, APITimeoutError as GroqTimeoutError
+from openai import OpenAI, AsyncOpenAI, APITimeoutError as OpenAITimeoutError
+import orjson
 
 from app.config import get_settings
-from app.utils.logger import log_error, log_info
+from app.utils.lazy_import import lazy_import
+from app.utils.logger import log_error, log_info, preview_text
+from app.utils.ttl_cache import TTLCache
 
 settings = get_settings()
 
@@ -19,52 +28,394 @@ _groq_client = None
 _openai_client = None
 _groq_initialized = False
 _openai_initialized = False
+_async_groq_client = None
+_async_openai_client = None
+_async_groq_initialized = False
+_async_openai_initialized = False
+
+# Guards lazy init so concurrent worker threads can't build duplicate clients
+# (each with its own connection pool)
+_groq_lock = threading.Lock()
+_openai_lock = threading.Lock()
+
+# Connection pools shared by the provider SDK clients
+_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+_http_client = httpx.Client(limits=_HTTP_LIMITS)
+_async_http_client = httpx.AsyncClient(limits=_HTTP_LIMITS)
 
 def _get_groq_client():
     global _groq_client, _groq_initialized
     if not _groq_initialized:
-        if settings.groq_api_key and settings.groq_api_key != "your-groq-api-key-here":
-            try:
-                _groq_client = Groq(api_key=settings.groq_api_key)
-                log_info("ai_service", "Groq client initialized")
-            except Exception as e:
-                log_error("ai_service", f"Failed to initialize Groq client: {str(e)}")
-        _groq_initialized = True
+        with _groq_lock:
+            if not _groq_initialized:
+                if settings.groq_api_key and settings.groq_api_key != "your-groq-api-key-here":
+                    try:
+                        _groq_client = Groq(api_key=settings.groq_api_key, http_client=_http_client)
+                        log_info("ai_service", "Groq client initialized")
+                    except Exception as e:
+                        log_error("ai_service", f"Failed to initialize Groq client: {str(e)}")
+                _groq_initialized = True
     return _groq_client
 
 def _get_openai_client():
     global _openai_client, _openai_initialized
     if not _openai_initialized:
-        if settings.openai_api_key and settings.openai_api_key != "your-openai-api-key-here":
-            try:
-                _openai_client = OpenAI(api_key=settings.openai_api_key)
-                log_info("ai_service", "OpenAI client initialized")
-            except Exception as e:
-                log_error("ai_service", f"Failed to initialize OpenAI client: {str(e)}")
-        _openai_initialized = True
+        with _openai_lock:
+            if not _openai_initialized:
+                if settings.openai_api_key and settings.openai_api_key != "your-openai-api-key-here":
+                    try:
+                        _openai_client = OpenAI(api_key=settings.openai_api_key, http_client=_http_client)
+                        log_info("ai_service", "OpenAI client initialized")
+                    except Exception as e:
+                        log_error("ai_service", f"Failed to initialize OpenAI client: {str(e)}")
+                _openai_initialized = True
     return _openai_client
 
-# Configure Gemini as fallback
-genai.configure(api_key=settings.gemini_api_key)
+def _get_async_groq_client():
+    global _async_groq_client, _async_groq_initialized
+    if not _async_groq_initialized:
+        with _groq_lock:
+            if not _async_groq_initialized:
+                if settings.groq_api_key and settings.groq_api_key != "your-groq-api-key-here":
+                    try:
+                        _async_groq_client = AsyncGroq(api_key=settings.groq_api_key, http_client=_async_http_client)
+                        log_info("ai_service", "Async Groq client initialized")
+                    except Exception as e:
+                        log_error("ai_service", f"Failed to initialize async Groq client: {str(e)}")
+                _async_groq_initialized = True
+    return _async_groq_client
+
+def _get_async_openai_client():
+    global _async_openai_client, _async_openai_initialized
+    if not _async_openai_initialized:
+        with _openai_lock:
+            if not _async_openai_initialized:
+                if settings.openai_api_key and settings.openai_api_key != "your-openai-api-key-here":
+                    try:
+                        _async_openai_client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=_async_http_client)
+                        log_info("ai_service", "Async OpenAI client initialized")
+                    except Exception as e:
+                        log_error("ai_service", f"Failed to initialize async OpenAI client: {str(e)}")
+                _async_openai_initialized = True
+    return _async_openai_client
+
+# Gemini is only the last fallback, so its SDK (~0.5s to import) is loaded on
+# first use rather than at startup
+genai = lazy_import("google.generativeai")
+_gemini_lock = threading.Lock()
+_gemini_configured = False
+
+
+def configure_gemini() -> None:
+    """Import and configure the Gemini SDK once (under a lock, for the lazy import)."""
+    global _gemini_configured
+    if not _gemini_configured:
+        with _gemini_lock:
+            if not _gemini_configured:
+                genai.configure(api_key=settings.gemini_api_key)
+                _gemini_configured = True
+
+
+# Request constants, built once instead of on every call
+GROQ_MODEL = "llama-3.1-8b-instant"
+OPENAI_MODEL = "gpt-4o-mini"
+GEMINI_MODEL = "gemini-flash-latest"
+_RF_JSON = {"type": "json_object"}
+_RF_TEXT = {"type": "text"}
+_RESPONSE_FORMATS = {"json": _RF_JSON, "text": _RF_TEXT}
+_GEMINI_MIME_TYPES = {"json": "application/json", "text": "text/plain"}
+
+
+class _ProviderUnavailable(Exception):
+    """Raised when a provider has no API key configured (not counted as a failure)."""
+
+
+def _call_groq(prompt: str, response_format: str, temperature: float, timeout: float) -> str:
+    """Call Groq (llama-3.1-8b-instant) and return the response content."""
+    groq_client = _get_groq_client()
+    if not groq_client:
+        raise _ProviderUnavailable("Groq client not configured")
+
+    response = groq_client.with_options(timeout=timeout, max_retries=1).chat.completions.create(
+        model=GROQ_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        response_format=_RESPONSE_FORMATS[response_format]
+    )
+    return response.choices[0].message.content
+
+
+def _call_openai(prompt: str, response_format: str, temperature: float, timeout: float) -> str:
+    """Call OpenAI (gpt-4o-mini) and return the response content."""
+    openai_client = _get_openai_client()
+    if not openai_client:
+        raise _ProviderUnavailable("OpenAI client not configured")
+
+    response = openai_client.with_options(timeout=timeout, max_retries=1).chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        response_format=_RESPONSE_FORMATS[response_format]
+    )
+    return response.choices[0].message.content
+
+
+def _extract_gemini_text(response) -> str:
+    """Pull the text out of a Gemini response, whichever shape it came back in."""
+    try:
+        # Try to access text directly
+        return response.text
+    except (TypeError, AttributeError, ValueError):
+        # If that fails, try to get text from parts
+        if hasattr(response, 'parts') and response.parts:
+            text_parts = [part.text for part in response.parts if hasattr(part, 'text')]
+            if text_parts:
+                return ''.join(text_parts)
+
+        # If all else fails, try candidates
+        if hasattr(response, 'candidates') and response.candidates:
+            candidate = response.candidates[0]
+            if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
+                text_parts = [part.text for part in candidate.content.parts if hasattr(part, 'text')]
+                if text_parts:
+                    return ''.join(text_parts)
+
+        raise Exception("Could not extract text from Gemini response")
+
+
+@lru_cache(maxsize=8)
+def _gemini_model(response_format: str, temperature_tenths: int) -> "genai.GenerativeModel":
+    """
+    Shared Gemini model per (format, temperature rounded to 0.1).
+    Building one validates its config, so it isn't worth doing per call.
+    """
+    configure_gemini()
+    return genai.GenerativeModel(
+        model_name=GEMINI_MODEL,
+        generation_config={
+            "temperature": temperature_tenths / 10,
+            "response_mime_type": _GEMINI_MIME_TYPES[response_format]
+        }
+    )
+
+
+def _call_gemini(prompt: str, response_format: str, temperature: float, timeout: float) -> str:
+    """Call Gemini (gemini-flash-latest) and return the response text."""
+    model = _gemini_model(response_format, round(temperature * 10))
+    response = model.generate_content(prompt, request_options={"timeout": timeout})
+    return _extract_gemini_text(response)
+
+
+async def _acall_groq(prompt: str, response_format: str, temperature: float, timeout: float) -> str:
+    """Async variant of _call_groq."""
+    groq_client = _get_async_groq_client()
+    if not groq_client:
+        raise _ProviderUnavailable("Groq client not configured")
+
+    response = await groq_client.with_options(timeout=timeout, max_retries=1).chat.completions.create(
+        model=GROQ_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        response_format=_RESPONSE_FORMATS[response_format]
+    )
+    return response.choices[0].message.content
+
+
+async def _acall_openai(prompt: str, response_format: str, temperature: float, timeout: float) -> str:
+    """Async variant of _call_openai."""
+    openai_client = _get_async_openai_client()
+    if not openai_client:
+        raise _ProviderUnavailable("OpenAI client not configured")
+
+    response = await openai_client.with_options(timeout=timeout, max_retries=1).chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        response_format=_RESPONSE_FORMATS[response_format]
+    )
+    return response.choices[0].message.content
+
+
+async def _acall_gemini(prompt: str, response_format: str, temperature: float, timeout: float) -> str:
+    """Async variant of _call_gemini."""
+    model = _gemini_model(response_format, round(temperature * 10))
+    response = await model.generate_content_async(prompt, request_options={"timeout": timeout})
+    return _extract_gemini_text(response)
+
+
+# Provider chain, in priority order
+_PROVIDERS = [
+    ("groq", _call_groq),
+    ("openai", _call_openai),
+    ("gemini", _call_gemini),
+]
+
+_ASYNC_PROVIDERS = [
+    ("groq", _acall_groq),
+    ("openai", _acall_openai),
+    ("gemini", _acall_gemini),
+]
+
+# Per-provider circuit breaker: after a failure the provider is skipped for an
+# exponentially growing cooldown (2, 4, 8, ... seconds, capped) instead of
+# paying its timeout on every call
+BREAKER_MAX_COOLDOWN_SECONDS = 60
+_breaker = {name: {"fails": 0, "open_until": 0.0} for name, _ in _PROVIDERS}
+
+
+# Responses for deterministic (temperature 0) or explicitly cacheable requests
+_response_cache = TTLCache(maxsize=4096, ttl_seconds=3600)
+
+
+# Runs of inline whitespace, collapsed when normalizing prompts
+_INLINE_WS_RE = re.compile(r"[ \t]+")
+
+# Leading ```/```json fence and trailing ``` fence (with surrounding whitespace)
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z")
+
+# Characters that can open/close a JSON object or string
+_JSON_STRUCT_RE = re.compile(r'[{}"\\]')
+
+
+class _JsonObjectScanner:
+    """Finds where the first top-level JSON object in a chunked stream ends."""
+
+    __slots__ = ("depth", "in_string", "skip_at", "offset")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.skip_at = -1  # stream position of a backslash-escaped character
+        self.offset = 0
+
+    def feed(self, chunk: str) -> int:
+        """Return the index in chunk just past the closing brace, or -1."""
+        for match in _JSON_STRUCT_RE.finditer(chunk):
+            position = self.offset + match.start()
+            if position == self.skip_at:
+                continue
+            char = match.group()
+            if char == "\\":
+                if self.in_string:
+                    self.skip_at = position + 1
+            elif char == '"':
+                self.in_string = not self.in_string
+            elif self.in_string:
+                continue
+            elif char == "{":
+                self.depth += 1
+            elif self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return match.end()
+        self.offset += len(chunk)
+        return -1
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """Trim the prompt and collapse runs of spaces/tabs (line breaks are kept)."""
+    return _INLINE_WS_RE.sub(" ", prompt.strip())
+
+
+def _cache_key(prompt: str, response_format: str, temperature: float) -> bytes:
+    """
+    128-bit blake2b digest of the request parameters.
+
+    The prompt is normalized first, so OCR'd text with stray runs of spaces
+    shares one entry across the single, streamed and batched paths.
+    """
+    return hashlib.blake2b(
+        orjson.dumps([response_format, temperature, _normalize_prompt(prompt)]),
+        digest_size=16
+    ).digest()
+
+
+# Adaptive per-provider timeouts: an EWMA of each provider's latency (mean and
+# variance, in seconds) sets the cutoff at mean + 3 standard deviations, so a
+# stuck connection fails over quickly instead of holding the worker for minutes.
+# Long prompts (note text, week plans) produce long JSON bodies, so they keep
+# their own estimate and a higher floor instead of sharing one with short calls.
+MIN_TIMEOUT_SECONDS = 5.0
+MIN_LONG_TIMEOUT_SECONDS = 20.0
+MAX_TIMEOUT_SECONDS = 60.0
+LONG_PROMPT_CHARS = 4000
+_LATENCY_ALPHA = 0.2
+_latency_stats = {(name, long_prompt): [10.0, 25.0]
+                  for name, _ in _PROVIDERS for long_prompt in (False, True)}
+
+_TIMEOUT_ERRORS = (GroqTimeoutError, OpenAITimeoutError, TimeoutError)
+
+
+def _is_long_prompt(prompt: str) -> bool:
+    return len(prompt) >= LONG_PROMPT_CHARS
+
+
+def _provider_timeout(name: str, long_prompt: bool = False) -> float:
+    mean, var = _latency_stats[(name, long_prompt)]
+    floor = MIN_LONG_TIMEOUT_SECONDS if long_prompt else MIN_TIMEOUT_SECONDS
+    return min(MAX_TIMEOUT_SECONDS, max(floor, mean + 3 * math.sqrt(var)))
+
+
+def _record_latency(name: str, seconds: float, long_prompt: bool = False) -> None:
+    stats = _latency_stats[(name, long_prompt)]
+    diff = seconds - stats[0]
+    stats[0] += _LATENCY_ALPHA * diff
+    stats[1] = (1 - _LATENCY_ALPHA) * (stats[1] + _LATENCY_ALPHA * diff * diff)
+
+
+def _record_timeout(name: str, error: Exception, elapsed: float, timeout: float, long_prompt: bool) -> None:
+    """
+    Count a timed-out call as a sample of at least its timeout.
+
+    Without this only successes feed the estimate, so once the cutoff shrinks
+    a slower request times out on every attempt and the cutoff never grows back.
+    """
+    if isinstance(error, _TIMEOUT_ERRORS) or elapsed >= timeout:
+        _record_latency(name, max(elapsed, timeout), long_prompt)
+
+
+def _circuit_open(name: str) -> bool:
+    return time.monotonic() < _breaker[name]["open_until"]
+
+
+def _record_failure(name: str) -> None:
+    state = _breaker[name]
+    state["fails"] += 1
+    state["open_until"] = time.monotonic() + min(BREAKER_MAX_COOLDOWN_SECONDS, 2 ** state["fails"])
+
+
+def _record_success(name: str) -> None:
+    state = _breaker[name]
+    state["fails"] = 0
+    state["open_until"] = 0.0
 
 
 def generate_completion(
     prompt: str,
     response_format: str = "json",
-    temperature: float = 0.7
+    temperature: float = 0.7,
+    cacheable: bool = False
 ) -> str:
     """
     Generate AI completion with automatic fallback between providers.
 
     Priority order:
-    1. Groq (llama-3.1-70b-versatile) - Fastest
+    1. Groq (llama-3.1-8b-instant) - Fastest
     2. OpenAI (gpt-4o-mini) - Reliable
-    3. Gemini (gemini-1.5-flash-8b) - Fallback
+    3. Gemini (gemini-flash-latest) - Fallback
+
+    Providers whose circuit breaker is open (recent consecutive failures) are
+    skipped until their cooldown expires.
+
+    Requests with temperature 0 (or cacheable=True) are served from an
+    in-process cache when the same prompt was answered recently. JSON
+    responses are only cached by generate_json_completion, once they parse.
 
     Args:
         prompt: The prompt to send to the AI
         response_format: "json" or "text"
         temperature: Response randomness (0.0-1.0)
+        cacheable: Reuse a cached response even when temperature > 0
 
     Returns:
         Generated text response
@@ -72,111 +423,308 @@ def generate_completion(
     Raises:
         Exception: If all providers fail
     """
+    use_cache = cacheable or temperature == 0
+    if use_cache:
+        key = _cache_key(prompt, response_format, temperature)
+        cached = _response_cache.get(key)
+        if cached is not None:
+            log_info("ai_service", "Serving cached completion")
+            return cached
+
+    last_error = None
+    long_prompt = _is_long_prompt(prompt)
+
+    for name, call in _PROVIDERS:
+        if _circuit_open(name):
+            log_info("ai_service", f"Skipping {name}: circuit open")
+            continue
+
+        timeout = _provider_timeout(name, long_prompt)
+        started = time.monotonic()
+        try:
+            log_info("ai_service", f"Attempting {name} API call")
+            content = call(prompt, response_format, temperature, timeout)
+            _record_latency(name, time.monotonic() - started, long_prompt)
+            _record_success(name)
+            log_info("ai_service", f"{name} API call successful")
+            if use_cache and response_format != "json":
+                _response_cache.set(key, content)
+            return content
+        except _ProviderUnavailable:
+            continue
+        except Exception as e:
+            _record_timeout(name, e, time.monotonic() - started, timeout, long_prompt)
+            _record_failure(name)
+            last_error = e
+            log_error("ai_service", f"{name} API failed: {str(e)}, trying next provider")
+
+    if last_error is None:
+        raise Exception("All AI providers failed. No provider is currently available")
+    raise Exception(f"All AI providers failed. Last error: {str(last_error)}")
+
+
+def generate_completion_stream(
+    prompt: str,
+    response_format: str = "json",
+    temperature: float = 0.7
+) -> Iterator[str]:
+    """
+    Stream an AI completion chunk by chunk.
+
+    Groq is streamed (stream=True) so callers can start on the first chunk
+    instead of waiting for the whole body. If Groq is unavailable or its
+    circuit is open, the rest of the provider chain is used and the full
+    response is yielded as a single chunk.
 
-    # Try Groq first (fastest)
+    Args:
+        prompt: The prompt to send to the AI
+        response_format: "json" or "text"
+        temperature: Response randomness (0.0-1.0)
+
+    Yields:
+        Pieces of the generated text, in order
+    """
     groq_client = _get_groq_client()
-    if groq_client:
+    if groq_client and not _circuit_open("groq"):
+        started = False
+        long_prompt = _is_long_prompt(prompt)
+        timeout = _provider_timeout("groq", long_prompt)
+        began = time.monotonic()
         try:
-            log_info("ai_service", "Attempting Groq API call")
-            response = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+            stream = groq_client.with_options(
+                timeout=timeout, max_retries=1
+            ).chat.completions.create(
+                model=GROQ_MODEL,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
-                response_format={"type": "json_object"} if response_format == "json" else {"type": "text"}
+                response_format=_RESPONSE_FORMATS[response_format],
+                stream=True
             )
-            log_info("ai_service", "Groq API call successful")
-            return response.choices[0].message.content
+            # Closing the SDK stream releases its pooled connection and stops
+            # generation, including when the caller closes this generator early
+            # (GeneratorExit at the yield isn't caught by the except below)
+            try:
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        started = True
+                        yield delta
+            finally:
+                stream.close()
+            _record_success("groq")
+            return
         except Exception as e:
-            log_error("ai_service", f"Groq API failed: {str(e)}, trying fallback")
+            _record_timeout("groq", e, time.monotonic() - began, timeout, long_prompt)
+            _record_failure("groq")
+            log_error("ai_service", f"groq stream failed: {str(e)}")
+            # Part of the response already reached the caller; can't switch providers now
+            if started:
+                raise
 
-    # Try OpenAI GPT-4o-mini (reliable)
-    openai_client = _get_openai_client()
-    if openai_client:
+    yield generate_completion(prompt, response_format=response_format, temperature=temperature)
+
+
+async def _agenerate_completion(prompt: str, response_format: str, temperature: float) -> str:
+    """Async counterpart of generate_completion (same chain and circuit breaker)."""
+    last_error = None
+    long_prompt = _is_long_prompt(prompt)
+
+    for name, call in _ASYNC_PROVIDERS:
+        if _circuit_open(name):
+            log_info("ai_service", f"Skipping {name}: circuit open")
+            continue
+
+        timeout = _provider_timeout(name, long_prompt)
+        started = time.monotonic()
         try:
-            log_info("ai_service", "Attempting OpenAI API call")
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                response_format={"type": "json_object"} if response_format == "json" else {"type": "text"}
-            )
-            log_info("ai_service", "OpenAI API call successful")
-            return response.choices[0].message.content
+            content = await call(prompt, response_format, temperature, timeout)
+            _record_latency(name, time.monotonic() - started, long_prompt)
+            _record_success(name)
+            return content
+        except _ProviderUnavailable:
+            continue
         except Exception as e:
-            log_error("ai_service", f"OpenAI API failed: {str(e)}, trying Gemini fallback")
+            _record_timeout(name, e, time.monotonic() - started, timeout, long_prompt)
+            _record_failure(name)
+            last_error = e
+            log_error("ai_service", f"{name} API failed: {str(e)}, trying next provider")
+
+    if last_error is None:
+        raise Exception("All AI providers failed. No provider is currently available")
+    raise Exception(f"All AI providers failed. Last error: {str(last_error)}")
+
 
-    # Fallback to Gemini
+async def agenerate_completions(
+    prompts: list[str],
+    response_format: str = "json",
+    temperature: float = 0.7,
+    max_concurrency: int = 5,
+    cacheable: bool = False
+) -> list[str]:
+    """
+    Generate completions for several prompts concurrently.
+
+    Prompts are normalized and deduplicated first, so identical requests in
+    a batch are sent once and the answer is fanned back out. All remaining
+    requests are in flight at once (bounded by max_concurrency to stay under
+    provider rate limits), so the batch takes roughly as long as its slowest
+    request rather than the sum of all of them. Deterministic (or cacheable)
+    requests also go through the same response cache as generate_completion.
+
+    Args:
+        prompts: Prompts to send
+        response_format: "json" or "text"
+        temperature: Response randomness (0.0-1.0)
+        max_concurrency: Maximum number of requests in flight at once
+        cacheable: Reuse cached responses even when temperature > 0
+
+    Returns:
+        Generated responses, in the same order as prompts
+
+    Raises:
+        Exception: If all providers fail for any prompt
+    """
+    use_cache = cacheable or temperature == 0
+
+    # Group the original positions by normalized prompt
+    positions: dict[bytes, list[int]] = {}
+    unique_prompts: dict[bytes, str] = {}
+    for index, prompt in enumerate(prompts):
+        key = _cache_key(prompt, response_format, temperature)
+        if key not in positions:
+            positions[key] = []
+            unique_prompts[key] = _normalize_prompt(prompt)
+        positions[key].append(index)
+
+    results_by_key: dict[bytes, str] = {}
+    if use_cache:
+        for key in unique_prompts:
+            cached = _response_cache.get(key)
+            if cached is not None:
+                results_by_key[key] = cached
+
+    pending = [key for key in unique_prompts if key not in results_by_key]
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _bounded(prompt: str) -> str:
+        async with semaphore:
+            return await _agenerate_completion(prompt, response_format, temperature)
+
+    responses = await asyncio.gather(*(_bounded(unique_prompts[key]) for key in pending))
+    for key, content in zip(pending, responses):
+        results_by_key[key] = content
+        # Same rule as generate_completion: JSON is only cached once it parses
+        if use_cache and response_format != "json":
+            _response_cache.set(key, content)
+
+    results = [None] * len(prompts)
+    for key, indexes in positions.items():
+        for index in indexes:
+            results[index] = results_by_key[key]
+    return results
+
+
+def _collect_json_stream(prompt: str, temperature: float, cacheable: bool) -> str:
+    """
+    Read a streamed JSON completion, stopping once its top-level object closes.
+
+    Closing the stream early stops the provider from generating (and billing)
+    any trailing tokens after the object.
+    """
+    if cacheable or temperature == 0:
+        cached = _response_cache.get(_cache_key(prompt, "json", temperature))
+        if cached is not None:
+            log_info("ai_service", "Serving cached completion")
+            return cached
+
+    scanner = _JsonObjectScanner()
+    chunks = []
+    stream = generate_completion_stream(prompt, response_format="json", temperature=temperature)
     try:
-        log_info("ai_service", "Attempting Gemini API call (fallback)")
-        model = genai.GenerativeModel(
-            model_name='gemini-flash-latest',
-            generation_config={
-                "temperature": temperature,
-                "response_mime_type": "application/json" if response_format == "json" else "text/plain"
-            }
-        )
-        response = model.generate_content(prompt)
-        log_info("ai_service", "Gemini API call successful")
+        for chunk in stream:
+            end = scanner.feed(chunk)
+            if end >= 0:
+                chunks.append(chunk[:end])
+                break
+            chunks.append(chunk)
+    finally:
+        stream.close()
+    return "".join(chunks)
 
-        # Handle different response formats
-        try:
-            # Try to access text directly
-            return response.text
-        except (TypeError, AttributeError):
-            # If that fails, try to get text from parts
-            if hasattr(response, 'parts') and response.parts:
-                text_parts = []
-                for part in response.parts:
-                    if hasattr(part, 'text'):
-                        text_parts.append(part.text)
-                if text_parts:
-                    return ''.join(text_parts)
 
-            # If all else fails, try candidates
-            if hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    text_parts = []
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'text'):
-                            text_parts.append(part.text)
-                    if text_parts:
-                        return ''.join(text_parts)
+def _parse_json_completion(prompt: str, response_text: str, temperature: float, cacheable: bool) -> dict[str, Any]:
+    """Parse a JSON completion and cache its text once it parses."""
+    # Clean up response (remove markdown code fences if present)
+    response_text = _FENCE_RE.sub("", response_text)
+
+    # Parse JSON
+    try:
+        result = orjson.loads(response_text)
+    except orjson.JSONDecodeError as e:
+        log_error("ai_service", f"Failed to parse JSON response: {str(e)} | response: {preview_text(response_text)}")
+        raise Exception(f"Failed to parse AI JSON response: {str(e)}")
+
+    # Only cache responses that parsed. The cleaned text is stored (not the dict)
+    # because callers mutate the returned dict.
+    if cacheable or temperature == 0:
+        _response_cache.set(_cache_key(prompt, "json", temperature), response_text)
+
+    return result
 
-            raise Exception("Could not extract text from Gemini response")
 
-    except Exception as e:
-        log_error("ai_service", f"Gemini API failed: {str(e)}")
-        raise Exception(f"All AI providers failed. Last error: {str(e)}")
+async def agenerate_json_completion(
+    prompt: str,
+    temperature: float = 0.7,
+    cacheable: bool = False
+) -> dict[str, Any]:
+    """
+    Async counterpart of generate_json_completion.
 
+    Awaits the providers' async clients (Gemini via generate_content_async)
+    instead of holding a worker thread for the whole round trip.
 
-def generate_json_completion(prompt: str, temperature: float = 0.7) -> dict[str, Any]:
+    Args:
+        prompt: The prompt (should request JSON response)
+        temperature: Response randomness
+        cacheable: Reuse a cached response even when temperature > 0
+
+    Returns:
+        Parsed JSON dict
+    """
+    response_text = None
+    if cacheable or temperature == 0:
+        response_text = _response_cache.get(_cache_key(prompt, "json", temperature))
+        if response_text is not None:
+            log_info("ai_service", "Serving cached completion")
+    if response_text is None:
+        response_text = await _agenerate_completion(prompt, "json", temperature)
+
+    return _parse_json_completion(prompt, response_text, temperature, cacheable)
+
+
+def generate_json_completion(
+    prompt: str,
+    temperature: float = 0.7,
+    cacheable: bool = False,
+    stream: bool = False
+) -> dict[str, Any]:
     """
     Generate JSON completion from AI.
 
     Args:
         prompt: The prompt (should request JSON response)
         temperature: Response randomness
+        cacheable: Reuse a cached response even when temperature > 0
+        stream: Stream the response and stop reading once the JSON object is complete
 
     Returns:
         Parsed JSON dict
     """
-    response_text = generate_completion(prompt, response_format="json", temperature=temperature)
-
-    # Clean up response (remove markdown code fences if present)
-    response_text = response_text.strip()
-    if response_text.startswith("```json"):
-        response_text = response_text[7:]
-    if response_text.startswith("```"):
-        response_text = response_text[3:]
-    if response_text.endswith("```"):
-        response_text = response_text[:-3]
-    response_text = response_text.strip()
+    if stream:
+        response_text = _collect_json_stream(prompt, temperature, cacheable)
+    else:
+        response_text = generate_completion(
+            prompt, response_format="json", temperature=temperature, cacheable=cacheable
+        )
 
-    # Parse JSON
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        log_error("ai_service", f"Failed to parse JSON response: {str(e)}")
-        log_error("ai_service", f"Response was: {response_text}")
-        raise Exception(f"Failed to parse AI JSON response: {str(e)}")
+    return _parse_json_completion(prompt, response_text, temperature, cacheable)
@@ -3,11 +3,13 @@ Service for scheduling assignments into the calendar.
 """
 
 from datetime import datetime, date, time, timedelta
-from typing import List
+from typing import List, Tuple
+from zoneinfo import ZoneInfo
 
 from app.schemas.calendar import CalendarEvent, FreeBlock
 from app.models.assignment import Assignment
-from app.utils.logger import log_info, log_debug
+from app.utils.logger import log_info, log_debug, log_debug_enabled
+from app.utils.time_utils import clock_label
 
 # Configuration constants
 DAY_START_HOUR = 8   # 08:00
@@ -15,7 +17,88 @@ DAY_END_HOUR = 23    # 23:00 / 11pm
 MAX_STUDY_HOURS_PER_DAY = 4.0
 DEFAULT_BLOCK_HOURS = 1.0      # length of each study block
 MIN_BLOCK_MINUTES = 30         # don't create tiny 10min blocks
+MAX_HOURS_PER_ASSIGNMENT_PER_DAY = 2.0
 LOOKAHEAD_DAYS = 7             # for later multi-day logic
+EST = ZoneInfo("America/New_York")
+
+# Integer-minute forms used internally by the scheduler
+MAX_STUDY_MINUTES_PER_DAY = int(MAX_STUDY_HOURS_PER_DAY * 60)
+DEFAULT_BLOCK_MINUTES = int(DEFAULT_BLOCK_HOURS * 60)
+MAX_MINUTES_PER_ASSIGNMENT_PER_DAY = int(MAX_HOURS_PER_ASSIGNMENT_PER_DAY * 60)
+
+
+def _schedule_core(
+    free_starts: List[int],
+    free_ends: List[int],
+    free_day_ends: List[int],
+    requested_minutes: List[int],
+    preferred_block_minutes: List[int],
+    budget_minutes: int,
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Greedy placement kernel over integer epoch minutes.
+
+    Assignments are taken in order (already sorted by urgency) and their time
+    is packed into the free blocks, earliest first, until the daily budget
+    runs out. Works purely on ints and lists, with no datetime or logging
+    work, so it stays cheap per iteration.
+
+    Args:
+        free_starts / free_ends: Free block bounds, sorted by start
+        free_day_ends: DAY_END_HOUR cutoff for each free block
+        requested_minutes: Minutes wanted today, per assignment
+        preferred_block_minutes: Preferred block length, per assignment
+        budget_minutes: Study minutes left for the day
+
+    Returns:
+        (assignment_index, free_block_index, start_minute, block_minutes) tuples
+    """
+    placements = []
+
+    # Next unused minute in each free block. Later assignments continue where
+    # earlier ones stopped instead of being stacked on the same time.
+    free_cursors = list(free_starts)
+    # Blocks before this index are used up (or too short); never rescan them
+    first_live_idx = 0
+    free_count = len(free_starts)
+
+    for assignment_idx in range(len(requested_minutes)):
+        if budget_minutes <= 0:
+            break  # Hit max study hours for the day
+
+        remaining = min(requested_minutes[assignment_idx], budget_minutes)
+        preferred = preferred_block_minutes[assignment_idx]
+
+        for free_idx in range(first_live_idx, free_count):
+            if remaining <= 0 or budget_minutes <= 0:
+                break
+
+            free_end = free_ends[free_idx]
+            # Usable room is bounded by the free block's end and the day-end cutoff
+            limit = min(free_end, free_day_ends[free_idx])
+            cursor = free_cursors[free_idx]
+
+            while remaining > 0 and limit - cursor >= MIN_BLOCK_MINUTES:
+                block_minutes = min(preferred, remaining, limit - cursor)
+                if block_minutes < MIN_BLOCK_MINUTES:
+                    break  # Can't fit a meaningful block
+
+                placements.append((assignment_idx, free_idx, cursor, block_minutes))
+                cursor += block_minutes
+                remaining -= block_minutes
+                budget_minutes -= block_minutes
+
+                # Check if we've hit the daily max
+                if budget_minutes <= 0:
+                    break
+
+            free_cursors[free_idx] = cursor
+
+            # Advance past a leading block that can't hold another block
+            if free_idx == first_live_idx and limit - cursor < MIN_BLOCK_MINUTES:
+                first_live_idx += 1
+
+    return placements
 
 
 def propose_assignment_blocks_for_today(
@@ -38,17 +121,18 @@ def propose_assignment_blocks_for_today(
     Returns:
         List of proposed CalendarEvent objects with event_type="assignment"
     """
+    # Debug-only values (f-strings, strftime, the top-3 list) are only built when
+    # debug logging is actually on
+    debug_on = log_debug_enabled()
+
     log_info("assignment_scheduler", "Starting assignment scheduling",
             date=str(today),
             free_blocks=len(free_blocks),
             total_assignments=len(assignments))
 
     # Step 1: Filter to incomplete assignments that are due >= today
-    today_midnight = datetime.combine(today, time.min)
-    if today_midnight.tzinfo is None:
-        # Make timezone-aware if needed (use EST for consistency with codebase)
-        from zoneinfo import ZoneInfo
-        today_midnight = today_midnight.replace(tzinfo=ZoneInfo("America/New_York"))
+    # (timezone-aware in EST for consistency with the rest of the codebase)
+    today_midnight = datetime.combine(today, time.min, tzinfo=EST)
 
     # Filter assignments with smart urgency logic (same as prompt_builder.py)
     eligible_assignments = []
@@ -80,43 +164,49 @@ def propose_assignment_blocks_for_today(
             if days_until_due <= 5 and a.priority >= 2:
                 eligible_assignments.append(a)
 
-    log_debug("assignment_scheduler", "Eligible assignments found",
-             eligible=len(eligible_assignments))
+    if debug_on:
+        log_debug("assignment_scheduler", "Eligible assignments found",
+                 eligible=len(eligible_assignments))
 
     if not eligible_assignments:
         log_info("assignment_scheduler", "No eligible assignments to schedule")
         return []
 
-    # Step 2: Sort assignments by due_date ascending, then priority descending
-    eligible_assignments.sort(key=lambda a: (a.due_date, -a.priority))
-
-    log_debug("assignment_scheduler", "Top 3 sorted assignments",
-             assignments=[f"{a.title} (due {a.due_date}, P{a.priority}, {a.estimated_hours}h)"
-                         for a in eligible_assignments[:3]])
+    # Step 2 (preflight): Calculate how much study time is already scheduled today,
+    # and stop before sorting or sizing anything if the day is already full.
+    # The scheduler works in integer minutes throughout (exact arithmetic, no
+    # float/timedelta churn); datetimes are only built for emitted events.
+    # (filter first, then sum a list: cheaper than a filtering generator)
+    scheduled_blocks = [e for e in events if e.event_type == "assignment"]
+    already_scheduled_minutes = sum([
+        int(e.end.timestamp() - e.start.timestamp()) for e in scheduled_blocks
+    ]) // 60
+
+    if debug_on:
+        log_debug("assignment_scheduler", "Already scheduled hours",
+                 hours=f"{already_scheduled_minutes / 60:.1f}h")
+
+    budget_minutes = MAX_STUDY_MINUTES_PER_DAY - already_scheduled_minutes
+    if budget_minutes <= 0:
+        log_info("assignment_scheduler", "Daily study limit already reached",
+                max_hours=MAX_STUDY_HOURS_PER_DAY)
+        return []
 
-    # Step 3: Calculate how many hours already scheduled today
-    already_scheduled_hours = sum(
-        (e.end - e.start).total_seconds() / 3600
-        for e in events
-        if hasattr(e, 'event_type') and e.event_type == "assignment"
-    )
+    # Step 3: Sort assignments by due_date ascending, then priority descending
+    eligible_assignments.sort(key=lambda a: (a.due_date, -a.priority))
 
-    log_debug("assignment_scheduler", "Already scheduled hours",
-             hours=f"{already_scheduled_hours:.1f}h")
+    if debug_on:
+        log_debug("assignment_scheduler", "Top 3 sorted assignments",
+                 assignments=[f"{a.title} (due {a.due_date}, P{a.priority}, {a.estimated_hours}h)"
+                             for a in eligible_assignments[:3]])
 
-    # Step 4: Iterate through assignments and place blocks
-    assignment_events = []
-    block_counter = {}  # Track block index per assignment
+    # Step 4: Work out how much time each assignment wants today
+    requested_minutes = []
+    preferred_block_minutes = []
+    block_titles = []
+    block_descriptions = []
 
     for assignment in eligible_assignments:
-        # Decide how many hours to schedule for this assignment today
-        hours_available_today = MAX_STUDY_HOURS_PER_DAY - already_scheduled_hours
-
-        if hours_available_today <= 0:
-            log_debug("assignment_scheduler", "Hit max study hours, stopping",
-                     max_hours=MAX_STUDY_HOURS_PER_DAY)
-            break
-
         # Determine block size based on assignment type and urgency
         atype = (assignment.assignment_type or '').lower()
         due_date = assignment.due_date.date() if hasattr(assignment.due_date, 'date') else assignment.due_date
@@ -124,121 +214,109 @@ def propose_assignment_blocks_for_today(
 
         # Use estimated_hours if provided, otherwise use smart defaults
         if assignment.estimated_hours is not None:
-            estimated = assignment.estimated_hours
+            estimated_minutes = round(assignment.estimated_hours * 60)
         else:
             # Smart defaults based on type
             if 'exam' in atype:
-                estimated = 2.0  # Exams need longer study blocks
+                estimated_minutes = 120  # Exams need longer study blocks
             elif 'quiz' in atype:
-                estimated = 1.0  # Quizzes need moderate blocks
+                estimated_minutes = 60  # Quizzes need moderate blocks
             elif 'lab' in atype or 'project' in atype or 'essay' in atype:
-                estimated = 1.5  # Complex assignments need longer blocks
+                estimated_minutes = 90  # Complex assignments need longer blocks
             else:
-                estimated = 1.0  # Default for homework/reading
-
-        hours_for_this_assignment_today = min(
-            estimated,
-            hours_available_today,
-            2.0,  # don't schedule more than 2h of one assignment in a single day
+                estimated_minutes = DEFAULT_BLOCK_MINUTES  # Default for homework/reading
+
+        # Don't schedule more than 2h of one assignment in a single day
+        requested_minutes.append(min(estimated_minutes, MAX_MINUTES_PER_ASSIGNMENT_PER_DAY))
+
+        # Flexible block duration based on assignment needs:
+        # - Exams: prefer 1.5-2h blocks
+        # - Complex assignments: prefer 1.5h blocks
+        # - Others: 1h blocks are fine
+        preferred_block_minutes.append(estimated_minutes if estimated_minutes <= 120 else 90)
+
+        # Loop-invariant per assignment: build once, not per block
+        block_titles.append(f"Work on {assignment.title}")
+        block_descriptions.append(
+            f"Auto-scheduled study block for assignment due "
+            f"{assignment.due_date.isoformat()} (in {days_until_due} days)"
         )
 
-        if hours_for_this_assignment_today <= 0:
-            continue
-
-        log_debug("assignment_scheduler", "Scheduling assignment",
-                 title=assignment.title,
-                 hours=f"{hours_for_this_assignment_today:.1f}h",
-                 type=atype or "assignment")
-
-        # Step 5: Place study blocks into free blocks
-        remaining_hours = hours_for_this_assignment_today
-        block_counter[assignment.id] = 0  # Initialize counter for this assignment
-
-        for free_block in sorted(free_blocks, key=lambda b: b.start):
-            if remaining_hours <= 0:
-                break
-
-            # Calculate available duration in this free block
-            free_duration_hours = free_block.duration_minutes / 60.0
-
-            if free_duration_hours < MIN_BLOCK_MINUTES / 60.0:
-                continue  # Skip tiny blocks
-
-            # Start placing blocks within this free block
-            cursor = free_block.start
-
-            while remaining_hours > 0 and cursor < free_block.end:
-                # Determine block duration
-                time_until_free_end = (free_block.end - cursor).total_seconds() / 3600
-
-                if time_until_free_end < MIN_BLOCK_MINUTES / 60.0:
-                    break  # Not enough time left in this free block
-
-                # Flexible block duration based on assignment needs
-                # Try to create blocks that match assignment type:
-                # - Exams: prefer 1.5-2h blocks
-                # - Complex assignments: prefer 1.5h blocks
-                # - Others: 1h blocks are fine
-                preferred_block_size = estimated if estimated <= 2.0 else 1.5
-
-                block_hours = min(
-                    preferred_block_size,
-                    remaining_hours,
-                    time_until_free_end
-                )
-
-                block_start = cursor
-                block_end = cursor + timedelta(hours=block_hours)
-
-                # Ensure block doesn't go past DAY_END_HOUR
-                day_end = datetime.combine(block_start.date(), time(DAY_END_HOUR, 0))
-                if block_start.tzinfo:
-                    day_end = day_end.replace(tzinfo=block_start.tzinfo)
-
-                if block_end > day_end:
-                    block_end = day_end
-                    block_hours = (block_end - block_start).total_seconds() / 3600
-
-                if block_hours < MIN_BLOCK_MINUTES / 60.0:
-                    break  # Can't fit a meaningful block
-
-                # Create the assignment event
-                days_until_due = (assignment.due_date.date() - today).days
-
-                assignment_event = CalendarEvent(
-                    id=f"assignment-{assignment.id}-{block_counter[assignment.id]}",
-                    title=f"Work on {assignment.title}",
-                    start=block_start,
-                    end=block_end,
-                    location="",
-                    description=f"Auto-scheduled study block for assignment due {assignment.due_date.isoformat()} (in {days_until_due} days)",
-                    event_type="assignment"
-                )
-                block_counter[assignment.id] += 1
-
-                assignment_events.append(assignment_event)
-
-                log_debug("assignment_scheduler", "Added block",
-                         time=f"{block_start.strftime('%I:%M %p')}-{block_end.strftime('%I:%M %p')}",
-                         hours=f"{block_hours:.1f}h")
-
-                # Move cursor and update counters
-                cursor = block_end
-                remaining_hours -= block_hours
-                already_scheduled_hours += block_hours
-
-                # Check if we've hit the daily max
-                if already_scheduled_hours >= MAX_STUDY_HOURS_PER_DAY:
-                    log_debug("assignment_scheduler", "Hit max hours while placing blocks")
-                    break
+        if debug_on:
+            log_debug("assignment_scheduler", "Scheduling assignment",
+                     title=assignment.title,
+                     hours=f"{requested_minutes[-1] / 60:.1f}h",
+                     type=atype or "assignment")
+
+    # Step 5: Place study blocks into free blocks.
+    # Sort free blocks once (not per assignment) and hand the kernel a
+    # struct-of-arrays view of them in epoch minutes.
+    free_blocks_sorted = sorted(free_blocks, key=lambda b: b.start)
+    free_block_starts = [int(b.start.timestamp()) // 60 for b in free_blocks_sorted]
+    free_block_ends = [int(b.end.timestamp()) // 60 for b in free_blocks_sorted]
+
+    # DAY_END_HOUR cutoff for each free block, computed once per date
+    day_end_by_date = {}  # date -> cutoff (epoch minutes)
+    free_block_day_ends = []
+    for b in free_blocks_sorted:
+        block_date = b.start.date()
+        if block_date not in day_end_by_date:
+            day_end_by_date[block_date] = int(datetime.combine(
+                block_date, time(DAY_END_HOUR, 0), tzinfo=b.start.tzinfo
+            ).timestamp()) // 60
+        free_block_day_ends.append(day_end_by_date[block_date])
+
+    placements = _schedule_core(
+        free_block_starts,
+        free_block_ends,
+        free_block_day_ends,
+        requested_minutes,
+        preferred_block_minutes,
+        budget_minutes,
+    )
 
-            if already_scheduled_hours >= MAX_STUDY_HOURS_PER_DAY:
-                break
+    # Step 6: Materialize the placements as calendar events (datetimes are only
+    # built here, relative to each free block's start so tzinfo is kept)
+    assignment_events = []
+    add_event = assignment_events.append
+    placed_minutes = 0
+
+    # Placements come out grouped by assignment, so a local counter plus a
+    # prebuilt "assignment-<id>-" prefix gives each block its stable id
+    current_assignment_idx = -1
+    id_prefix = ""
+    block_index = 0
+
+    for assignment_idx, free_idx, start_min, block_minutes in placements:
+        if assignment_idx != current_assignment_idx:
+            current_assignment_idx = assignment_idx
+            id_prefix = f"assignment-{eligible_assignments[assignment_idx].id}-"
+            block_index = 0
+
+        free_block = free_blocks_sorted[free_idx]
+        block_start = free_block.start + timedelta(minutes=start_min - free_block_starts[free_idx])
+        block_end = block_start + timedelta(minutes=block_minutes)
+
+        add_event(CalendarEvent(
+            id=id_prefix + str(block_index),
+            title=block_titles[assignment_idx],
+            start=block_start,
+            end=block_end,
+            location="",
+            description=block_descriptions[assignment_idx],
+            event_type="assignment"
+        ))
+        block_index += 1
+        placed_minutes += block_minutes
+
+        if debug_on:
+            log_debug("assignment_scheduler", "Added block",
+                     time=f"{clock_label(block_start)}-{clock_label(block_end)}",
+                     hours=f"{block_minutes / 60:.1f}h")
 
-    total_hours = sum((e.end - e.start).total_seconds() / 3600 for e in assignment_events)
     log_info("assignment_scheduler", "Created assignment blocks",
             blocks=len(assignment_events),
-            total_hours=f"{total_hours:.1f}h")
+            total_hours=f"{placed_minutes / 60:.1f}h")
 
     return assignment_events
 
@@ -2,8 +2,14 @@
 Service for finding optimal bus times based on user's schedule.
 """
 
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, time, timedelta
-from typing import List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.bus_schedule import BusSchedule, Direction, Route
@@ -11,39 +17,152 @@ from app.models.user_bus_preferences import UserBusPreferences
 from app.schemas.calendar import CalendarEvent
 
 
+@lru_cache(maxsize=2048)
+def _fmt_12h(t: time) -> str:
+    """Format a time as "%I:%M %p" (e.g. "07:05 PM") without going through strftime."""
+    hour = t.hour
+    return f"{hour % 12 or 12:02d}:{t.minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+class _BusRow(NamedTuple):
+    """One cached timetable row with its display strings prebuilt."""
+    departure_time: time
+    arrival_time: time
+    is_late_night: bool
+    departure_label: str
+    arrival_label: str
+    departure_iso: str
+    arrival_iso: str
+
+
+# The bus timetable is static reference data, so it is read once per process
+# and served from memory. Keyed by (day_of_week, direction, route); the
+# route=None entry holds every route for that day/direction. Each list holds
+# _BusRow tuples sorted by departure.
+_SCHEDULE_CACHE: Dict[Tuple[int, Direction, Optional[Route]], List[_BusRow]] = {}
+# Sorted search keys for the finders: departure times parallel to each
+# _SCHEDULE_CACHE list, and the same rows re-sorted by arrival time
+_DEPARTURE_KEYS: Dict[Tuple[int, Direction, Optional[Route]], List[time]] = {}
+_ARRIVAL_INDEX: Dict[Tuple[int, Direction, Optional[Route]], Tuple[List[time], List[_BusRow]]] = {}
+# Finished unfiltered get_all_buses_for_day payloads, keyed by date. They
+# depend only on the timetable and the date, so repeat calls skip all
+# formatting. Bounded by clearing once it holds more than a week or two.
+_DAY_PAYLOAD_CACHE: Dict[datetime.date, dict] = {}
+_DAY_PAYLOAD_CACHE_SIZE = 14
+_schedule_loaded = False
+_schedule_lock = threading.Lock()
+
+
+def _load_schedule_cache(db: Session) -> None:
+    """Read the whole bus_schedules table once and bucket it by day/direction/route."""
+    global _schedule_loaded
+    # Select plain columns rather than BusSchedule entities: only these
+    # values are needed, so skip ORM identity-map hydration
+    rows = db.execute(
+        select(
+            BusSchedule.day_of_week,
+            BusSchedule.direction,
+            BusSchedule.route,
+            BusSchedule.departure_time,
+            BusSchedule.arrival_time,
+            BusSchedule.is_late_night
+        ).order_by(BusSchedule.departure_time)
+    ).all()
+
+    cache: Dict[Tuple[int, Direction, Optional[Route]], List[_BusRow]] = {}
+    for day_of_week, direction, route, departure_time, arrival_time, is_late_night in rows:
+        # Labels and ISO times never change, so format them once here
+        row = _BusRow(
+            departure_time,
+            arrival_time,
+            bool(is_late_night),
+            _fmt_12h(departure_time),
+            _fmt_12h(arrival_time),
+            departure_time.isoformat(),
+            arrival_time.isoformat()
+        )
+        cache.setdefault((day_of_week, direction, route), []).append(row)
+        cache.setdefault((day_of_week, direction, None), []).append(row)
+
+    departure_keys = {}
+    arrival_index = {}
+    for key, rows in cache.items():
+        departure_keys[key] = [row.departure_time for row in rows]
+        by_arrival = sorted(rows, key=lambda row: row.arrival_time)
+        arrival_index[key] = ([row.arrival_time for row in by_arrival], by_arrival)
+
+    _SCHEDULE_CACHE.clear()
+    _SCHEDULE_CACHE.update(cache)
+    _DEPARTURE_KEYS.clear()
+    _DEPARTURE_KEYS.update(departure_keys)
+    _ARRIVAL_INDEX.clear()
+    _ARRIVAL_INDEX.update(arrival_index)
+    _schedule_loaded = True
+
+
+def _ensure_schedule_loaded(db: Session) -> None:
+    """Load the timetable on first use."""
+    if not _schedule_loaded:
+        with _schedule_lock:
+            if not _schedule_loaded:
+                _load_schedule_cache(db)
+
+
+def _get_buses(
+    db: Session,
+    day_of_week: int,
+    direction: Direction,
+    route: Optional[Route] = None
+) -> List[_BusRow]:
+    """Return cached timetable rows sorted by departure."""
+    _ensure_schedule_loaded(db)
+    return _SCHEDULE_CACHE.get((day_of_week, direction, route), [])
+
+
+def invalidate_schedule_cache() -> None:
+    """Drop the cached timetable; call after changing bus_schedules rows."""
+    global _schedule_loaded
+    with _schedule_lock:
+        _SCHEDULE_CACHE.clear()
+        _DEPARTURE_KEYS.clear()
+        _ARRIVAL_INDEX.clear()
+        _DAY_PAYLOAD_CACHE.clear()
+        _schedule_loaded = False
+
+
+# Keyword matchers for deciding whether an event needs the user on campus.
+# Each is one regex pass over an already-lowercased string.
+_REMOTE_TITLE_RE = re.compile(r"online|virtual|zoom|remote")
+_REMOTE_LOCATION_RE = re.compile(r"zoom\.us|https?://|meet\.google|teams\.microsoft|online|virtual|remote")
+_CAMPUS_LOCATION_RE = re.compile(r"udc|campus|student hold|university|building|room")
+
+
+@dataclass(slots=True)
 class BusSuggestion:
     """Represents a suggested bus to take."""
 
-    def __init__(
-        self,
-        direction: Direction,
-        departure_time: time,
-        arrival_time: time,
-        reason: str,
-        is_late_night: bool = False
-    ):
-        self.direction = direction
-        self.departure_time = departure_time
-        self.arrival_time = arrival_time
-        self.reason = reason
-        self.is_late_night = is_late_night
+    direction: Direction
+    departure_time: time
+    arrival_time: time
+    reason: str
+    is_late_night: bool = False
 
     def to_dict(self, date: datetime.date) -> dict:
         """Convert to dictionary for API response."""
-        # Combine date with time to create full datetime
-        departure_dt = datetime.combine(date, self.departure_time)
-        arrival_dt = datetime.combine(date, self.arrival_time)
+        # Build the ISO strings from the date prefix rather than full datetimes
+        date_prefix = date.isoformat()
 
         # Handle overnight buses (arrival next day)
+        arrival_prefix = date_prefix
         if self.arrival_time < self.departure_time:
-            arrival_dt += timedelta(days=1)
+            arrival_prefix = (date + timedelta(days=1)).isoformat()
 
         return {
             "direction": self.direction.value,
-            "departure_time": departure_dt.isoformat(),
-            "arrival_time": arrival_dt.isoformat(),
-            "departure_label": self.departure_time.strftime("%I:%M %p"),
-            "arrival_label": self.arrival_time.strftime("%I:%M %p"),
+            "departure_time": f"{date_prefix}T{self.departure_time.isoformat()}",
+            "arrival_time": f"{arrival_prefix}T{self.arrival_time.isoformat()}",
+            "departure_label": _fmt_12h(self.departure_time),
+            "arrival_label": _fmt_12h(self.arrival_time),
             "reason": self.reason,
             "is_late_night": self.is_late_night
         }
@@ -76,27 +195,19 @@ def find_bus_to_campus(
     desired_arrival_dt = target_arrival - timedelta(minutes=buffer_minutes)
     desired_arrival_time = desired_arrival_dt.time()
 
-    # Query outbound buses for this day
-    buses = db.query(BusSchedule).filter(
-        BusSchedule.direction == Direction.outbound,
-        BusSchedule.day_of_week == day_of_week,
-        BusSchedule.arrival_time <= desired_arrival_time
-    ).order_by(BusSchedule.arrival_time.desc()).all()
+    # Get the last outbound bus that arrives before desired time (closest to target)
+    _ensure_schedule_loaded(db)
+    arrival_keys, by_arrival = _ARRIVAL_INDEX.get((day_of_week, Direction.outbound, None), ([], []))
+    i = bisect_right(arrival_keys, desired_arrival_time) - 1
 
-    if not buses:
+    if i < 0:
         return None
 
-    # Get the last bus that arrives before desired time (closest to target)
-    best_bus = buses[0]
+    best_bus = by_arrival[i]
 
     # Calculate actual arrival time relative to target
-    # Make sure both datetimes have the same timezone awareness
-    arrival_dt = datetime.combine(target_arrival.date(), best_bus.arrival_time)
-
-    # If target_arrival is timezone-aware, make arrival_dt timezone-aware too
-    if target_arrival.tzinfo is not None:
-        # Use the same timezone as target_arrival
-        arrival_dt = arrival_dt.replace(tzinfo=target_arrival.tzinfo)
+    # Build it in target_arrival's timezone (naive if that is naive) so the two compare
+    arrival_dt = datetime.combine(target_arrival.date(), best_bus.arrival_time, tzinfo=target_arrival.tzinfo)
 
     minutes_early = int((target_arrival - arrival_dt).total_seconds() / 60)
 
@@ -138,27 +249,18 @@ def find_bus_from_campus(
     desired_departure_dt = earliest_departure + timedelta(minutes=buffer_minutes)
     desired_departure_time = desired_departure_dt.time()
 
-    # Query inbound buses for this day
-    buses = db.query(BusSchedule).filter(
-        BusSchedule.direction == Direction.inbound,
-        BusSchedule.day_of_week == day_of_week,
-        BusSchedule.departure_time >= desired_departure_time
-    ).order_by(BusSchedule.departure_time.asc()).all()
+    # Get the first inbound bus that departs after desired time (soonest after last class)
+    buses = _get_buses(db, day_of_week, Direction.inbound)
+    i = bisect_left(_DEPARTURE_KEYS.get((day_of_week, Direction.inbound, None), []), desired_departure_time)
 
-    if not buses:
+    if i == len(buses):
         return None
 
-    # Get the first bus that departs after desired time (soonest after last class)
-    best_bus = buses[0]
+    best_bus = buses[i]
 
     # Calculate wait time
-    # Make sure both datetimes have the same timezone awareness
-    departure_dt = datetime.combine(earliest_departure.date(), best_bus.departure_time)
-
-    # If earliest_departure is timezone-aware, make departure_dt timezone-aware too
-    if earliest_departure.tzinfo is not None:
-        # Use the same timezone as earliest_departure
-        departure_dt = departure_dt.replace(tzinfo=earliest_departure.tzinfo)
+    # Build it in earliest_departure's timezone (naive if that is naive) so the two compare
+    departure_dt = datetime.combine(earliest_departure.date(), best_bus.departure_time, tzinfo=earliest_departure.tzinfo)
 
     wait_minutes = int((departure_dt - earliest_departure).total_seconds() / 60)
 
@@ -173,11 +275,51 @@ def find_bus_from_campus(
     )
 
 
+def _filter_campus_events(events: List[CalendarEvent]) -> List[CalendarEvent]:
+    """
+    Keep only the events that need the user on campus.
+
+    Strategy: Include events with physical locations, exclude remote/online events.
+    Callers that need both bus suggestions and the full schedule for the same
+    day can run this once and pass the result to each.
+    """
+    campus_events = []
+    for e in events:
+        title = e.title.lower()
+        location = e.location.lower() if e.location else ""
+
+        # Skip remote events entirely (remote title, or an online/meeting-link location)
+        if _REMOTE_TITLE_RE.search(title) or _REMOTE_LOCATION_RE.search(location):
+            continue
+
+        # Include if:
+        # 1. Has ANY physical location (room number, building, campus keyword, etc), OR
+        # 2. Title mentions campus location
+        if location.strip() or _CAMPUS_LOCATION_RE.search(title):
+            campus_events.append(e)
+
+    return campus_events
+
+
+def _first_and_last_events(
+    campus_events: List[CalendarEvent]
+) -> Tuple[CalendarEvent, CalendarEvent]:
+    """Return (earliest-starting, latest-ending) events in one pass over a non-empty list."""
+    first_event = last_event = campus_events[0]
+    for e in campus_events:
+        if e.start < first_event.start:
+            first_event = e
+        if e.end > last_event.end:
+            last_event = e
+    return first_event, last_event
+
+
 def get_bus_suggestions_for_day(
     db: Session,
     user_id: str,
     date: datetime.date,
-    events: List[CalendarEvent]
+    events: List[CalendarEvent],
+    campus_events: Optional[List[CalendarEvent]] = None
 ) -> Tuple[Optional[BusSuggestion], Optional[BusSuggestion]]:
     """
     Get bus suggestions for a given day based on user's calendar events.
@@ -187,64 +329,88 @@ def get_bus_suggestions_for_day(
         user_id: User's UUID
         date: The date to get suggestions for
         events: List of calendar events for the day
+        campus_events: Optional pre-filtered result of _filter_campus_events(events)
 
     Returns:
         Tuple of (morning_bus, evening_bus) suggestions, either can be None
     """
-    # Get user's bus preferences (or use defaults)
-    prefs = db.query(UserBusPreferences).filter(
-        UserBusPreferences.user_id == user_id
-    ).first()
+    # Buses only run Monday-Friday; skip the preference query and event scan
+    if date.isoweekday() > 5:
+        return None, None
 
-    arrival_buffer = prefs.arrival_buffer_minutes if prefs else 15
-    departure_buffer = prefs.departure_buffer_minutes if prefs else 0
+    # Get user's bus preferences (or use defaults)
+    arrival_buffer, departure_buffer = _get_bus_buffers(db, user_id)
 
     # Filter events to only those on campus
-    # Strategy: Include events with physical locations, exclude remote/online events
-    campus_location_keywords = ["udc", "campus", "student hold", "university", "building", "room"]
-    remote_indicators = ["zoom.us", "http://", "https://", "meet.google", "teams.microsoft", "online", "virtual", "remote"]
-    remote_title_keywords = ["online", "virtual", "zoom", "remote"]
+    if campus_events is None:
+        campus_events = _filter_campus_events(events)
 
-    campus_events = []
-    for e in events:
-        # Check if title suggests it's remote
-        title_is_remote = any(keyword in e.title.lower() for keyword in remote_title_keywords)
+    return _suggest_buses(db, campus_events, arrival_buffer, departure_buffer)
 
-        # Check if event is explicitly remote/online via location
-        location_is_remote = False
-        if e.location:
-            location_lower = e.location.lower()
-            location_is_remote = any(indicator in location_lower for indicator in remote_indicators)
 
-        is_remote = location_is_remote or title_is_remote
+def get_bus_suggestions_for_week(
+    db: Session,
+    user_id: str,
+    dates: List[datetime.date],
+    events_by_date: Dict[datetime.date, List[CalendarEvent]]
+) -> Dict[datetime.date, Tuple[Optional[BusSuggestion], Optional[BusSuggestion]]]:
+    """
+    Get bus suggestions for several days with one preferences query.
 
-        # Skip remote events entirely
-        if is_remote:
-            continue
+    Args:
+        db: Database session
+        user_id: User's UUID
+        dates: The dates to get suggestions for
+        events_by_date: Calendar events grouped by the date they start on
 
-        # Check if event has explicit campus location
-        has_campus_location = e.location and any(loc in e.location.lower() for loc in campus_location_keywords)
+    Returns:
+        Dict mapping each weekday date in dates to (morning_bus, evening_bus);
+        weekend dates are omitted since buses don't run
+    """
+    weekdays = [d for d in dates if d.isoweekday() <= 5]
+    if not weekdays:
+        return {}
 
-        # If event has ANY location (not None/empty) and it's not remote, assume it's on campus
-        has_physical_location = e.location and len(e.location.strip()) > 0
+    arrival_buffer, departure_buffer = _get_bus_buffers(db, user_id)
+
+    return {
+        d: _suggest_buses(
+            db,
+            _filter_campus_events(events_by_date.get(d, [])),
+            arrival_buffer,
+            departure_buffer
+        )
+        for d in weekdays
+    }
 
-        # Check if title explicitly mentions campus location
-        title_mentions_campus = any(loc in e.title.lower() for loc in campus_location_keywords)
 
-        # Include if:
-        # 1. Has campus location keyword in location field, OR
-        # 2. Has ANY physical location (room number, building, etc), OR
-        # 3. Title mentions campus location
-        if has_campus_location or has_physical_location or title_mentions_campus:
-            campus_events.append(e)
+def _get_bus_buffers(db: Session, user_id: str) -> Tuple[int, int]:
+    """Return the user's (arrival_buffer, departure_buffer) minutes, or the defaults."""
+    # Only the two buffer columns are needed, so select them as a plain row.
+    # Result.first() does not add a LIMIT the way Query.first() does, so ask for it.
+    prefs = db.execute(
+        select(
+            UserBusPreferences.arrival_buffer_minutes,
+            UserBusPreferences.departure_buffer_minutes
+        ).where(UserBusPreferences.user_id == user_id).limit(1)
+    ).first()
 
+    return tuple(prefs) if prefs else (15, 0)
+
+
+def _suggest_buses(
+    db: Session,
+    campus_events: List[CalendarEvent],
+    arrival_buffer: int,
+    departure_buffer: int
+) -> Tuple[Optional[BusSuggestion], Optional[BusSuggestion]]:
+    """Pick the morning and evening buses around one day's campus events."""
     # If no campus events, no bus suggestions needed
     if not campus_events:
         return None, None
 
     # Find first and last campus events
-    first_event = min(campus_events, key=lambda e: e.start)
-    last_event = max(campus_events, key=lambda e: e.end)
+    first_event, last_event = _first_and_last_events(campus_events)
 
     # Find morning bus (to arrive before first class)
     morning_bus = find_bus_to_campus(db, first_event.start, arrival_buffer)
@@ -259,7 +425,8 @@ def get_all_buses_for_day(
     db: Session,
     date: datetime.date,
     events: Optional[List[CalendarEvent]] = None,
-    filter_by_schedule: bool = True
+    filter_by_schedule: bool = True,
+    campus_events: Optional[List[CalendarEvent]] = None
 ) -> dict:
     """
     Get all bus schedules for a specific day, optionally filtered by calendar events.
@@ -269,6 +436,7 @@ def get_all_buses_for_day(
         date: The date to get buses for
         events: Optional list of calendar events to filter buses against
         filter_by_schedule: If True, filter buses based on events
+        campus_events: Optional pre-filtered result of _filter_campus_events(events)
 
     Returns:
         Dictionary with 'outbound' and 'inbound' lists of bus times
@@ -279,151 +447,124 @@ def get_all_buses_for_day(
     if day_of_week > 5:
         return {"outbound": [], "inbound": []}
 
+    # Without event filtering the result depends only on the date, so reuse
+    # the payload built by an earlier call (callers must not mutate it)
+    use_payload_cache = not (filter_by_schedule and events)
+    if use_payload_cache:
+        cached = _DAY_PAYLOAD_CACHE.get(date)
+        if cached is not None:
+            return cached
+
     # Get all outbound buses for both routes
-    westside_outbound = db.query(BusSchedule).filter(
-        BusSchedule.route == Route.westside,
-        BusSchedule.direction == Direction.outbound,
-        BusSchedule.day_of_week == day_of_week
-    ).order_by(BusSchedule.departure_time).all()
-
-    union_outbound = db.query(BusSchedule).filter(
-        BusSchedule.route == Route.union,
-        BusSchedule.direction == Direction.outbound,
-        BusSchedule.day_of_week == day_of_week
-    ).order_by(BusSchedule.departure_time).all()
+    westside_outbound = _get_buses(db, day_of_week, Direction.outbound, Route.westside)
+    union_outbound = _get_buses(db, day_of_week, Direction.outbound, Route.union)
 
     # Get all inbound buses for both routes
-    westside_inbound = db.query(BusSchedule).filter(
-        BusSchedule.route == Route.westside,
-        BusSchedule.direction == Direction.inbound,
-        BusSchedule.day_of_week == day_of_week
-    ).order_by(BusSchedule.departure_time).all()
-
-    union_inbound = db.query(BusSchedule).filter(
-        BusSchedule.route == Route.union,
-        BusSchedule.direction == Direction.inbound,
-        BusSchedule.day_of_week == day_of_week
-    ).order_by(BusSchedule.departure_time).all()
-
-    def bus_to_dict(bus: BusSchedule) -> dict:
-        """Convert bus schedule to dict with full datetime strings."""
-        departure_dt = datetime.combine(date, bus.departure_time)
-        arrival_dt = datetime.combine(date, bus.arrival_time)
+    westside_inbound = _get_buses(db, day_of_week, Direction.inbound, Route.westside)
+    union_inbound = _get_buses(db, day_of_week, Direction.inbound, Route.union)
+
+    # Date part of the ISO strings, built once per call
+    date_prefix = date.isoformat()
+    next_day_prefix = (date + timedelta(days=1)).isoformat()
 
+    def bus_to_dict(bus: _BusRow, route: Route, direction: Direction) -> dict:
+        """Convert a cached bus row to dict with full datetime strings."""
         # Handle overnight buses (arrival next day)
-        if bus.arrival_time < bus.departure_time:
-            arrival_dt += timedelta(days=1)
+        arrival_prefix = next_day_prefix if bus.arrival_time < bus.departure_time else date_prefix
 
         return {
-            "route": bus.route.value,
-            "direction": bus.direction.value,
-            "departure_time": departure_dt.isoformat(),
-            "arrival_time": arrival_dt.isoformat(),
-            "departure_label": bus.departure_time.strftime("%I:%M %p"),
-            "arrival_label": bus.arrival_time.strftime("%I:%M %p"),
+            "route": route.value,
+            "direction": direction.value,
+            "departure_time": f"{date_prefix}T{bus.departure_iso}",
+            "arrival_time": f"{arrival_prefix}T{bus.arrival_iso}",
+            "departure_label": bus.departure_label,
+            "arrival_label": bus.arrival_label,
             "is_late_night": bus.is_late_night
         }
 
     # Filter buses based on schedule if events provided
     if filter_by_schedule and events:
         # Filter events to only those on campus
-        campus_location_keywords = ["udc", "campus", "student hold", "university", "building", "room"]
-        remote_indicators = ["zoom.us", "http://", "https://", "meet.google", "teams.microsoft", "online", "virtual", "remote"]
-        remote_title_keywords = ["online", "virtual", "zoom", "remote"]
-
-        campus_events = []
-        for e in events:
-            # Check if title suggests it's remote
-            title_is_remote = any(keyword in e.title.lower() for keyword in remote_title_keywords)
-
-            # Check if event is explicitly remote/online via location
-            location_is_remote = False
-            if e.location:
-                location_lower = e.location.lower()
-                location_is_remote = any(indicator in location_lower for indicator in remote_indicators)
-
-            is_remote = location_is_remote or title_is_remote
-
-            # Skip remote events entirely
-            if is_remote:
-                continue
-
-            # Check if event has explicit campus location
-            has_campus_location = e.location and any(loc in e.location.lower() for loc in campus_location_keywords)
-
-            # If event has ANY location (not None/empty) and it's not remote, assume it's on campus
-            has_physical_location = e.location and len(e.location.strip()) > 0
-
-            # Check if title explicitly mentions campus location
-            title_mentions_campus = any(loc in e.title.lower() for loc in campus_location_keywords)
-
-            # Include if:
-            # 1. Has campus location keyword in location field, OR
-            # 2. Has ANY physical location (room number, building, etc), OR
-            # 3. Title mentions campus location
-            if has_campus_location or has_physical_location or title_mentions_campus:
-                campus_events.append(e)
-
-        def filter_buses(buses, first_event_time=None, last_event_time=None, is_outbound=True):
+        if campus_events is None:
+            campus_events = _filter_campus_events(events)
+
+        # Sweep structure for the conflict check: events sorted by start plus
+        # the running max of their end times. The first event whose running
+        # max end passes a bus's departure is the only one that can overlap
+        # the ride; if it starts after the bus arrives, nothing later can either.
+        sorted_events = sorted(campus_events, key=lambda e: e.start)
+        event_starts = [e.start for e in sorted_events]
+        max_ends = []
+        latest_end = None
+        for e in sorted_events:
+            if latest_end is None or e.end > latest_end:
+                latest_end = e.end
+            max_ends.append(latest_end)
+        event_tz = sorted_events[0].start.tzinfo if sorted_events else None
+
+        def filter_buses(buses, route, first_event_time=None, last_event_time=None, is_outbound=True):
             """Filter buses based on event schedule"""
             filtered = []
 
+            # For outbound: must arrive 5 min before first event
+            arrival_cutoff = None
+            if is_outbound and first_event_time:
+                arrival_cutoff = (datetime.combine(date, first_event_time) - timedelta(minutes=5)).time()
+            elif not is_outbound and last_event_time:
+                # For inbound: must depart after last event. Rows are sorted by
+                # departure, so skip the early ones with one bisect instead of
+                # testing each bus
+                departure_keys = _DEPARTURE_KEYS.get((day_of_week, Direction.inbound, route), [])
+                buses = buses[bisect_left(departure_keys, last_event_time):]
+
             for bus in buses:
+                departure_time, arrival_time = bus.departure_time, bus.arrival_time
+
                 # For outbound: must arrive before first event
-                # For inbound: must depart after last event
-                if is_outbound and first_event_time:
-                    if bus.arrival_time > (datetime.combine(date, first_event_time) - timedelta(minutes=5)).time():
-                        continue
-                elif not is_outbound and last_event_time:
-                    if bus.departure_time < last_event_time:
-                        continue
-
-                # Check if bus ride conflicts with any event
-                bus_departure_dt = datetime.combine(date, bus.departure_time)
-                bus_arrival_dt = datetime.combine(date, bus.arrival_time)
+                if arrival_cutoff is not None and arrival_time > arrival_cutoff:
+                    continue
+
+                # Check if bus ride conflicts with any event; build each
+                # datetime once, already in the events' timezone
+                bus_departure_dt = datetime.combine(date, departure_time, tzinfo=event_tz)
+                bus_arrival_dt = datetime.combine(date, arrival_time, tzinfo=event_tz)
 
                 # Handle overnight buses
-                if bus.arrival_time < bus.departure_time:
+                if arrival_time < departure_time:
                     bus_arrival_dt += timedelta(days=1)
 
-                # Check for conflicts with any event
-                conflicts = False
-                for event in campus_events:
-                    event_start = event.start
-                    event_end = event.end
-
-                    # Make sure all datetimes are comparable (timezone-aware)
-                    if event_start.tzinfo is not None:
-                        bus_departure_dt = bus_departure_dt.replace(tzinfo=event_start.tzinfo)
-                        bus_arrival_dt = bus_arrival_dt.replace(tzinfo=event_start.tzinfo)
-
-                    # Check if bus ride overlaps with event
-                    if bus_departure_dt < event_end and bus_arrival_dt > event_start:
-                        conflicts = True
-                        break
+                # Check if bus ride overlaps with any event
+                i = bisect_right(max_ends, bus_departure_dt)
+                if i < len(event_starts) and event_starts[i] < bus_arrival_dt:
+                    continue
 
-                if not conflicts:
-                    filtered.append(bus)
+                filtered.append(bus)
 
             return filtered
 
         # Apply filtering if campus events exist
         if campus_events:
-            first_event = min(campus_events, key=lambda e: e.start)
-            last_event = max(campus_events, key=lambda e: e.end)
+            first_event, last_event = _first_and_last_events(campus_events)
 
-            westside_outbound = filter_buses(westside_outbound, first_event_time=first_event.start.time(), is_outbound=True)
-            union_outbound = filter_buses(union_outbound, first_event_time=first_event.start.time(), is_outbound=True)
-            westside_inbound = filter_buses(westside_inbound, last_event_time=last_event.end.time(), is_outbound=False)
-            union_inbound = filter_buses(union_inbound, last_event_time=last_event.end.time(), is_outbound=False)
+            westside_outbound = filter_buses(westside_outbound, Route.westside, first_event_time=first_event.start.time(), is_outbound=True)
+            union_outbound = filter_buses(union_outbound, Route.union, first_event_time=first_event.start.time(), is_outbound=True)
+            westside_inbound = filter_buses(westside_inbound, Route.westside, last_event_time=last_event.end.time(), is_outbound=False)
+            union_inbound = filter_buses(union_inbound, Route.union, last_event_time=last_event.end.time(), is_outbound=False)
 
-    return {
+    schedule = {
         "westside": {
-            "to_campus": [bus_to_dict(bus) for bus in westside_outbound],  # Main & Murray → UDC
-            "from_campus": [bus_to_dict(bus) for bus in westside_inbound]  # UDC → Main & Murray
+            "to_campus": [bus_to_dict(bus, Route.westside, Direction.outbound) for bus in westside_outbound],  # Main & Murray → UDC
+            "from_campus": [bus_to_dict(bus, Route.westside, Direction.inbound) for bus in westside_inbound]  # UDC → Main & Murray
         },
         "union": {
-            "to_main_murray": [bus_to_dict(bus) for bus in union_outbound],  # Union → Main & Murray
-            "from_main_murray": [bus_to_dict(bus) for bus in union_inbound]  # Main & Murray → Union
+            "to_main_murray": [bus_to_dict(bus, Route.union, Direction.outbound) for bus in union_outbound],  # Union → Main & Murray
+            "from_main_murray": [bus_to_dict(bus, Route.union, Direction.inbound) for bus in union_inbound]  # Main & Murray → Union
         }
     }
+
+    if use_payload_cache:
+        if len(_DAY_PAYLOAD_CACHE) >= _DAY_PAYLOAD_CACHE_SIZE:
+            _DAY_PAYLOAD_CACHE.clear()
+        _DAY_PAYLOAD_CACHE[date] = schedule
+
+    return schedule
@@ -2,13 +2,18 @@
 Service for building day context summaries for the planning agent.
 """
 
+import re
 from dataclasses import dataclass
+from operator import itemgetter
 from datetime import date, datetime
 from typing import List, Optional
 
 from app.schemas.calendar import CalendarEvent
 from app.models.assignment import Assignment
 
+# Substring match like the old keyword loop, so "Midterms" and "Exam 2" still count
+_EXAM_RE = re.compile(r"exam|test|quiz|midterm|final", re.IGNORECASE)
+
 
 @dataclass
 class DayContext:
@@ -53,24 +58,22 @@ def build_day_context(
     # Calculate total awake hours
     total_awake_hours = day_end_hour - day_start_hour
 
-    # Calculate busy hours (all events including proposed assignments)
-    all_events = events + candidate_blocks
-    total_busy_hours = sum(
-        (e.end - e.start).total_seconds() / 3600
-        for e in all_events
-    )
+    # Busy hours cover all events plus proposed blocks; study hours cover
+    # existing assignment events plus the proposed blocks (one pass each)
+    busy_seconds = existing_study_seconds = 0.0
+    for e in events:
+        duration = (e.end - e.start).total_seconds()
+        busy_seconds += duration
+        if getattr(e, 'event_type', None) == "assignment":
+            existing_study_seconds += duration
 
-    # Calculate study hours (existing + candidate assignment blocks)
-    existing_study_hours = sum(
-        (e.end - e.start).total_seconds() / 3600
-        for e in events
-        if hasattr(e, 'event_type') and e.event_type == "assignment"
-    )
-    candidate_study_hours = sum(
-        (e.end - e.start).total_seconds() / 3600
-        for e in candidate_blocks
-    )
-    total_study_hours_if_applied = existing_study_hours + candidate_study_hours
+    candidate_study_seconds = 0.0
+    for e in candidate_blocks:
+        candidate_study_seconds += (e.end - e.start).total_seconds()
+    busy_seconds += candidate_study_seconds
+
+    total_busy_hours = busy_seconds / 3600
+    total_study_hours_if_applied = (existing_study_seconds + candidate_study_seconds) / 3600
 
     # Calculate free hours if we apply candidate blocks
     free_hours_if_applied = total_awake_hours - total_busy_hours
@@ -80,11 +83,7 @@ def build_day_context(
     # Strategy 2: Look for events with "exam" or "test" in title
     exam_events = exams if exams else []
     if not exam_events:
-        exam_keywords = ["exam", "test", "quiz", "midterm", "final"]
-        exam_events = [
-            e for e in events
-            if any(keyword in e.title.lower() for keyword in exam_keywords)
-        ]
+        exam_events = [e for e in events if _EXAM_RE.search(e.title)]
 
     # Find next exam
     has_exam_within_2_days = False
@@ -105,20 +104,21 @@ def build_day_context(
             days_until_next_exam = days_until
             has_exam_within_2_days = days_until <= 2
 
-    # Build assignments summary
-    assignments_summary = []
-    for assignment in assignments:
-        due_in_days = (assignment.due_date.date() - today).days
-        assignments_summary.append({
+    # Build assignments summary, sorted by due day (stable, so same-day
+    # assignments keep their input order)
+    assignments_summary = [
+        {
             "id": assignment.id,
             "title": assignment.title,
-            "due_in_days": due_in_days,
+            "due_in_days": (due_day - today).days,
             "estimated_hours": assignment.estimated_hours,
             "priority": assignment.priority,
-        })
-
-    # Sort by due date
-    assignments_summary.sort(key=lambda a: a["due_in_days"])
+        }
+        for due_day, assignment in sorted(
+            ((a.due_date.date(), a) for a in assignments),
+            key=itemgetter(0)
+        )
+    ]
 
     return DayContext(
         date=today,
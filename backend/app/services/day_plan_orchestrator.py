@@ -9,7 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.schemas.calendar import CalendarEvent, FreeBlock, Recommendations
 from app.models.assignment import Assignment
-from app.utils.time_utils import calculate_free_blocks
+from app.utils.time_utils import calculate_free_blocks, clock_label
 from app.services.planning_agent import agent_filter_schedule_for_today, AgentDecision
 from app.services.bus_service import get_bus_suggestions_for_day, BusSuggestion
 from app.services.gemini_service import generate_day_plan
@@ -23,10 +23,12 @@ class DayPlanData:
         today: date,
         events: List[CalendarEvent],
         assignments: List[Assignment],
+        force_refresh: bool = False,
     ):
         self.today = today
         self.events = events
         self.assignments = assignments
+        self.force_refresh = force_refresh
         self.free_blocks: List[FreeBlock] = []
         self.assignment_blocks: List[CalendarEvent] = []
         self.agent_decision: Optional[AgentDecision] = None
@@ -41,16 +43,18 @@ def orchestrate_day_plan(
     today: date,
     events: List[CalendarEvent],
     assignments: List[Assignment],
+    force_refresh: bool = False,
 ) -> Tuple[List[CalendarEvent], List[FreeBlock], Recommendations]:
     """
     Main orchestrator for day plan generation.
     Coordinates all services efficiently with minimal redundancy.
+    force_refresh skips the cached AI response for an identical schedule.
 
     Returns:
         (final_events, final_free_blocks, recommendations)
     """
 
-    data = DayPlanData(today, events, assignments)
+    data = DayPlanData(today, events, assignments, force_refresh)
 
     # Step 1: Calculate initial free blocks
     data.free_blocks = calculate_free_blocks(data.events)
@@ -99,19 +103,19 @@ def _generate_recommendations(data: DayPlanData) -> Recommendations:
 
     if data.morning_bus:
         morning_bus_time = (
-            f"{data.morning_bus.departure_time.strftime('%I:%M %p')} "
-            f"(arrives {data.morning_bus.arrival_time.strftime('%I:%M %p')})"
+            f"{clock_label(data.morning_bus.departure_time)} "
+            f"(arrives {clock_label(data.morning_bus.arrival_time)})"
         )
 
     if data.evening_bus:
         evening_bus_time = (
-            f"{data.evening_bus.departure_time.strftime('%I:%M %p')} "
-            f"(arrives {data.evening_bus.arrival_time.strftime('%I:%M %p')})"
+            f"{clock_label(data.evening_bus.departure_time)} "
+            f"(arrives {clock_label(data.evening_bus.arrival_time)})"
         )
 
     # Call Gemini with minimal, well-structured data
     return generate_day_plan(
-        date=data.today.strftime("%Y-%m-%d"),
+        date=data.today.isoformat(),
         events=data.events,
         free_blocks=data.free_blocks,
         assignments=data.assignments,
@@ -119,7 +123,8 @@ def _generate_recommendations(data: DayPlanData) -> Recommendations:
         morning_bus_time=morning_bus_time,
         evening_bus_time=evening_bus_time,
         planning_mode=data.agent_decision.mode if data.agent_decision else None,
-        planning_reason=data.agent_decision.reason if data.agent_decision else None
+        planning_reason=data.agent_decision.reason if data.agent_decision else None,
+        use_cache=not data.force_refresh
     )
 
 
@@ -1,18 +1,24 @@
-import google.generativeai as genai
-import json
 import re
-from typing import List, Dict, Any
+import orjson
+from collections import Counter
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from app.config import get_settings
 from app.schemas.calendar import CalendarEvent, FreeBlock, TimeSlot, CommuteSuggestion, Recommendations
-from app.services.prompt_builder import build_day_plan_prompt
-from app.services.ai_service import generate_json_completion
-from app.utils.logger import log_error, log_debug
+from app.services.prompt_builder import build_day_plan_prompt, build_week_plan_prompt
+from app.services.ai_service import (
+    agenerate_completions, agenerate_json_completion, generate_completion_stream, generate_json_completion
+)
+from app.utils.logger import log_error, log_debug, preview_text
 
 settings = get_settings()
 
-# Configure Gemini (still needed for study material generation)
-genai.configure(api_key=settings.gemini_api_key)
+_EST = ZoneInfo("America/New_York")
+
+
+# str.translate table deleting control characters other than tab and newline
+_CONTROL_CHARS_TABLE = dict.fromkeys(c for c in range(32) if c not in (9, 10))
 
 
 def sanitize_text_for_prompt(text: str) -> str:
@@ -28,9 +34,51 @@ def sanitize_text_for_prompt(text: str) -> str:
     sanitized = text.replace('\r\n', '\n').replace('\r', '\n')
 
     # Remove null bytes and other control characters except newlines and tabs
-    sanitized = ''.join(char for char in sanitized if char == '\n' or char == '\t' or ord(char) >= 32)
+    return sanitized.translate(_CONTROL_CHARS_TABLE)
+
+
+# Page furniture that OCR repeats on every page: "Page 3 of 12", "- 4 -", "CS 101 Lecture 5"
+_PAGE_NUMBER_RE = re.compile(r'^\W*(page\s+)?\d+(\s+of\s+\d+)?\W*$', re.IGNORECASE)
+_HAS_DIGIT_RE = re.compile(r'\d')
+_TRAILING_SPACE_RE = re.compile(r'[ \t]+\n')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_MAX_HEADER_LENGTH = 60
+_MAX_HEADER_REPEATS = 3
+
+
+def _compress_notes(text: str) -> str:
+    """
+    Drop repeated page headers/footers and extra whitespace from extracted notes.
+
+    A line is dropped when it is a bare page number, or when it is short,
+    contains a digit and repeats verbatim more than _MAX_HEADER_REPEATS times.
+    Everything else is kept in order.
+    """
+    if not text:
+        return text
+
+    text = _BLANK_LINES_RE.sub('\n\n', _TRAILING_SPACE_RE.sub('\n', text))
+    lines = text.split('\n')
+    counts = Counter(line.strip() for line in lines)
+
+    kept = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped and len(stripped) <= _MAX_HEADER_LENGTH and _HAS_DIGIT_RE.search(stripped) and (
+            counts[stripped] > _MAX_HEADER_REPEATS or _PAGE_NUMBER_RE.match(stripped)
+        ):
+            continue
+        kept.append(line)
+    return _BLANK_LINES_RE.sub('\n\n', '\n'.join(kept)).strip()
 
-    return sanitized
+
+# A valid JSON escape pair (kept as is) or any other backslash followed by a character.
+# Valid JSON escapes are: \" \\ \/ \b \f \n \r \t \uXXXX
+_ESCAPE_RE = re.compile(r'(\\["\\/bfnrtu])|\\(?=[\s\S])')
+
+
+def _escape_replacement(match: re.Match) -> str:
+    return match.group(1) or '\\\\'
 
 
 def fix_invalid_escape_sequences(text: str) -> str:
@@ -43,30 +91,108 @@ def fix_invalid_escape_sequences(text: str) -> str:
     Returns:
         String with fixed escape sequences
     """
-    # This pattern finds backslashes followed by characters that aren't valid JSON escapes
-    # Valid JSON escapes are: \" \\ \/ \b \f \n \r \t \uXXXX
-    # We need to escape any backslash that isn't followed by one of these
-
-    result = []
-    i = 0
-    while i < len(text):
-        if text[i] == '\\' and i + 1 < len(text):
-            next_char = text[i + 1]
-            # Check if this is a valid JSON escape sequence
-            if next_char in ('"', '\\', '/', 'b', 'f', 'n', 'r', 't', 'u'):
-                # Valid escape - keep as is
-                result.append(text[i])
-                result.append(next_char)
-                i += 2
+    return _ESCAPE_RE.sub(_escape_replacement, text)
+
+
+# Body of a ```/```json fenced response; the closing fence is optional
+_FENCE_RE = re.compile(r'\A```[^\n]*\n?(.*?)(?:\n\s*```)?\s*\Z', re.DOTALL)
+
+
+# Characters that can open/close a JSON object, array or string
+_JSON_STRUCT_RE = re.compile(r'[{}\[\]"\\]')
+
+
+class _ArrayItemScanner:
+    """Parses each object of a top-level array (e.g. "flashcards") as soon as it closes in a chunked stream."""
+
+    __slots__ = ("key", "text", "depth", "in_string", "skip_at", "string_start",
+                 "last_string", "array_depth", "item_start")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.text = ""
+        self.depth = 0
+        self.in_string = False
+        self.skip_at = -1  # position of a backslash-escaped character
+        self.string_start = -1
+        self.last_string = None  # most recent string at the top level (a key or a value)
+        self.array_depth = -1  # depth inside the target array, -1 when outside it
+        self.item_start = -1
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Return the array items completed by this chunk."""
+        offset = len(self.text)
+        self.text += chunk
+        items = []
+        for match in _JSON_STRUCT_RE.finditer(chunk):
+            position = offset + match.start()
+            if position == self.skip_at:
+                continue
+            char = match.group()
+            if char == "\\":
+                if self.in_string:
+                    self.skip_at = position + 1
+            elif char == '"':
+                if not self.in_string:
+                    self.string_start = position + 1
+                elif self.depth == 1:
+                    self.last_string = self.text[self.string_start:position]
+                self.in_string = not self.in_string
+            elif self.in_string:
+                continue
+            elif char in "{[":
+                self.depth += 1
+                if char == "[" and self.depth == 2 and self.last_string == self.key:
+                    self.array_depth = 2
+                elif char == "{" and self.depth == self.array_depth + 1:
+                    self.item_start = position
             else:
-                # Invalid escape - escape the backslash itself
-                result.append('\\\\')
-                i += 1
-        else:
-            result.append(text[i])
-            i += 1
+                if char == "}" and self.item_start >= 0 and self.depth == self.array_depth + 1:
+                    try:
+                        items.append(orjson.loads(self.text[self.item_start:position + 1]))
+                    except orjson.JSONDecodeError:
+                        # Left to the full-response parse and its escape repairs
+                        pass
+                    self.item_start = -1
+                elif char == "]" and self.depth == self.array_depth:
+                    self.array_depth = -1
+                self.depth -= 1
+        return items
+
+
+def _find_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} in text, or None if no object closes.
 
-    return ''.join(result)
+    Braces inside string literals are skipped, so prose after the object
+    (or a "}" inside a value) doesn't change where it ends.
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    skip_at = -1  # position of a backslash-escaped character
+    for match in _JSON_STRUCT_RE.finditer(text, start):
+        position = match.start()
+        if position == skip_at:
+            continue
+        char = match.group()
+        if char == '\\':
+            if in_string:
+                skip_at = position + 1
+        elif char == '"':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if not depth:
+                return text[start:position + 1]
+    return None
 
 
 def parse_gemini_json_response(response_text: str) -> Dict[str, Any]:
@@ -82,91 +208,57 @@ def parse_gemini_json_response(response_text: str) -> Dict[str, Any]:
     Raises:
         Exception: If JSON cannot be parsed after all attempts
     """
-    # Strategy 1: Try direct parsing
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError:
-        pass
+    # Strategy 1: Try direct parsing (the common case with JSON response mode).
+    # Only attempted when the text can be bare JSON, so fenced or chatty
+    # responses skip straight to the fallbacks without raising first.
+    cleaned = response_text.strip()
+    if cleaned[:1] in ('{', '['):
+        try:
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
+            pass
 
     # Strategy 2: Strip markdown code fences
     # Gemini sometimes wraps JSON in ```json ... ``` despite response_mime_type
-    cleaned = response_text.strip()
-    if cleaned.startswith('```'):
-        # Remove opening fence (```json or just ```)
-        lines = cleaned.split('\n')
-        if lines[0].startswith('```'):
-            lines = lines[1:]
-        # Remove closing fence
-        if lines and lines[-1].strip() == '```':
-            lines = lines[:-1]
-        cleaned = '\n'.join(lines)
+    fenced = _FENCE_RE.match(cleaned)
+    if fenced:
+        cleaned = fenced.group(1)
 
         try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
             pass
 
-    # Strategy 3: Extract JSON from text (find first { to last })
-    match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-    if match:
-        json_text = match.group(0)
+    # Strategy 3: Extract the first complete JSON object from surrounding text
+    json_text = _find_json_object(cleaned)
+    if json_text is not None:
         try:
-            return json.loads(json_text)
-        except json.JSONDecodeError:
+            return orjson.loads(json_text)
+        except orjson.JSONDecodeError:
             # Strategy 4: Fix invalid escape sequences and try again
             try:
                 fixed_text = fix_invalid_escape_sequences(json_text)
-                return json.loads(fixed_text)
-            except json.JSONDecodeError:
+                return orjson.loads(fixed_text)
+            except orjson.JSONDecodeError:
                 pass
 
     # Strategy 5: Try fixing escape sequences on the original cleaned text
     try:
         fixed_text = fix_invalid_escape_sequences(cleaned)
-        return json.loads(fixed_text)
-    except json.JSONDecodeError:
+        return orjson.loads(fixed_text)
+    except orjson.JSONDecodeError:
         pass
 
     # All strategies failed - provide detailed error
-    preview = response_text[:500] + ('...' if len(response_text) > 500 else '')
-    raise Exception(f"Failed to parse Gemini response as JSON after multiple attempts. Response preview: {preview}")
-
+    raise Exception(f"Failed to parse Gemini response as JSON after multiple attempts. Response preview: {preview_text(response_text)}")
 
-def generate_study_material(extracted_text: str, topic_hint: str = None) -> Dict[str, Any]:
-    """
-    Generate study material from extracted notes text using Gemini.
 
-    Args:
-        extracted_text: The notes text to process
-        topic_hint: Optional hint about the topic (e.g., "Physics - 2D Kinematics", "Organic Chemistry")
+# Static instructions and JSON schema for study material. They lead the prompt,
+# so requests share an identical prefix the providers can cache; the topic and
+# notes follow.
+_STUDY_MATERIAL_INSTRUCTIONS = """You are an intelligent study assistant that helps students master any subject.
 
-    Returns a dictionary with:
-    - summary_short: str
-    - summary_detailed: str
-    - flashcards: List[Dict]
-    - practice_questions: List[Dict]
-    """
-
-    # Validate input
-    if not extracted_text or len(extracted_text.strip()) < 10:
-        raise Exception("Extracted text is too short or empty. Need at least 10 characters.")
-
-    # Sanitize extracted text to prevent prompt injection and JSON issues
-    sanitized_text = sanitize_text_for_prompt(extracted_text)
-
-    # Build the prompt with topic awareness
-    topic_context = ""
-    if topic_hint:
-        topic_context = f"\n\nTOPIC HINT: The user indicated this is about: {topic_hint}\nUse this as context, but also analyze the notes to understand the specific concepts covered."
-    else:
-        topic_context = "\n\nFirst, analyze the notes to identify the subject area and main topics covered. Then generate study materials appropriate for that subject."
-
-    prompt = f"""You are an intelligent study assistant that helps students master any subject.
-
-Given the following notes, generate comprehensive study materials.{topic_context}
-
-NOTES:
-{sanitized_text}
+Given the notes at the end of this prompt, generate comprehensive study materials.
 
 Generate the following in valid JSON format:
 
@@ -176,38 +268,143 @@ Generate the following in valid JSON format:
 4. 5-8 multiple choice practice questions with 4 options each, the correct answer index (0-3), and a brief explanation
 
 Return ONLY valid JSON in this exact format:
-{{
+{
   "summary_short": "Brief 3-sentence summary here",
   "summary_detailed": "Detailed 1-2 paragraph summary here",
   "flashcards": [
-    {{"question": "Question here?", "answer": "Answer here"}},
+    {"question": "Question here?", "answer": "Answer here"},
     ...
   ],
   "practice_questions": [
-    {{
+    {
       "question": "Question here?",
       "options": ["Option A", "Option B", "Option C", "Option D"],
       "correct_index": 0,
       "explanation": "Brief explanation of why this is correct"
-    }},
+    },
     ...
   ]
-}}
+}
 
 Make the questions challenging but fair, appropriate for the academic level and subject area."""
 
+_COMBINED_GUIDE_INSTRUCTIONS = """You are an intelligent study assistant helping a student create a comprehensive study guide by combining multiple sets of notes.
+
+You will receive several different notes at the end of this prompt. Your task is to:
+1. Analyze all notes together to identify overarching themes and connections
+2. Create a unified, comprehensive study guide that synthesizes information from all notes
+3. Highlight relationships between concepts across different notes
+4. Generate integrated flashcards and practice questions that span multiple notes
+
+Generate a COMPREHENSIVE study guide that SYNTHESIZES all the notes. This should be more than just a collection - it should show how concepts connect and build on each other.
+
+Return ONLY valid JSON in this exact format:
+{
+  "summary_short": "Brief 3-4 sentence overview of ALL topics covered across all notes",
+  "summary_detailed": "Comprehensive 2-3 paragraph synthesis that shows how all the notes relate to each other, highlighting key themes, connections, and important concepts across all materials",
+  "flashcards": [
+    {"question": "Question that may integrate concepts from multiple notes?", "answer": "Answer here"},
+    ... (15-25 flashcards total, mixing individual concepts and integrated questions)
+  ],
+  "practice_questions": [
+    {
+      "question": "Question that tests understanding across topics?",
+      "options": ["Option A", "Option B", "Option C", "Option D"],
+      "correct_index": 0,
+      "explanation": "Explanation that may reference concepts from multiple notes"
+    },
+    ... (8-12 practice questions that test both individual and integrated understanding)
+  ]
+}
+
+Make the study guide comprehensive, showing connections between topics. Include both detail-focused and synthesis questions."""
+
+
+def _study_material_prompt(extracted_text: str, topic_hint: str = None) -> str:
+    """Validate the notes and build the study-material prompt for them."""
+    # Validate input
+    if not extracted_text or len(extracted_text.strip()) < 10:
+        raise Exception("Extracted text is too short or empty. Need at least 10 characters.")
+
+    # Sanitize extracted text to prevent prompt injection and JSON issues
+    sanitized_text = _compress_notes(sanitize_text_for_prompt(extracted_text))
+
+    # Build the prompt: shared instructions first, then this request's topic and notes
+    if topic_hint:
+        topic_context = f"TOPIC HINT: The user indicated this is about: {topic_hint}\nUse this as context, but also analyze the notes to understand the specific concepts covered."
+    else:
+        topic_context = "First, analyze the notes to identify the subject area and main topics covered. Then generate study materials appropriate for that subject."
+
+    return f"""{_STUDY_MATERIAL_INSTRUCTIONS}
+
+{topic_context}
+
+NOTES:
+{sanitized_text}"""
+
+
+def _check_study_material(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Raise if an AI response is missing any study-material field."""
+    required_keys = ["summary_short", "summary_detailed", "flashcards", "practice_questions"]
+    for key in required_keys:
+        if key not in result:
+            raise Exception(f"AI response missing required field: {key}")
+    return result
+
+
+async def generate_study_material(extracted_text: str, topic_hint: str = None) -> Dict[str, Any]:
+    """
+    Generate study material from extracted notes text using Gemini.
+
+    Args:
+        extracted_text: The notes text to process
+        topic_hint: Optional hint about the topic (e.g., "Physics - 2D Kinematics", "Organic Chemistry")
+
+    Returns a dictionary with:
+    - summary_short: str
+    - summary_detailed: str
+    - flashcards: List[Dict]
+    - practice_questions: List[Dict]
+    """
+    prompt = _study_material_prompt(extracted_text, topic_hint)
+
     try:
-        # Use the faster AI service with Groq fallback (much faster than Gemini alone)
-        from app.services.ai_service import generate_json_completion
-        result = generate_json_completion(prompt, temperature=0.7)
+        # Use the faster AI service with Groq fallback (much faster than Gemini alone).
+        # Awaited on the async clients, so no worker thread is held for the round trip.
+        # Same notes produce the same prompt, so reuse an earlier response
+        result = await agenerate_json_completion(prompt, temperature=0.7, cacheable=True)
+        return _check_study_material(result)
 
-        # Validate response structure
-        required_keys = ["summary_short", "summary_detailed", "flashcards", "practice_questions"]
-        for key in required_keys:
-            if key not in result:
-                raise Exception(f"AI response missing required field: {key}")
+    except Exception as e:
+        # Don't wrap exceptions that are already our custom exceptions
+        if "missing required field" in str(e):
+            raise
+        raise Exception(f"AI API call failed: {str(e)}")
 
-        return result
+
+def stream_study_material(extracted_text: str, topic_hint: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generate study material, yielding each flashcard as soon as it is written.
+
+    Yields {"flashcard": {...}} per completed flashcard while the response
+    streams in, then {"material": {...}} with the complete, validated result.
+    Total time is unchanged; the first cards just arrive much sooner.
+    """
+    prompt = _study_material_prompt(extracted_text, topic_hint)
+
+    try:
+        scanner = _ArrayItemScanner("flashcards")
+        chunks = []
+        stream = generate_completion_stream(prompt, response_format="json", temperature=0.7)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                for flashcard in scanner.feed(chunk):
+                    yield {"flashcard": flashcard}
+        finally:
+            stream.close()
+
+        material = _check_study_material(parse_gemini_json_response("".join(chunks)))
 
     except Exception as e:
         # Don't wrap exceptions that are already our custom exceptions
@@ -215,8 +412,45 @@ Make the questions challenging but fair, appropriate for the academic level and
             raise
         raise Exception(f"AI API call failed: {str(e)}")
 
+    yield {"material": material}
+
+
+async def generate_study_material_batch(
+    notes: List[Tuple[str, Optional[str]]],
+    max_concurrency: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Generate study material for many notes at once (imports, bulk re-generation).
+
+    All requests go out together through agenerate_completions, so the batch
+    takes about as long as its slowest note, and duplicate notes are only
+    sent once.
+
+    Args:
+        notes: (extracted_text, topic_hint) pairs
+        max_concurrency: Maximum number of AI requests in flight at once
+
+    Returns:
+        One study-material dictionary per note, in the same order
+
+    Raises:
+        Exception: If any note is invalid or its generation fails
+    """
+    prompts = [_study_material_prompt(text, topic_hint) for text, topic_hint in notes]
+
+    try:
+        responses = await agenerate_completions(
+            prompts, temperature=0.7, max_concurrency=max_concurrency, cacheable=True
+        )
+        return [_check_study_material(parse_gemini_json_response(text)) for text in responses]
+
+    except Exception as e:
+        if "missing required field" in str(e):
+            raise
+        raise Exception(f"AI API call failed: {str(e)}")
+
 
-def generate_combined_study_guide(note_texts: List[str], note_titles: List[str], topic_hint: str = None) -> Dict[str, Any]:
+async def generate_combined_study_guide(note_texts: List[str], note_titles: List[str], topic_hint: str = None) -> Dict[str, Any]:
     """
     Generate a comprehensive study guide by combining multiple notes.
 
@@ -240,65 +474,31 @@ def generate_combined_study_guide(note_texts: List[str], note_titles: List[str],
         raise Exception("Mismatch between number of note texts and titles")
 
     # Sanitize all texts
-    sanitized_texts = [sanitize_text_for_prompt(text) for text in note_texts]
+    sanitized_texts = [_compress_notes(sanitize_text_for_prompt(text)) for text in note_texts]
 
     # Build combined notes section with titles for context
     combined_notes_section = ""
     for i, (title, text) in enumerate(zip(note_titles, sanitized_texts), 1):
         combined_notes_section += f"\n\n--- NOTE {i}: {title} ---\n{text}"
 
-    # Build the prompt with topic awareness
-    topic_context = ""
+    # Build the prompt: shared instructions first, then this request's topic and notes
     if topic_hint:
-        topic_context = f"\n\nTOPIC/SUBJECT: {topic_hint}\nUse this as context to create a unified study guide that connects concepts across all notes."
+        topic_context = f"TOPIC/SUBJECT: {topic_hint}\nUse this as context to create a unified study guide that connects concepts across all notes."
     else:
-        topic_context = "\n\nAnalyze all notes to identify common themes, subject area, and how the topics relate to each other. Create a unified study guide."
+        topic_context = "Analyze all notes to identify common themes, subject area, and how the topics relate to each other. Create a unified study guide."
 
-    prompt = f"""You are an intelligent study assistant helping a student create a comprehensive study guide by combining multiple sets of notes.
+    prompt = f"""{_COMBINED_GUIDE_INSTRUCTIONS}
 
-You will receive {len(note_texts)} different notes. Your task is to:
-1. Analyze all notes together to identify overarching themes and connections
-2. Create a unified, comprehensive study guide that synthesizes information from all notes
-3. Highlight relationships between concepts across different notes
-4. Generate integrated flashcards and practice questions that span multiple notes{topic_context}
+{topic_context}
 
-NOTES TO COMBINE:{combined_notes_section}
-
-Generate a COMPREHENSIVE study guide that SYNTHESIZES all the notes above. This should be more than just a collection - it should show how concepts connect and build on each other.
-
-Return ONLY valid JSON in this exact format:
-{{
-  "summary_short": "Brief 3-4 sentence overview of ALL topics covered across all notes",
-  "summary_detailed": "Comprehensive 2-3 paragraph synthesis that shows how all the notes relate to each other, highlighting key themes, connections, and important concepts across all materials",
-  "flashcards": [
-    {{"question": "Question that may integrate concepts from multiple notes?", "answer": "Answer here"}},
-    ... (15-25 flashcards total, mixing individual concepts and integrated questions)
-  ],
-  "practice_questions": [
-    {{
-      "question": "Question that tests understanding across topics?",
-      "options": ["Option A", "Option B", "Option C", "Option D"],
-      "correct_index": 0,
-      "explanation": "Explanation that may reference concepts from multiple notes"
-    }},
-    ... (8-12 practice questions that test both individual and integrated understanding)
-  ]
-}}
-
-Make the study guide comprehensive, showing connections between topics. Include both detail-focused and synthesis questions."""
+NOTES TO COMBINE ({len(note_texts)} notes):{combined_notes_section}"""
 
     try:
-        # Use the faster AI service with Groq fallback (much faster than Gemini alone)
-        from app.services.ai_service import generate_json_completion
-        result = generate_json_completion(prompt, temperature=0.7)
-
-        # Validate response structure
-        required_keys = ["summary_short", "summary_detailed", "flashcards", "practice_questions"]
-        for key in required_keys:
-            if key not in result:
-                raise Exception(f"AI response missing required field: {key}")
-
-        return result
+        # Use the faster AI service with Groq fallback (much faster than Gemini alone).
+        # Awaited on the async clients, so no worker thread is held for the round trip.
+        # Same notes produce the same prompt, so reuse an earlier response
+        result = await agenerate_json_completion(prompt, temperature=0.7, cacheable=True)
+        return _check_study_material(result)
 
     except Exception as e:
         # Don't wrap exceptions that are already our custom exceptions
@@ -307,6 +507,83 @@ Make the study guide comprehensive, showing connections between topics. Include
         raise Exception(f"AI API call failed: {str(e)}")
 
 
+def _recommendations_from_result(result: Dict[str, Any], date: str) -> Recommendations:
+    """Convert one day's AI JSON into a Recommendations model."""
+    # Convert to Pydantic models
+    lunch_slots = [TimeSlot(**slot) for slot in result.get("lunch_slots", [])]
+    study_slots = [TimeSlot(**slot) for slot in result.get("study_slots", [])]
+
+    # Handle commute_suggestion - fix leave_by if it's just a time string
+    commute = None
+    if result.get("commute_suggestion"):
+        commute_data = result["commute_suggestion"]
+        # If leave_by is just a time (e.g., "09:25 AM"), convert to full datetime
+        if "leave_by" in commute_data:
+            leave_by_str = commute_data["leave_by"]
+            # Check if it's just a time (no date component)
+            if leave_by_str and "T" not in leave_by_str and len(leave_by_str) < 12:
+                # Use the date parameter passed to the function
+                target_date = datetime.fromisoformat(date).date()
+                # Parse the time ("9:25 AM" or "9:25AM") and combine with date
+                time_obj = datetime.strptime(leave_by_str.replace(" ", ""), "%I:%M%p").time()
+                leave_by_dt = datetime.combine(target_date, time_obj, tzinfo=_EST)
+                commute_data["leave_by"] = leave_by_dt.isoformat()
+        commute = CommuteSuggestion(**commute_data)
+
+    return Recommendations(
+        lunch_slots=lunch_slots,
+        study_slots=study_slots,
+        commute_suggestion=commute,
+        summary=result.get("summary", "")
+    )
+
+
+def _trivial_day_plan(
+    date: str,
+    events: List[CalendarEvent],
+    free_blocks: List[FreeBlock],
+    assignments: List = None,
+    morning_bus_time: str = None,
+    evening_bus_time: str = None,
+    **_
+) -> Optional[Recommendations]:
+    """
+    Templated plan for days the AI has nothing to reason about: no upcoming
+    assignments, no bus, and either an empty calendar or no free time.
+    Returns None when the day needs a real AI call.
+    """
+    if morning_bus_time or evening_bus_time or (events and free_blocks):
+        return None
+
+    today = datetime.fromisoformat(date).date()
+    if any(
+        not a.completed and (a.due_date.date() - today).days <= 14
+        for a in assignments or ()
+    ):
+        return None
+
+    if not events:
+        return Recommendations(
+            lunch_slots=[TimeSlot(
+                start=datetime.fromisoformat(f"{date}T12:00:00"),
+                end=datetime.fromisoformat(f"{date}T13:00:00"),
+                label="12:00 PM - 1:00 PM"
+            )],
+            study_slots=[],
+            commute_suggestion=None,
+            summary="Hey Dippi, nothing on the calendar today and no deadlines coming up, "
+                    "so take a long lunch and enjoy the free time! <3"
+        )
+
+    return Recommendations(
+        lunch_slots=[],
+        study_slots=[],
+        commute_suggestion=None,
+        summary="Hey Dippi, today is fully booked, so grab snacks between commitments "
+                "and rest when you can. Nothing urgent is due soon! <3"
+    )
+
+
 def generate_day_plan(
     date: str,
     events: List[CalendarEvent],
@@ -316,13 +593,25 @@ def generate_day_plan(
     morning_bus_time: str = None,
     evening_bus_time: str = None,
     planning_mode: str = None,
-    planning_reason: str = None
+    planning_reason: str = None,
+    use_cache: bool = True
 ) -> Recommendations:
     """
     Generate day plan recommendations using Gemini AI.
 
+    An identical schedule reuses the cached AI response unless use_cache is False
+    (e.g. when the user explicitly asks for a fresh plan).
+
+    Empty or fully booked days with nothing due soon get a templated plan
+    without an AI call.
+
     Returns Recommendations object with lunch slots, study slots, commute suggestion, and summary.
     """
+    trivial = _trivial_day_plan(
+        date, events, free_blocks, assignments, morning_bus_time, evening_bus_time
+    )
+    if trivial is not None:
+        return trivial
 
     # Build optimized prompt using modular builder
     prompt = build_day_plan_prompt(
@@ -338,47 +627,51 @@ def generate_day_plan(
 
     try:
         # Use unified AI service (Groq → GPT → Gemini fallback)
-        result = generate_json_completion(prompt, temperature=0.7)
-
-        # Convert to Pydantic models
-        lunch_slots = [TimeSlot(**slot) for slot in result.get("lunch_slots", [])]
-        study_slots = [TimeSlot(**slot) for slot in result.get("study_slots", [])]
-
-        # Handle commute_suggestion - fix leave_by if it's just a time string
-        commute = None
-        if result.get("commute_suggestion"):
-            commute_data = result["commute_suggestion"]
-            # If leave_by is just a time (e.g., "09:25 AM"), convert to full datetime
-            if "leave_by" in commute_data:
-                leave_by_str = commute_data["leave_by"]
-                # Check if it's just a time (no date component)
-                if leave_by_str and "T" not in leave_by_str and len(leave_by_str) < 12:
-                    # Parse the date from the prompt context
-                    from datetime import datetime as dt
-                    from zoneinfo import ZoneInfo
-                    # Use the date parameter passed to the function
-                    target_date = dt.fromisoformat(date).date()
-                    # Parse the time and combine with date
-                    try:
-                        time_obj = dt.strptime(leave_by_str.strip(), "%I:%M %p").time()
-                    except ValueError:
-                        # Try without space
-                        time_obj = dt.strptime(leave_by_str.strip(), "%I:%M%p").time()
-                    # Combine and make timezone-aware
-                    est = ZoneInfo("America/New_York")
-                    leave_by_dt = dt.combine(target_date, time_obj).replace(tzinfo=est)
-                    commute_data["leave_by"] = leave_by_dt.isoformat()
-            commute = CommuteSuggestion(**commute_data)
+        result = generate_json_completion(prompt, temperature=0.7, cacheable=use_cache, stream=True)
 
-        return Recommendations(
-            lunch_slots=lunch_slots,
-            study_slots=study_slots,
-            commute_suggestion=commute,
-            summary=result.get("summary", "")
-        )
+        return _recommendations_from_result(result, date)
 
     except Exception as e:
         # Don't wrap exceptions that are already our custom exceptions
         if "Gemini" in str(e):
             raise
         raise Exception(f"Gemini API call failed: {str(e)}")
+
+
+def generate_week_plan(days: List[Dict[str, Any]], use_cache: bool = True) -> Dict[str, Recommendations]:
+    """
+    Generate recommendations for several days with a single AI call.
+
+    Each entry in days holds build_day_plan_prompt's keyword arguments (date,
+    events, free_blocks, ...). Days missing or malformed in the combined
+    response fall back to their own generate_day_plan call.
+
+    Returns:
+        Dict mapping each date string to its Recommendations
+    """
+    plans = {}
+    remaining = []
+    for day in days:
+        trivial = _trivial_day_plan(**day)
+        if trivial is not None:
+            plans[day["date"]] = trivial
+        else:
+            remaining.append(day)
+    if not remaining:
+        return plans
+
+    prompt = build_week_plan_prompt({day["date"]: build_day_plan_prompt(**day) for day in remaining})
+
+    try:
+        result = generate_json_completion(prompt, temperature=0.7, cacheable=use_cache)
+    except Exception as e:
+        log_error("gemini_service", f"Week plan call failed, planning days separately: {str(e)}")
+        result = {}
+
+    for day in remaining:
+        date = day["date"]
+        try:
+            plans[date] = _recommendations_from_result(result[date], date)
+        except Exception:
+            plans[date] = generate_day_plan(**day, use_cache=use_cache)
+    return plans
@@ -1,11 +1,75 @@
+import sys
+import threading
 from datetime import datetime, timedelta
 from typing import List, Optional
+import httplib2
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+import orjson
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import build_http
 from zoneinfo import ZoneInfo
 from app.schemas.calendar import CalendarEvent
 from app.utils.logger import log_info, log_error
 
+# Calendar calls run in worker threads (asyncio.to_thread) and httplib2.Http is
+# not thread-safe, so each worker keeps its own connection pool alive
+_thread_local = threading.local()
+
+# Google rejects batch requests with more than 50 calls
+_MAX_BATCH_SIZE = 50
+
+# Only the event fields the app reads (partial response), and the largest page size
+_EVENT_FIELDS = "items(id,summary,location,colorId,start,end),nextPageToken"
+_EVENTS_PAGE_SIZE = 250
+
+# All-day events carry a bare "YYYY-MM-DD" date instead of a dateTime
+_DATE_ONLY_LENGTH = 10
+
+# Use the ciso8601 C parser when it's installed (dateTime values always carry an
+# offset, so its strict RFC 3339 mode applies); otherwise Python 3.11+ parses
+# the API's "Z" suffix natively
+try:
+    from ciso8601 import parse_rfc3339 as _parse_api_datetime
+except ImportError:
+    if sys.version_info >= (3, 11):
+        _parse_api_datetime = datetime.fromisoformat
+    else:
+        def _parse_api_datetime(value: str) -> datetime:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _get_shared_http() -> httplib2.Http:
+    """
+    Get the keep-alive HTTP transport for the current thread.
+
+    Reusing it across requests avoids a fresh TCP + TLS handshake with
+    googleapis.com on every Calendar API call.
+    """
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        # build_http() keeps the client library's defaults (60s socket timeout,
+        # no 308 redirect handling) that build(credentials=...) used to apply
+        http = build_http()
+        _thread_local.http = http
+    return http
+
+
+def _get_discovery_doc() -> dict:
+    """
+    Get the Calendar v3 discovery document for the current thread.
+
+    build() re-reads and re-parses the bundled ~130 KB document on every
+    call. The client library also fills defaults into the dict it is given,
+    so each worker parses its own copy once instead of sharing one.
+    """
+    doc = getattr(_thread_local, "discovery_doc", None)
+    if doc is None:
+        doc = orjson.loads(discovery_cache.get_static_doc("calendar", "v3"))
+        _thread_local.discovery_doc = doc
+    return doc
+
 
 def _build_calendar_service(access_token: str, refresh_token: str = None):
     """
@@ -25,16 +89,18 @@ def _build_calendar_service(access_token: str, refresh_token: str = None):
         client_id=None,  # Not needed for API calls
         client_secret=None
     )
-    return build('calendar', 'v3', credentials=creds)
+    authed_http = AuthorizedHttp(creds, http=_get_shared_http())
+    return build_from_document(_get_discovery_doc(), http=authed_http)
 
 
-def get_todays_events(access_token: str, refresh_token: str = None) -> List[CalendarEvent]:
+def get_todays_events(access_token: str, refresh_token: str = None, target_date=None) -> List[CalendarEvent]:
     """
     Fetch today's events from Google Calendar.
 
     Args:
         access_token: Google OAuth access token
         refresh_token: Google OAuth refresh token (optional)
+        target_date: Fetch this EST date instead of today (optional)
 
     Returns:
         List of CalendarEvent objects
@@ -46,14 +112,12 @@ def get_todays_events(access_token: str, refresh_token: str = None) -> List[Cale
         # Get today's date range in EST timezone
         # Import timezone utilities
         from zoneinfo import ZoneInfo
-        from datetime import date as date_type
 
         # Define EST timezone
         est = ZoneInfo("America/New_York")
 
         # Get today in EST
-        now_est = datetime.now(est)
-        local_today = now_est.date()
+        local_today = target_date or datetime.now(est).date()
 
         # Create start and end of today in EST, then convert to UTC for Google Calendar API
         today_start_est = datetime(local_today.year, local_today.month, local_today.day, 0, 0, 0, tzinfo=est)
@@ -64,16 +128,24 @@ def get_todays_events(access_token: str, refresh_token: str = None) -> List[Cale
         today_start = today_start_est.astimezone(ZoneInfo("UTC")).isoformat().replace('+00:00', 'Z')
         today_end = tomorrow_start_est.astimezone(ZoneInfo("UTC")).isoformat().replace('+00:00', 'Z')
 
-        # Call the Calendar API
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=today_start,
-            timeMax=today_end,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-
-        events = events_result.get('items', [])
+        # Call the Calendar API, following pages so busy days aren't truncated
+        events = []
+        page_token = None
+        while True:
+            events_result = service.events().list(
+                calendarId='primary',
+                timeMin=today_start,
+                timeMax=today_end,
+                singleEvents=True,
+                orderBy='startTime',
+                fields=_EVENT_FIELDS,
+                maxResults=_EVENTS_PAGE_SIZE,
+                pageToken=page_token
+            ).execute()
+            events.extend(events_result.get('items', []))
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                break
 
         # Convert to CalendarEvent objects
         calendar_events = []
@@ -83,22 +155,18 @@ def get_todays_events(access_token: str, refresh_token: str = None) -> List[Cale
             start = event['start'].get('dateTime', event['start'].get('date'))
             end = event['end'].get('dateTime', event['end'].get('date'))
 
-            # Parse datetime
-            if 'T' in start:  # dateTime format
-                start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-
-                # Convert to EST to check the date
-                start_dt_est = start_dt.astimezone(est)
-                event_date = start_dt_est.date()
+            # Parse datetime and only include events that start today in EST
+            if len(start) != _DATE_ONLY_LENGTH:  # dateTime format
+                start_dt = _parse_api_datetime(start)
+                # Aware datetimes compare by instant, so no per-event astimezone
+                if not (today_start_est <= start_dt < tomorrow_start_est):
+                    continue
+                end_dt = _parse_api_datetime(end)
             else:  # date format (all-day event)
                 start_dt = datetime.fromisoformat(start + 'T00:00:00')
+                if start_dt.date() != local_today:
+                    continue
                 end_dt = datetime.fromisoformat(end + 'T23:59:59')
-                event_date = start_dt.date()
-
-            # Filter: only include events that start today in EST
-            if event_date != local_today:
-                continue  # Skip events not starting today
 
             calendar_events.append(CalendarEvent(
                 id=event['id'],
@@ -161,8 +229,61 @@ def get_week_events(access_token: str, refresh_token: str = None, start_date: da
         log_info("google_calendar", f"Found {len(calendars)} calendars")
 
         all_events = []
-
-        # Fetch events from each calendar
+        calendar_ids = {}
+        calendar_names = {}
+        next_pages = []  # (request_id, page_token) of calendars with more events
+
+        def _list_events(calendar_id, page_token=None):
+            return service.events().list(
+                calendarId=calendar_id,
+                timeMin=week_start_utc,
+                timeMax=week_end_utc,
+                singleEvents=True,
+                orderBy='startTime',
+                fields=_EVENT_FIELDS,
+                maxResults=_EVENTS_PAGE_SIZE,
+                pageToken=page_token
+            )
+
+        def _collect(request_id, events_result, exception):
+            calendar_name = calendar_names[request_id]
+            if exception is not None:
+                log_error("google_calendar", f"Failed to fetch events from calendar '{calendar_name}': {str(exception)}")
+                # Continue with other calendars even if one fails
+                return
+
+            if events_result.get('nextPageToken'):
+                next_pages.append((request_id, events_result['nextPageToken']))
+
+            events = events_result.get('items', [])
+            log_info("google_calendar", f"Found {len(events)} events in calendar '{calendar_name}'")
+
+            # Convert to CalendarEvent objects
+            for event in events:
+                # Handle both dateTime and date (all-day events)
+                start = event['start'].get('dateTime', event['start'].get('date'))
+                end = event['end'].get('dateTime', event['end'].get('date'))
+
+                # Parse datetime
+                if len(start) != _DATE_ONLY_LENGTH:  # dateTime format
+                    start_dt = _parse_api_datetime(start)
+                    end_dt = _parse_api_datetime(end)
+                else:  # date format (all-day event) - add timezone
+                    start_dt = datetime.fromisoformat(start + 'T00:00:00').replace(tzinfo=est)
+                    end_dt = datetime.fromisoformat(end + 'T23:59:59').replace(tzinfo=est)
+
+                all_events.append(CalendarEvent(
+                    id=event['id'],
+                    title=event.get('summary', 'Untitled Event'),
+                    location=event.get('location'),
+                    start=start_dt,
+                    end=end_dt,
+                    color_id=event.get('colorId')
+                ))
+
+        # Fetch events from every calendar in batched HTTP requests (one round
+        # trip per _MAX_BATCH_SIZE calendars instead of one per calendar)
+        batch = None
         for calendar in calendars:
             calendar_id = calendar['id']
             calendar_name = calendar.get('summary', 'Unknown')
@@ -172,43 +293,29 @@ def get_week_events(access_token: str, refresh_token: str = None, start_date: da
                 log_info("google_calendar", f"Skipping calendar '{calendar_name}'")
                 continue
 
+            if batch is None:
+                batch = service.new_batch_http_request(callback=_collect)
+            request_id = str(len(calendar_names))
+            calendar_ids[request_id] = calendar_id
+            calendar_names[request_id] = calendar_name
+            batch.add(_list_events(calendar_id), request_id=request_id)
+
+            if len(calendar_names) % _MAX_BATCH_SIZE == 0:
+                batch.execute()
+                batch = None
+
+        if batch is not None:
+            batch.execute()
+
+        # Remaining pages of calendars with more than one page of events
+        # (_collect queues each further page, so this runs until all are read)
+        for request_id, page_token in next_pages:
             try:
-                events_result = service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=week_start_utc,
-                    timeMax=week_end_utc,
-                    singleEvents=True,
-                    orderBy='startTime'
-                ).execute()
-
-                events = events_result.get('items', [])
-                log_info("google_calendar", f"Found {len(events)} events in calendar '{calendar_name}'")
-
-                # Convert to CalendarEvent objects
-                for event in events:
-                    # Handle both dateTime and date (all-day events)
-                    start = event['start'].get('dateTime', event['start'].get('date'))
-                    end = event['end'].get('dateTime', event['end'].get('date'))
-
-                    # Parse datetime
-                    if 'T' in start:  # dateTime format
-                        start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                        end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-                    else:  # date format (all-day event) - add timezone
-                        start_dt = datetime.fromisoformat(start + 'T00:00:00').replace(tzinfo=est)
-                        end_dt = datetime.fromisoformat(end + 'T23:59:59').replace(tzinfo=est)
-
-                    all_events.append(CalendarEvent(
-                        id=event['id'],
-                        title=event.get('summary', 'Untitled Event'),
-                        location=event.get('location'),
-                        start=start_dt,
-                        end=end_dt,
-                        color_id=event.get('colorId')
-                    ))
+                events_result = _list_events(calendar_ids[request_id], page_token).execute()
             except Exception as e:
-                log_error("google_calendar", f"Failed to fetch events from calendar '{calendar_name}': {str(e)}")
-                # Continue with other calendars even if one fails
+                _collect(request_id, None, e)
+                continue
+            _collect(request_id, events_result, None)
 
         log_info("google_calendar", f"Total events fetched from all calendars: {len(all_events)}")
 
@@ -333,7 +440,7 @@ def create_assignment_block_event(
     days_until_due = (due_date.date() - start_time.date()).days
 
     title = f"📚 Work on {assignment_title}"
-    description = f"Study session for {assignment_title}\nDue in {days_until_due} days ({due_date.strftime('%B %d, %Y')})"
+    description = f"Study session for {assignment_title}\nDue in {days_until_due} days ({due_date:%B %d, %Y})"
 
     return create_calendar_event(
         access_token=access_token,
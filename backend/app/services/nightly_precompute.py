@@ -0,0 +1,140 @@
+"""
+Nightly precompute of day plans.
+
+Runs off-peak (cron: `python -m app.services.nightly_precompute`) and stores
+tomorrow's plan for every connected user, so the morning /calendar/day-plan
+request is served from the day_plans table instead of waiting on the LLM.
+Calendar and assignment writes drop affected rows via mark_day_plans_dirty.
+The same run also removes plans older than a week.
+"""
+
+import hashlib
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.assignment import Assignment
+from app.models.day_plan import DayPlan
+from app.models.user_token import UserToken
+from app.schemas.calendar import CalendarEvent
+from app.services.day_plan_orchestrator import orchestrate_day_plan
+from app.services.google_calendar import get_todays_events
+from app.utils.cache import cleanup_old_day_plans
+from app.utils.logger import log_info, log_error
+from app.utils.token_refresh import get_valid_user_token
+
+
+def compute_events_hash(events: List[CalendarEvent]) -> str:
+    """sha256 over the sorted (title, start, end) of each event."""
+    digest = hashlib.sha256()
+    for title, start, end in sorted(
+        (e.title, e.start.isoformat(), e.end.isoformat()) for e in events
+    ):
+        digest.update(f"{title}\x1f{start}\x1f{end}\x1e".encode())
+    return digest.hexdigest()
+
+
+def store_day_plan(
+    db: Session,
+    user_id,
+    target_date: date,
+    events: List[CalendarEvent],
+    free_blocks,
+    recommendations,
+    events_hash: Optional[str] = None,
+) -> DayPlan:
+    """Replace the cached plan for (user_id, target_date) and commit."""
+    db.query(DayPlan).filter(
+        DayPlan.user_id == user_id,
+        DayPlan.date == target_date
+    ).delete()
+
+    day_plan = DayPlan(
+        user_id=user_id,
+        date=target_date,
+        events=[event.model_dump(mode='json') for event in events],
+        free_blocks=[block.model_dump(mode='json') for block in free_blocks],
+        recommendations=recommendations.model_dump(mode='json'),
+        events_hash=events_hash,
+    )
+    db.add(day_plan)
+    db.commit()
+    return day_plan
+
+
+def precompute_user_day_plan(db: Session, user_token: UserToken, target_date: date) -> bool:
+    """
+    Precompute one user's plan for target_date.
+
+    Returns:
+        True if a new plan was generated, False if the stored one is still current
+    """
+    user_token = get_valid_user_token(user_token, db)
+    events = get_todays_events(user_token.access_token, user_token.refresh_token, target_date)
+    events_hash = compute_events_hash(events)
+
+    existing_hash = db.query(DayPlan.events_hash).filter(
+        DayPlan.user_id == user_token.user_id,
+        DayPlan.date == target_date
+    ).scalar()
+    if existing_hash == events_hash:
+        return False
+
+    assignments = db.query(Assignment).filter(
+        Assignment.user_id == user_token.user_id,
+        Assignment.completed == False,
+    ).all()
+
+    events, free_blocks, recommendations = orchestrate_day_plan(
+        db=db,
+        user_id=user_token.user_id,
+        today=target_date,
+        events=events,
+        assignments=assignments,
+    )
+    store_day_plan(db, user_token.user_id, target_date, events, free_blocks,
+                   recommendations, events_hash)
+    return True
+
+
+def precompute_day_plans(db: Session, target_date: Optional[date] = None) -> int:
+    """
+    Precompute day plans for every user with a calendar connection.
+
+    Args:
+        db: Database session
+        target_date: Date to plan (defaults to tomorrow)
+
+    Returns:
+        Number of plans generated
+    """
+    if target_date is None:
+        target_date = date.today() + timedelta(days=1)
+
+    cleanup_old_day_plans(db, days_to_keep=7)
+    db.commit()
+
+    generated = 0
+    for user_token in db.query(UserToken).all():
+        try:
+            if precompute_user_day_plan(db, user_token, target_date):
+                generated += 1
+        except Exception as e:
+            # One user's expired token or AI failure shouldn't stop the batch
+            db.rollback()
+            log_error("nightly_precompute", f"Failed to precompute plan for {user_token.user_id}: {str(e)}")
+
+    log_info("nightly_precompute", "Precomputed day plans",
+             date=str(target_date),
+             generated=generated)
+    return generated
+
+
+if __name__ == "__main__":
+    session = SessionLocal()
+    try:
+        precompute_day_plans(session)
+    finally:
+        session.close()
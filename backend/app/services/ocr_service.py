@@ -1,14 +1,17 @@
+import io
 import pytesseract
 from PIL import Image
 from pathlib import Path
+from typing import BinaryIO, Union
 
 
-def extract_text_from_image(image_path: Path) -> str:
+def extract_text_from_image(image_path: Union[Path, BinaryIO]) -> str:
     """
     Extract text from an image using Tesseract OCR.
 
     Args:
-        image_path: Path to the image file
+        image_path: Path to the image file, or a binary file-like object
+            holding the image data
 
     Returns:
         Extracted text as string
@@ -23,3 +26,16 @@ def extract_text_from_image(image_path: Path) -> str:
         return text.strip()
     except Exception as e:
         raise Exception(f"OCR failed: {str(e)}")
+
+
+def extract_text_from_bytes(image_bytes: bytes) -> str:
+    """
+    Extract text from in-memory image data using Tesseract OCR.
+
+    Args:
+        image_bytes: Raw image file contents
+
+    Returns:
+        Extracted text as string
+    """
+    return extract_text_from_image(io.BytesIO(image_bytes))
@@ -3,20 +3,45 @@ Planning agent that uses Gemini to make intelligent scheduling decisions.
 """
 
 from datetime import date
+from functools import lru_cache
 from typing import List, Tuple
 from pydantic import BaseModel
-import json
+import orjson
 
-import google.generativeai as genai
 from app.config import get_settings
 from app.schemas.calendar import CalendarEvent, FreeBlock
 from app.models.assignment import Assignment
 from app.services.assignment_scheduler import propose_assignment_blocks_for_today
 from app.services.day_context import build_day_context, DayContext
+from app.services.ai_service import configure_gemini
+from app.utils.lazy_import import lazy_import
 from app.utils.logger import log_info, log_error, log_debug
+from app.utils.time_utils import clock_label
 
 settings = get_settings()
-genai.configure(api_key=settings.gemini_api_key)
+genai = lazy_import("google.generativeai")
+
+# Planning decisions never need content filtering
+_SAFETY_SETTINGS = (
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+)
+
+
+@lru_cache(maxsize=1)
+def _planning_model():
+    """Shared Gemini model for planning decisions, built on first use."""
+    configure_gemini()
+    return genai.GenerativeModel(
+        'gemini-flash-latest',
+        generation_config=genai.GenerationConfig(
+            temperature=0.3,  # Lower temperature for more consistent decisions
+            response_mime_type="application/json"
+        ),
+        safety_settings=_SAFETY_SETTINGS
+    )
 
 # Planning constants
 MIN_FREE_HOURS_PER_DAY = 3.0  # Preserve at least 3 hours of free time
@@ -99,23 +124,7 @@ def agent_filter_schedule_for_today(
 
     # Step 4: Call Gemini to make decision
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-        ]
-
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=0.3,  # Lower temperature for more consistent decisions
-                response_mime_type="application/json"
-            ),
-            safety_settings=safety_settings
-        )
+        response = _planning_model().generate_content(prompt)
 
         if not response.candidates:
             raise Exception("Gemini did not return any response")
@@ -133,7 +142,7 @@ def agent_filter_schedule_for_today(
             else:
                 raise Exception(f"Gemini response has no valid content: {str(e)}")
 
-        result = json.loads(response_text)
+        result = orjson.loads(response_text)
 
         decision = AgentDecision(**result)
 
@@ -172,7 +181,7 @@ def build_planning_prompt(context: DayContext, candidate_blocks: List[CalendarEv
             due_days = f", due in {match.group(1)}d"
 
         blocks_list.append(
-            f"{block.id}: {block.start.strftime('%I:%M%p')}-{block.end.strftime('%I:%M%p')}{due_days}"
+            f"{block.id}: {clock_label(block.start, compact=True)}-{clock_label(block.end, compact=True)}{due_days}"
         )
 
     # Compact assignments formatting
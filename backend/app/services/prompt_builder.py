@@ -3,12 +3,76 @@ Optimized prompt builders for Gemini AI.
 Separates prompt logic from service logic for better maintainability.
 """
 
-from typing import List
+from typing import Dict, List, Tuple
 from datetime import datetime
+from operator import attrgetter
 import re
 
 from app.schemas.calendar import CalendarEvent, FreeBlock
 from app.models.assignment import Assignment
+from app.utils.time_utils import clock_label
+
+# "... in 3 days" in the description of a scheduled study block
+_DUE_IN_DAYS_RE = re.compile(r'in (\d+) days')
+
+
+def _merge_duplicate_events(events: List[CalendarEvent]) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Collapse copies of the same event (same title, overlapping times) into one
+    (title, start, end) span. The same class synced from several calendars
+    otherwise appears once per calendar in the prompt. Events with different
+    titles are kept even when they overlap.
+    """
+    merged = []
+    open_spans = {}  # normalized title -> its latest span in merged
+    for e in sorted(events, key=attrgetter("start")):
+        key = e.title.strip().casefold()
+        span = open_spans.get(key)
+        if span is not None and e.start <= span[2]:
+            if e.end > span[2]:
+                span[2] = e.end
+            continue
+        span = [e.title, e.start, e.end]
+        open_spans[key] = span
+        merged.append(span)
+    return [tuple(span) for span in merged]
+
+
+# Instructions and JSON schema shared by every day plan. They lead the prompt,
+# so consecutive requests share an identical prefix the providers can cache;
+# everything specific to the day follows.
+_DAY_PLAN_INSTRUCTIONS = "\n".join([
+    "Day planner for pre-med student.",
+    "",
+    "Generate personalized day plan for Dippi from the day details at the end:",
+    "1. **Lunch slots**: Suggest 1-2 realistic lunch times (11AM-2PM, 30-60min) based on class schedule. If no classes, suggest just ONE midday lunch.",
+    "",
+    "2. **Study slots** - BE SMART about assignment urgency (see Study Guidance):",
+    "   - If scheduled study blocks already exist, leave study_slots EMPTY",
+    "   - Exams (0-5 days): Suggest 1-2 study blocks (1-2h each) if free time exists",
+    "   - Quizzes (0-3 days): Suggest 1 focused block (30-60min)",
+    "   - Lab reports/essays (0-5 days, high priority): Suggest 1 block (1-2h)",
+    "   - Homework (0-3 days): Suggest 1 short block (30-60min)",
+    "   - Assignments >5 days OR already scheduled: SKIP, leave empty",
+    "   - No assignments or light day: SKIP, leave empty",
+    "",
+    "3. **Commute**: If bus times provided, remind about commute. Otherwise omit.",
+    "",
+    "4. **Summary**: Warm, friendly message starting with 'Hey Dippi,' that:",
+    "   - Mentions any urgent exams/quizzes and encourages focused study if needed",
+    "   - Highlights scheduled study blocks if any exist",
+    "   - Mentions bus/commute times if relevant",
+    "   - If day is light/no urgent work: encourage her to relax and enjoy free time",
+    "   - End with '<3' or similar warm sign-off",
+    "",
+    "JSON format (replace YYYY-MM-DD with the plan date in all datetimes):",
+    "{",
+    '  "lunch_slots": [{"start": "YYYY-MM-DDT12:00:00", "end": "YYYY-MM-DDT13:00:00", "label": "12:00 PM - 1:00 PM"}],',
+    '  "study_slots": [],  // BE SELECTIVE based on urgency rules above',
+    '  "commute_suggestion": {"leave_by": "YYYY-MM-DDT19:15:00", "leave_by_label": "7:15 PM", "reason": "Catch evening bus home"} OR null,',
+    '  "summary": "Hey Dippi, ..."',
+    "}",
+])
 
 
 def build_day_plan_prompt(
@@ -23,9 +87,15 @@ def build_day_plan_prompt(
 ) -> str:
     """Build optimized prompt for day plan generation with assignment intelligence."""
 
-    # Partition events efficiently
-    assignment_events = [e for e in events if getattr(e, 'event_type', 'calendar') == "assignment"]
-    calendar_events = [e for e in events if getattr(e, 'event_type', 'calendar') == "calendar"]
+    # Partition events in one pass
+    assignment_events = []
+    calendar_events = []
+    for e in events:
+        event_type = getattr(e, 'event_type', 'calendar')
+        if event_type == "calendar":
+            calendar_events.append(e)
+        elif event_type == "assignment":
+            assignment_events.append(e)
 
     # Analyze upcoming assignments by type and urgency
     today = datetime.fromisoformat(date).date()
@@ -77,24 +147,28 @@ def build_day_plan_prompt(
 
     # Compact event formatting
     def format_time_range(start: datetime, end: datetime) -> str:
-        return f"{start.strftime('%I:%M%p')}-{end.strftime('%I:%M%p')}"
+        return f"{clock_label(start, compact=True)}-{clock_label(end, compact=True)}"
 
-    calendar_list = [f"{e.title} {format_time_range(e.start, e.end)}" for e in calendar_events]
+    calendar_list = [
+        f"{title} {format_time_range(start, end)}"
+        for title, start, end in _merge_duplicate_events(calendar_events)
+    ]
 
     assignment_list = []
     for e in assignment_events:
         due_info = ""
         if hasattr(e, 'description') and e.description:
-            if match := re.search(r'in (\d+) days', e.description):
+            if match := _DUE_IN_DAYS_RE.search(e.description):
                 due_info = f" (due {match.group(1)}d)"
         assignment_list.append(f"{e.title} {format_time_range(e.start, e.end)}{due_info}")
 
     free_list = [f"{format_time_range(fb.start, fb.end)} ({fb.duration_minutes}min)" for fb in free_blocks]
 
-    # Build compact prompt
+    # Build compact prompt: shared instructions first, then this day's details
     prompt_parts = [
-        f"Day planner for pre-med student ({date})",
+        _DAY_PLAN_INSTRUCTIONS,
         "",
+        f"**Date:** {date}",
         f"**Classes:** {', '.join(calendar_list) if calendar_list else 'None'}",
     ]
 
@@ -139,50 +213,31 @@ def build_day_plan_prompt(
     if planning_mode and planning_reason:
         prompt_parts.append(f"**Planning Mode:** {planning_mode} - {planning_reason}")
 
-    # Build smart study slot guidance based on urgency
-    study_guidance = []
+    # Smart study slot guidance based on urgency
     if urgent_exams:
-        study_guidance.append("**PRIORITY**: Exams in 0-5 days require intensive study blocks (1-2 hours)")
+        study_guidance = "**PRIORITY**: Exams in 0-5 days require intensive study blocks (1-2 hours)"
     elif urgent_quizzes:
-        study_guidance.append("Quizzes in 0-3 days benefit from focused review blocks (30-60 min)")
+        study_guidance = "Quizzes in 0-3 days benefit from focused review blocks (30-60 min)"
     elif urgent_other:
-        study_guidance.append("High-priority assignments due soon need attention")
+        study_guidance = "High-priority assignments due soon need attention"
     elif future_exams:
-        study_guidance.append("Exams 6-14 days out: light study blocks OK but not urgent")
+        study_guidance = "Exams 6-14 days out: light study blocks OK but not urgent"
     else:
-        study_guidance.append("No urgent assignments: study blocks optional")
+        study_guidance = "No urgent assignments: study blocks optional"
+    prompt_parts.append(f"**Study Guidance:** {study_guidance}")
+
+    return "\n".join(prompt_parts)
 
-    prompt_parts.extend([
-        "",
-        "Generate personalized day plan for Dippi:",
-        "1. **Lunch slots**: Suggest 1-2 realistic lunch times (11AM-2PM, 30-60min) based on class schedule. If no classes, suggest just ONE midday lunch.",
-        "",
-        "2. **Study slots** - BE SMART about assignment urgency:",
-        *[f"   {g}" for g in study_guidance],
-        "   - If scheduled study blocks already exist, leave study_slots EMPTY",
-        "   - Exams (0-5 days): Suggest 1-2 study blocks (1-2h each) if free time exists",
-        "   - Quizzes (0-3 days): Suggest 1 focused block (30-60min)",
-        "   - Lab reports/essays (0-5 days, high priority): Suggest 1 block (1-2h)",
-        "   - Homework (0-3 days): Suggest 1 short block (30-60min)",
-        "   - Assignments >5 days OR already scheduled: SKIP, leave empty",
-        "   - No assignments or light day: SKIP, leave empty",
-        "",
-        "3. **Commute**: If bus times provided, remind about commute. Otherwise omit.",
-        "",
-        "4. **Summary**: Warm, friendly message starting with 'Hey Dippi,' that:",
-        "   - Mentions any urgent exams/quizzes and encourages focused study if needed",
-        "   - Highlights scheduled study blocks if any exist",
-        "   - Mentions bus/commute times if relevant",
-        "   - If day is light/no urgent work: encourage her to relax and enjoy free time",
-        "   - End with '<3' or similar warm sign-off",
-        "",
-        f"JSON format (use date {date} for all datetimes):",
-        "{",
-        f'  "lunch_slots": [{{"start": "{date}T12:00:00", "end": "{date}T13:00:00", "label": "12:00 PM - 1:00 PM"}}],',
-        '  "study_slots": [],  // BE SELECTIVE based on urgency rules above',
-        f'  "commute_suggestion": {{"leave_by": "{date}T19:15:00", "leave_by_label": "7:15 PM", "reason": "Catch evening bus home"}} OR null,',
-        '  "summary": "Hey Dippi, ..."',
-        "}"
-    ])
 
+def build_week_plan_prompt(day_prompts: Dict[str, str]) -> str:
+    """Combine per-day prompts into one request answered as a JSON object keyed by date."""
+    # The shared day-plan instructions are sent once, followed by each day's details
+    prompt_parts = [
+        _DAY_PLAN_INSTRUCTIONS,
+        "",
+        f"Plan each of these {len(day_prompts)} days independently, following the instructions above with that day's details.",
+        'Return ONE JSON object keyed by date: {"YYYY-MM-DD": {<that day\'s JSON>}, ...}',
+    ]
+    for date, prompt in day_prompts.items():
+        prompt_parts.extend(["", f"=== {date} ===", prompt.removeprefix(_DAY_PLAN_INSTRUCTIONS).strip()])
     return "\n".join(prompt_parts)
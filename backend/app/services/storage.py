@@ -1,15 +1,14 @@
 import os
 import uuid
 from pathlib import Path
-from fastapi import UploadFile
 from app.config import get_settings
 
 settings = get_settings()
 
 
-def save_uploaded_file(file: UploadFile, subfolder: str = "notes") -> str:
+def save_file_bytes(content: bytes, filename: str, subfolder: str = "notes") -> str:
     """
-    Save an uploaded file to local storage.
+    Save already-read file contents to local storage.
     Returns the relative file path.
     """
     # Create upload directory if it doesn't exist
@@ -17,13 +16,12 @@ def save_uploaded_file(file: UploadFile, subfolder: str = "notes") -> str:
     upload_dir.mkdir(parents=True, exist_ok=True)
 
     # Generate unique filename
-    file_extension = Path(file.filename).suffix
+    file_extension = Path(filename).suffix
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     file_path = upload_dir / unique_filename
 
     # Save file
     with open(file_path, "wb") as buffer:
-        content = file.file.read()
         buffer.write(content)
 
     # Return relative path
@@ -33,3 +31,8 @@ def save_uploaded_file(file: UploadFile, subfolder: str = "notes") -> str:
 def get_file_path(relative_path: str) -> Path:
     """Get absolute path from relative path"""
     return Path(settings.upload_dir) / relative_path
+
+
+def delete_file(relative_path: str) -> None:
+    """Remove a stored file (no-op if it is already gone)"""
+    get_file_path(relative_path).unlink(missing_ok=True)
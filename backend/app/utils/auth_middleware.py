@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -13,7 +13,7 @@ security = HTTPBearer()
 
 def create_access_token(user_id: str) -> str:
     """Create a JWT access token for a user"""
-    expire = datetime.utcnow() + timedelta(hours=settings.jwt_expiration_hours)
+    expire = datetime.now(timezone.utc) + timedelta(hours=settings.jwt_expiration_hours)
     to_encode = {
         "sub": str(user_id),
         "exp": expire
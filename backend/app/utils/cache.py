@@ -3,6 +3,7 @@ Cache utilities for invalidating cached data.
 """
 
 from datetime import date, timedelta
+from typing import Iterable
 from sqlalchemy.orm import Session
 from uuid import UUID
 
@@ -36,6 +37,40 @@ def invalidate_day_plan_cache(db: Session, user_id: UUID, target_date: date = No
     return deleted
 
 
+def mark_day_plans_dirty(db: Session, user_id: UUID, dates: Iterable[date], commit: bool = True):
+    """
+    Drop cached day plans (including precomputed ones) for the given dates.
+
+    Commits so the invalidation survives requests that make no other writes;
+    pass commit=False to fold it into the caller's own transaction.
+
+    Args:
+        db: Database session
+        user_id: User UUID
+        dates: Dates touched by the calendar or assignment change
+        commit: Commit immediately (default True)
+
+    Returns:
+        Number of records deleted
+    """
+    dates = set(dates)
+
+    deleted = db.query(DayPlan).filter(
+        DayPlan.user_id == user_id,
+        DayPlan.date.in_(dates)
+    ).delete(synchronize_session=False)
+    if commit:
+        db.commit()
+
+    if deleted > 0:
+        log_info("cache", "Marked day plans dirty",
+                user_id=str(user_id),
+                dates=sorted(str(d) for d in dates),
+                deleted=deleted)
+
+    return deleted
+
+
 def cleanup_old_day_plans(db: Session, days_to_keep: int = 7):
     """
     Remove day plans older than specified days to prevent database bloat.
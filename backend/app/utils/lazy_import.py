@@ -0,0 +1,28 @@
+"""
+Deferred imports for heavy optional SDKs.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return module `name`, executing it only on first attribute access.
+
+    Already-imported modules are returned as is. The first attribute access
+    runs the import, so do it under a lock if several threads may race to it.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -3,15 +3,18 @@ Centralized logging utility.
 Replaces scattered print statements with structured logging.
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
 # Configure logger
 logger = logging.getLogger("studybuddy")
 logger.setLevel(logging.INFO)
 
-# Console handler
+# Console handler (driven by a background listener thread, see below)
 handler = logging.StreamHandler(sys.stderr)
 handler.setLevel(logging.INFO)
 
@@ -23,7 +26,12 @@ formatter = logging.Formatter(
 handler.setFormatter(formatter)
 
 if not logger.handlers:
-    logger.addHandler(handler)
+    # Request threads only enqueue records; the listener thread does the stderr I/O
+    _log_queue = queue.SimpleQueue()
+    listener = QueueListener(_log_queue, handler, respect_handler_level=True)
+    logger.addHandler(QueueHandler(_log_queue))
+    listener.start()
+    atexit.register(listener.stop)
 
 
 def log_info(module: str, message: str, **kwargs: Any):
@@ -41,9 +49,19 @@ def log_error(module: str, message: str, error: Exception = None):
         logger.error(f"[{module}] {message}")
 
 
+def preview_text(text: str, limit: int = 500) -> str:
+    """First `limit` characters of text for log/error messages, with "..." if cut."""
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def log_debug_enabled() -> bool:
+    """Whether debug logging is on (lets callers skip building debug-only values)."""
+    return logger.level <= logging.DEBUG
+
+
 def log_debug(module: str, message: str, **kwargs: Any):
     """Log debug message (only in debug mode)."""
-    if logger.level <= logging.DEBUG:
+    if log_debug_enabled():
         extra_info = " | ".join(f"{k}={v}" for k, v in kwargs.items()) if kwargs else ""
         full_message = f"[{module}] {message}" + (f" | {extra_info}" if extra_info else "")
         logger.debug(full_message)
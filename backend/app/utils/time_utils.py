@@ -1,7 +1,22 @@
 from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
 from typing import List
 from app.schemas.calendar import CalendarEvent, FreeBlock
 
+# "%I:%M %p" and "%I:%M%p" labels for every minute of the day, so prompt and
+# label loops index a tuple instead of calling strftime per timestamp
+_CLOCK_LABELS = tuple(
+    f"{(m // 60) % 12 or 12:02d}:{m % 60:02d} {'AM' if m < 720 else 'PM'}"
+    for m in range(1440)
+)
+_COMPACT_CLOCK_LABELS = tuple(label.replace(" ", "") for label in _CLOCK_LABELS)
+
+
+def clock_label(t, compact: bool = False) -> str:
+    """Format a datetime/time as "07:05 PM" (or "07:05PM" when compact), like strftime."""
+    labels = _COMPACT_CLOCK_LABELS if compact else _CLOCK_LABELS
+    return labels[t.hour * 60 + t.minute]
+
 
 def calculate_free_blocks(
     events: List[CalendarEvent],
@@ -43,28 +58,44 @@ def calculate_free_blocks(
     # Sort events by start time
     sorted_events = sorted(normalized_events, key=lambda e: e.start)
 
+    # tzinfo is part of the key: aware datetimes compare equal across zones,
+    # but the day bounds below are built in the first event's zone
+    spans = tuple(
+        (e.start, e.start.tzinfo, e.end, e.end.tzinfo) for e in sorted_events
+    )
+    return list(_free_blocks_for_spans(spans, day_start, day_end))
+
+
+@lru_cache(maxsize=1024)
+def _free_blocks_for_spans(spans: tuple, day_start: time, day_end: time) -> tuple:
+    """
+    Free blocks for (start, start_tz, end, end_tz) spans sorted by start.
+    Memoized so retries and repeat views of the same schedule skip the sweep;
+    the returned FreeBlocks are shared between callers, so treat them as read-only.
+    """
     # Get the timezone from the first event, or use UTC
-    event_tz = sorted_events[0].start.tzinfo or timezone.utc
-    date = sorted_events[0].start.date()
+    event_tz = spans[0][0].tzinfo or timezone.utc
+    date = spans[0][0].date()
 
     free_blocks = []
     day_start_dt = datetime.combine(date, day_start, tzinfo=event_tz)
     day_end_dt = datetime.combine(date, day_end, tzinfo=event_tz)
 
     # Check for free time before first event
-    if sorted_events[0].start > day_start_dt:
-        duration = int((sorted_events[0].start - day_start_dt).total_seconds() / 60)
+    first_start = spans[0][0]
+    if first_start > day_start_dt:
+        duration = int((first_start - day_start_dt).total_seconds() / 60)
         if duration >= 15:  # Only include blocks >= 15 minutes
             free_blocks.append(FreeBlock(
                 start=day_start_dt,
-                end=sorted_events[0].start,
+                end=first_start,
                 duration_minutes=duration
             ))
 
     # Check for free time between events
-    for i in range(len(sorted_events) - 1):
-        current_end = sorted_events[i].end
-        next_start = sorted_events[i + 1].start
+    for i in range(len(spans) - 1):
+        current_end = spans[i][2]
+        next_start = spans[i + 1][0]
 
         if next_start > current_end:
             duration = int((next_start - current_end).total_seconds() / 60)
@@ -76,18 +107,19 @@ def calculate_free_blocks(
                 ))
 
     # Check for free time after last event
-    if sorted_events[-1].end < day_end_dt:
-        duration = int((day_end_dt - sorted_events[-1].end).total_seconds() / 60)
+    last_end = spans[-1][2]
+    if last_end < day_end_dt:
+        duration = int((day_end_dt - last_end).total_seconds() / 60)
         if duration >= 15:  # Only include blocks >= 15 minutes
             free_blocks.append(FreeBlock(
-                start=sorted_events[-1].end,
+                start=last_end,
                 end=day_end_dt,
                 duration_minutes=duration
             ))
 
-    return free_blocks
+    return tuple(free_blocks)
 
 
 def format_time_slot(start: datetime, end: datetime) -> str:
     """Format a time slot as 'HH:MM AM/PM - HH:MM AM/PM'"""
-    return f"{start.strftime('%-I:%M %p')} - {end.strftime('%-I:%M %p')}"
+    return f"{clock_label(start).lstrip('0')} - {clock_label(end).lstrip('0')}"
@@ -1,7 +1,7 @@
 """
 Utility functions for managing and refreshing Google OAuth tokens.
 """
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from sqlalchemy.orm import Session
@@ -28,12 +28,12 @@ def is_token_expired(user_token: UserToken) -> bool:
 
     # Add 5 minute buffer before actual expiry
     buffer = timedelta(minutes=5)
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
 
-    # Make token_expiry timezone-naive if it's timezone-aware
+    # Google hands back a naive UTC expiry; compare everything as aware UTC
     expiry = user_token.token_expiry
-    if expiry.tzinfo is not None:
-        expiry = expiry.replace(tzinfo=None)
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
 
     return now + buffer >= expiry
 
@@ -0,0 +1,455 @@
+"""
+Tests for the multi-provider AI completion service.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from app.services import ai_service
+
+
+@pytest.fixture(autouse=True)
+def reset_breaker():
+    """Close every provider's circuit before and after each test."""
+    for state in ai_service._breaker.values():
+        state["fails"] = 0
+        state["open_until"] = 0.0
+    ai_service._response_cache.clear()
+    yield
+    for state in ai_service._breaker.values():
+        state["fails"] = 0
+        state["open_until"] = 0.0
+    ai_service._response_cache.clear()
+
+
+def _providers(groq, openai, gemini):
+    return [("groq", groq), ("openai", openai), ("gemini", gemini)]
+
+
+def _sdk_chunk(text):
+    chunk = MagicMock()
+    chunk.choices[0].delta.content = text
+    return chunk
+
+
+class _FakeSdkStream:
+    """Stands in for the Groq SDK's Stream: iterates chunks and records close()."""
+
+    def __init__(self, texts):
+        self.pulled = 0
+        self.closed = False
+        self._chunks = [_sdk_chunk(text) for text in texts]
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.pulled += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def _streaming_groq_client(stream):
+    client = MagicMock()
+    client.with_options.return_value.chat.completions.create.return_value = stream
+    return client
+
+
+@pytest.mark.unit
+class TestGenerateCompletionFallback:
+    """Tests for the provider chain and circuit breaker."""
+
+    def test_falls_back_to_next_provider(self):
+        """Test that a failing provider hands off to the next one."""
+        groq = MagicMock(side_effect=Exception("rate limited"))
+        openai = MagicMock(return_value='{"ok": true}')
+        gemini = MagicMock()
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, openai, gemini)):
+            result = ai_service.generate_completion("prompt")
+
+        assert result == '{"ok": true}'
+        gemini.assert_not_called()
+
+    def test_open_circuit_skips_provider(self):
+        """Test that a provider that just failed is skipped on the next call."""
+        groq = MagicMock(side_effect=Exception("timeout"))
+        openai = MagicMock(return_value="answer")
+        gemini = MagicMock()
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, openai, gemini)):
+            ai_service.generate_completion("first")
+            ai_service.generate_completion("second")
+
+        assert groq.call_count == 1
+        assert openai.call_count == 2
+        assert ai_service._breaker["groq"]["fails"] == 1
+
+    def test_success_resets_failures(self):
+        """Test that a successful call closes the circuit again."""
+        ai_service._breaker["groq"]["fails"] = 3
+        groq = MagicMock(return_value="answer")
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+            ai_service.generate_completion("prompt")
+
+        assert ai_service._breaker["groq"]["fails"] == 0
+
+    def test_unconfigured_provider_is_not_a_failure(self):
+        """Test that a missing API key skips the provider without tripping its breaker."""
+        groq = MagicMock(side_effect=ai_service._ProviderUnavailable("no key"))
+        openai = MagicMock(return_value="answer")
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, openai, MagicMock())):
+            ai_service.generate_completion("prompt")
+
+        assert ai_service._breaker["groq"]["fails"] == 0
+
+    def test_raises_when_chain_exhausted(self):
+        """Test that an error is raised only after every provider failed."""
+        failing = [MagicMock(side_effect=Exception(f"down {i}")) for i in range(3)]
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(*failing)):
+            with pytest.raises(Exception, match="All AI providers failed"):
+                ai_service.generate_completion("prompt")
+
+        for provider in failing:
+            provider.assert_called_once()
+
+
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("raw", [
+    '{"ok": true}',
+    '```json\n{"ok": true}\n```',
+    '  ```\n{"ok": true}```  ',
+])
+def test_generate_json_completion_strips_markdown_fences(raw):
+    """Test that fenced and unfenced JSON responses parse the same."""
+    with patch.object(ai_service, "generate_completion", return_value=raw):
+        assert ai_service.generate_json_completion("prompt") == {"ok": True}
+
+@pytest.mark.unit
+class TestResponseCache:
+    """Tests for the in-process completion cache."""
+
+    def test_deterministic_requests_are_cached(self):
+        """Test that a temperature-0 prompt only hits the provider once."""
+        groq = MagicMock(return_value='{"answer": 42}')
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+            first = ai_service.generate_json_completion("same prompt", temperature=0)
+            second = ai_service.generate_json_completion("same prompt", temperature=0)
+
+        assert first == second == {"answer": 42}
+        groq.assert_called_once()
+
+    def test_sampled_requests_are_not_cached(self):
+        """Test that temperature > 0 requests always call the provider."""
+        groq = MagicMock(return_value="text")
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+            ai_service.generate_completion("prompt", response_format="text")
+            ai_service.generate_completion("prompt", response_format="text")
+
+        assert groq.call_count == 2
+
+    def test_cacheable_sampled_request_reused(self):
+        """Test that cacheable=True reuses a sampled response for the same prompt."""
+        groq = MagicMock(return_value='{"plan": []}')
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+            first = ai_service.generate_json_completion("notes", temperature=0.7, cacheable=True)
+            first["plan"].append("mutated")
+            second = ai_service.generate_json_completion("notes", temperature=0.7, cacheable=True)
+
+        assert second == {"plan": []}
+        groq.assert_called_once()
+
+    def test_unparseable_json_is_not_cached(self):
+        """Test that a response that fails to parse is fetched again next time."""
+        groq = MagicMock(side_effect=["not json", '{"ok": true}'])
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+            with pytest.raises(Exception):
+                ai_service.generate_json_completion("prompt", temperature=0)
+            assert ai_service.generate_json_completion("prompt", temperature=0) == {"ok": True}
+
+        assert groq.call_count == 2
+
+@pytest.mark.unit
+class TestAgenerateCompletions:
+    """Tests for the concurrent batch entrypoint."""
+
+    def test_returns_results_in_prompt_order(self):
+        """Test that batched results line up with their prompts."""
+        import asyncio
+
+        async def echo(prompt, response_format, temperature, timeout):
+            # Finish later prompts first to prove ordering doesn't depend on timing
+            await asyncio.sleep(0.01 if prompt == "a" else 0)
+            return prompt.upper()
+
+        with patch.object(ai_service, "_ASYNC_PROVIDERS", _providers(echo, MagicMock(), MagicMock())):
+            results = asyncio.run(ai_service.agenerate_completions(["a", "b", "c"]))
+
+        assert results == ["A", "B", "C"]
+
+    def test_respects_max_concurrency(self):
+        """Test that no more than max_concurrency requests run at once."""
+        import asyncio
+        in_flight = 0
+        peak = 0
+
+        async def tracked(prompt, response_format, temperature, timeout):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return prompt
+
+        with patch.object(ai_service, "_ASYNC_PROVIDERS", _providers(tracked, MagicMock(), MagicMock())):
+            asyncio.run(ai_service.agenerate_completions([str(i) for i in range(10)], max_concurrency=3))
+
+        assert peak == 3
+
+
+@pytest.mark.unit
+class TestGenerateCompletionStream:
+    """Tests for the streaming entrypoint."""
+
+    def test_streams_groq_chunks(self):
+        """Test that Groq deltas are yielded as they arrive."""
+        stream = _FakeSdkStream(['{"a"', None, ': 1}'])
+        client = _streaming_groq_client(stream)
+        create = client.with_options.return_value.chat.completions.create
+
+        with patch.object(ai_service, "_get_groq_client", return_value=client):
+            pieces = list(ai_service.generate_completion_stream("prompt"))
+
+        assert pieces == ['{"a"', ': 1}']
+        assert create.call_args[1]["stream"] is True
+        assert stream.closed
+
+    def test_early_close_closes_sdk_stream(self):
+        """Test that a consumer stopping early closes the SDK stream (and its connection)."""
+        stream = _FakeSdkStream(["one", "two", "three"])
+
+        with patch.object(ai_service, "_get_groq_client", return_value=_streaming_groq_client(stream)):
+            pieces = ai_service.generate_completion_stream("prompt", response_format="text")
+            assert next(pieces) == "one"
+            pieces.close()
+
+        assert stream.closed
+        assert stream.pulled == 1
+
+    def test_falls_back_to_blocking_chain(self):
+        """Test that without Groq the full response arrives as one chunk."""
+        with patch.object(ai_service, "_get_groq_client", return_value=None), \
+                patch.object(ai_service, "generate_completion", return_value="full text"):
+            pieces = list(ai_service.generate_completion_stream("prompt", response_format="text"))
+
+        assert pieces == ["full text"]
+
+
+@pytest.mark.parametrize("chunks", [
+    ['{"a": "}"', ', "b": {"c": 1}}', ' trailing'],
+    ['```json\n{"a": "\\"}', '", "b": {"c"', ': 1}}\n```'],
+    ['{"a": "\\', '\\", "b": {"c": 1}}'],
+])
+def test_json_scanner_finds_object_end(chunks):
+    """Test that braces inside strings and escaped quotes don't end the object."""
+    scanner = ai_service._JsonObjectScanner()
+    text = ""
+    for chunk in chunks:
+        end = scanner.feed(chunk)
+        if end >= 0:
+            text += chunk[:end]
+            break
+        text += chunk
+
+    assert text.endswith('"b": {"c": 1}}')
+    assert ai_service.orjson.loads(ai_service._FENCE_RE.sub("", text))["b"] == {"c": 1}
+
+
+@pytest.mark.unit
+class TestStreamedJsonCompletion:
+    """Tests for generate_json_completion(stream=True)."""
+
+    def test_stops_reading_after_object_closes(self):
+        """Test that chunks after the closing brace are never pulled."""
+        consumed = []
+
+        def stream(*args, **kwargs):
+            for piece in ['{"summary": ', '"done"}', '\n\nExtra commentary']:
+                consumed.append(piece)
+                yield piece
+
+        with patch.object(ai_service, "generate_completion_stream", side_effect=stream):
+            result = ai_service.generate_json_completion("prompt", stream=True)
+
+        assert result == {"summary": "done"}
+        assert len(consumed) == 2
+
+    def test_closes_sdk_stream_after_object_closes(self):
+        """Test that the early stop closes the Groq SDK stream, not just the wrapper generator."""
+        stream = _FakeSdkStream(['{"summary": ', '"done"}', '\n\nExtra commentary'])
+
+        with patch.object(ai_service, "_get_groq_client", return_value=_streaming_groq_client(stream)):
+            result = ai_service.generate_json_completion("prompt", stream=True)
+
+        assert result == {"summary": "done"}
+        assert stream.closed
+        assert stream.pulled == 2
+
+    def test_uses_cache_before_streaming(self):
+        """Test that a cached response skips the stream entirely."""
+        def single_chunk(*args, **kwargs):
+            yield '{"n": 1}'
+
+        with patch.object(ai_service, "generate_completion_stream", side_effect=single_chunk) as stream:
+            ai_service.generate_json_completion("prompt", cacheable=True, stream=True)
+            ai_service.generate_json_completion("prompt", cacheable=True, stream=True)
+
+        stream.assert_called_once()
+
+
+@pytest.mark.unit
+class TestAdaptiveTimeouts:
+    """Tests for the EWMA-driven per-provider timeout."""
+
+    @pytest.fixture(autouse=True)
+    def reset_latency(self):
+        saved = {name: list(stats) for name, stats in ai_service._latency_stats.items()}
+        yield
+        ai_service._latency_stats.update(saved)
+
+    def test_timeout_tracks_observed_latency(self):
+        """Test that consistently fast calls shrink the timeout toward the floor."""
+        for _ in range(50):
+            ai_service._record_latency("groq", 0.5)
+
+        assert ai_service._provider_timeout("groq") == ai_service.MIN_TIMEOUT_SECONDS
+
+    def test_timeout_is_capped(self):
+        """Test that slow calls never push the timeout past the ceiling."""
+        for _ in range(50):
+            ai_service._record_latency("openai", 200.0)
+
+        assert ai_service._provider_timeout("openai") == ai_service.MAX_TIMEOUT_SECONDS
+
+    def test_timeout_passed_to_provider(self):
+        """Test that each provider call receives its computed timeout."""
+        groq = MagicMock(return_value="answer")
+        expected = ai_service._provider_timeout("groq")
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+            ai_service.generate_completion("prompt", response_format="text")
+
+        assert groq.call_args[0][3] == expected
+
+    def test_timeout_grows_back_after_timeouts(self):
+        """Test that a timed-out call counts as a slow sample instead of being ignored."""
+        for _ in range(50):
+            ai_service._record_latency("groq", 0.5)
+        groq = MagicMock(side_effect=TimeoutError("read timed out"))
+        openai = MagicMock(return_value="answer")
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, openai, MagicMock())):
+            ai_service.generate_completion("prompt", response_format="text")
+
+        assert ai_service._provider_timeout("groq") > ai_service.MIN_TIMEOUT_SECONDS
+
+    def test_long_prompts_keep_separate_estimate(self):
+        """Test that fast short calls don't shrink the timeout used for long prompts."""
+        for _ in range(50):
+            ai_service._record_latency("groq", 0.5)
+        groq = MagicMock(return_value="answer")
+
+        with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+            ai_service.generate_completion("x" * ai_service.LONG_PROMPT_CHARS, response_format="text")
+
+        assert groq.call_args[0][3] >= ai_service.MIN_LONG_TIMEOUT_SECONDS
+        assert ai_service._provider_timeout("groq") == ai_service.MIN_TIMEOUT_SECONDS
+
+
+@pytest.mark.unit
+def test_gemini_model_reused_per_format_and_temperature():
+    """Test that Gemini models are built once per (format, temperature bucket)."""
+    ai_service._gemini_model.cache_clear()
+    try:
+        with patch.object(ai_service.genai, "GenerativeModel", side_effect=lambda **kw: MagicMock()) as mock_model:
+            first = ai_service._gemini_model("json", 7)
+            second = ai_service._gemini_model("json", 7)
+            other = ai_service._gemini_model("text", 7)
+
+        assert first is second
+        assert other is not first
+        assert mock_model.call_count == 2
+    finally:
+        ai_service._gemini_model.cache_clear()
+
+
+@pytest.mark.unit
+def test_agenerate_completions_dedupes_prompts():
+    """Test that duplicate prompts in a batch are sent once and fanned back out."""
+    import asyncio
+    sent = []
+
+    async def record(prompt, response_format, temperature, timeout):
+        sent.append(prompt)
+        return f"answer to {prompt}"
+
+    with patch.object(ai_service, "_ASYNC_PROVIDERS", _providers(record, MagicMock(), MagicMock())):
+        results = asyncio.run(ai_service.agenerate_completions(
+            ["Explain  enzymes", "Explain enzymes ", "Explain ATP"], response_format="text"
+        ))
+
+    assert sorted(sent) == ["Explain ATP", "Explain enzymes"]
+    assert results == ["answer to Explain enzymes", "answer to Explain enzymes", "answer to Explain ATP"]
+
+
+@pytest.mark.unit
+def test_agenerate_json_completion_shares_cache_with_sync_path():
+    """Test that the async JSON completion parses, caches and reuses the sync cache."""
+    import asyncio
+    sent = []
+
+    async def record(prompt, response_format, temperature, timeout):
+        sent.append(prompt)
+        return '```json\n{"flashcards": []}\n```'
+
+    with patch.object(ai_service, "_ASYNC_PROVIDERS", _providers(record, MagicMock(), MagicMock())):
+        first = asyncio.run(ai_service.agenerate_json_completion("guide", cacheable=True))
+        second = asyncio.run(ai_service.agenerate_json_completion("guide", cacheable=True))
+
+    with patch.object(ai_service, "_PROVIDERS", _providers(MagicMock(), MagicMock(), MagicMock())):
+        third = ai_service.generate_json_completion("guide", cacheable=True)
+
+    assert first == second == third == {"flashcards": []}
+    assert sent == ["guide"]
+
+
+@pytest.mark.unit
+def test_batch_and_single_paths_share_cache_for_spaced_prompts():
+    """Test that a prompt with runs of spaces hits the same cache entry on every path."""
+    import asyncio
+
+    async def answer(prompt, response_format, temperature, timeout):
+        return "batched answer"
+
+    with patch.object(ai_service, "_ASYNC_PROVIDERS", _providers(answer, MagicMock(), MagicMock())):
+        asyncio.run(ai_service.agenerate_completions(
+            ["Explain   enzymes\tplease"], response_format="text", cacheable=True
+        ))
+
+    groq = MagicMock(return_value="fresh answer")
+    with patch.object(ai_service, "_PROVIDERS", _providers(groq, MagicMock(), MagicMock())):
+        result = ai_service.generate_completion(
+            "Explain   enzymes\tplease", response_format="text", cacheable=True
+        )
+
+    assert result == "batched answer"
+    groq.assert_not_called()
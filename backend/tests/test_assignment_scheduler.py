@@ -10,7 +10,8 @@ from app.services.assignment_scheduler import (
     propose_assignment_blocks_for_today,
     schedule_assignments_for_today,
     MAX_STUDY_HOURS_PER_DAY,
-    DEFAULT_BLOCK_HOURS
+    DEFAULT_BLOCK_HOURS,
+    _schedule_core
 )
 from app.schemas.calendar import CalendarEvent, FreeBlock
 from app.models.assignment import Assignment
@@ -457,6 +458,50 @@ class TestProposeAssignmentBlocks:
         # Should only add 1 more hour (max is 4, already have 3)
         assert new_hours <= 1.0
 
+    def test_full_day_returns_nothing(self, est, today_est, test_user):
+        """Test that a day already at the study limit schedules nothing."""
+        today = date.today()
+
+        assignment = Assignment(
+            id=1,
+            user_id=test_user.id,
+            title="Physics Homework",
+            due_date=today_est + timedelta(days=1),
+            estimated_hours=1.0,
+            priority=3,
+            completed=False
+        )
+
+        existing_events = [
+            CalendarEvent(
+                id="existing-1",
+                title="Already Scheduled",
+                start=today_est.replace(hour=8),
+                end=today_est.replace(hour=12),
+                event_type="assignment"
+            )
+        ]
+
+        free_block = FreeBlock(
+            id="free-1",
+            start=today_est.replace(hour=14),
+            end=today_est.replace(hour=18),
+            start_label="2:00 PM",
+            end_label="6:00 PM",
+            duration_hours=4.0,
+            duration_minutes=240,
+            block_type="free"
+        )
+
+        blocks = propose_assignment_blocks_for_today(
+            today=today,
+            events=existing_events,
+            free_blocks=[free_block],
+            assignments=[assignment]
+        )
+
+        assert blocks == []
+
     def test_block_description_includes_due_date(self, est, today_est, test_user):
         """Test that block description includes due date information."""
         today = date.today()
@@ -531,3 +576,53 @@ class TestScheduleAssignmentsForToday:
 
         assert len(blocks) == 1
         assert blocks[0].title == "Work on Physics Homework"
+
+
+class TestScheduleCore:
+    """Test suite for the integer-minute placement kernel."""
+
+    def test_packs_blocks_within_budget(self):
+        """Test that the kernel splits by preferred size and stops at the budget."""
+        placements = _schedule_core(
+            free_starts=[600],
+            free_ends=[840],
+            free_day_ends=[1380],
+            requested_minutes=[120, 120],
+            preferred_block_minutes=[60, 60],
+            budget_minutes=150,
+        )
+
+        assert placements == [
+            (0, 0, 600, 60),
+            (0, 0, 660, 60),
+            (1, 0, 720, 30),
+        ]
+
+    def test_clamps_to_day_end(self):
+        """Test that blocks never run past the day-end cutoff."""
+        placements = _schedule_core(
+            free_starts=[1320],
+            free_ends=[1440],
+            free_day_ends=[1380],
+            requested_minutes=[120],
+            preferred_block_minutes=[120],
+            budget_minutes=240,
+        )
+
+        assert placements == [(0, 0, 1320, 60)]
+
+    def test_later_assignments_do_not_overlap_earlier_blocks(self):
+        """Test that used free time is skipped, not handed out twice."""
+        placements = _schedule_core(
+            free_starts=[600, 900],
+            free_ends=[660, 1020],
+            free_day_ends=[1380, 1380],
+            requested_minutes=[60, 60],
+            preferred_block_minutes=[60, 60],
+            budget_minutes=240,
+        )
+
+        assert placements == [
+            (0, 0, 600, 60),
+            (1, 1, 900, 60),
+        ]
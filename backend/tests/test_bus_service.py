@@ -0,0 +1,387 @@
+"""
+Tests for bus schedule service.
+"""
+
+import pytest
+from datetime import datetime, date, time
+from zoneinfo import ZoneInfo
+
+from app.models.bus_schedule import BusSchedule, Direction, Route
+from app.services import bus_service
+from app.services.bus_service import (
+    find_bus_to_campus,
+    find_bus_from_campus,
+    get_all_buses_for_day,
+    get_bus_suggestions_for_day,
+    get_bus_suggestions_for_week,
+    invalidate_schedule_cache,
+    _filter_campus_events,
+    _fmt_12h
+)
+from app.schemas.calendar import CalendarEvent
+
+# 2025-01-06 is a Monday
+MONDAY = date(2025, 1, 6)
+EST = ZoneInfo("America/New_York")
+
+
+def _bus(route, direction, dep, arr, day=1, late=False):
+    return BusSchedule(
+        route=route,
+        direction=direction,
+        departure_time=dep,
+        arrival_time=arr,
+        day_of_week=day,
+        duration_minutes=10,
+        is_late_night=late
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_schedule_cache():
+    """Each test seeds its own database, so start from an empty cache."""
+    invalidate_schedule_cache()
+    yield
+    invalidate_schedule_cache()
+
+
+@pytest.fixture
+def bus_schedule(db_session):
+    """Seed a small Monday timetable for both routes."""
+    buses = [
+        _bus(Route.westside, Direction.outbound, time(7, 30), time(7, 40)),
+        _bus(Route.westside, Direction.outbound, time(8, 5), time(8, 15)),
+        _bus(Route.westside, Direction.outbound, time(8, 50), time(9, 0)),
+        _bus(Route.union, Direction.outbound, time(7, 50), time(8, 10)),
+        _bus(Route.westside, Direction.inbound, time(12, 0), time(12, 10)),
+        _bus(Route.westside, Direction.inbound, time(15, 0), time(15, 10)),
+        _bus(Route.westside, Direction.inbound, time(23, 55), time(0, 5), late=True),
+        _bus(Route.union, Direction.inbound, time(16, 0), time(16, 20)),
+    ]
+    db_session.add_all(buses)
+    db_session.commit()
+    return buses
+
+
+class TestFindBuses:
+    """Test suite for the morning/evening bus finders."""
+
+    def test_to_campus_picks_latest_arrival_before_buffer(self, db_session, bus_schedule):
+        target = datetime.combine(MONDAY, time(8, 30), tzinfo=EST)
+        bus = find_bus_to_campus(db_session, target, buffer_minutes=15)
+
+        assert bus.direction == Direction.outbound
+        assert bus.arrival_time == time(8, 15)
+        assert "15 min" in bus.reason
+
+    def test_to_campus_none_when_too_early(self, db_session, bus_schedule):
+        target = datetime.combine(MONDAY, time(7, 0), tzinfo=EST)
+        assert find_bus_to_campus(db_session, target) is None
+
+    def test_from_campus_picks_first_departure_after_class(self, db_session, bus_schedule):
+        last_class_end = datetime.combine(MONDAY, time(14, 30), tzinfo=EST)
+        bus = find_bus_from_campus(db_session, last_class_end)
+
+        assert bus.direction == Direction.inbound
+        assert bus.departure_time == time(15, 0)
+        assert bus.reason == "Departs 30 min after last class ends"
+
+    def test_from_campus_late_night(self, db_session, bus_schedule):
+        last_class_end = datetime.combine(MONDAY, time(23, 0), tzinfo=EST)
+        bus = find_bus_from_campus(db_session, last_class_end)
+
+        assert bus.is_late_night is True
+        assert bus.to_dict(MONDAY)["arrival_time"] == "2025-01-07T00:05:00"
+
+    def test_naive_times_supported(self, db_session, bus_schedule):
+        target = datetime.combine(MONDAY, time(8, 30))
+        assert find_bus_to_campus(db_session, target).reason == "Arrives at campus 15 min before first class"
+        assert find_bus_from_campus(db_session, target).reason == "Departs 210 min after last class ends"
+
+    def test_suggestion_to_dict(self, db_session, bus_schedule):
+        target = datetime.combine(MONDAY, time(8, 30), tzinfo=EST)
+        bus = find_bus_to_campus(db_session, target)
+
+        assert bus.to_dict(MONDAY) == {
+            "direction": "outbound",
+            "departure_time": "2025-01-06T08:05:00",
+            "arrival_time": "2025-01-06T08:15:00",
+            "departure_label": "08:05 AM",
+            "arrival_label": "08:15 AM",
+            "reason": "Arrives at campus 15 min before first class",
+            "is_late_night": False
+        }
+
+    def test_exact_boundaries_are_inclusive(self, db_session, bus_schedule):
+        # Desired arrival 09:00 matches the 08:50 bus exactly
+        target = datetime.combine(MONDAY, time(9, 15), tzinfo=EST)
+        assert find_bus_to_campus(db_session, target).arrival_time == time(9, 0)
+
+        # Class ends exactly when the 12:00 bus leaves
+        noon = datetime.combine(MONDAY, time(12, 0), tzinfo=EST)
+        assert find_bus_from_campus(db_session, noon).departure_time == time(12, 0)
+
+    def test_from_campus_none_after_last_bus(self, db_session, bus_schedule):
+        target = datetime.combine(MONDAY, time(23, 58), tzinfo=EST)
+        assert find_bus_from_campus(db_session, target) is None
+
+    def test_weekend_returns_none(self, db_session, bus_schedule):
+        saturday = datetime.combine(date(2025, 1, 11), time(9, 0), tzinfo=EST)
+        assert find_bus_to_campus(db_session, saturday) is None
+        assert find_bus_from_campus(db_session, saturday) is None
+
+
+def _event(title, location, start, end):
+    return CalendarEvent(
+        id=title, title=title, location=location,
+        start=datetime.combine(MONDAY, start, tzinfo=EST),
+        end=datetime.combine(MONDAY, end, tzinfo=EST)
+    )
+
+
+class TestCampusEvents:
+    """Test suite for campus event filtering and day suggestions."""
+
+    def test_filter_campus_events(self):
+        events = [
+            _event("Lecture", "Room 101", time(9), time(10)),
+            _event("Study group", None, time(10), time(11)),
+            _event("Seminar", "https://meet.google.com/abc", time(11), time(12)),
+            _event("Virtual lab", "Science Building", time(12), time(13)),
+            _event("Campus tour", None, time(13), time(14)),
+            _event("Office hours", "  ", time(14), time(15)),
+        ]
+        assert [e.title for e in _filter_campus_events(events)] == ["Lecture", "Campus tour"]
+
+    def test_filter_is_case_insensitive(self):
+        events = [
+            _event("ZOOM Check-in", "Library", time(9), time(10)),
+            _event("Lab", "HTTPS://Teams.Microsoft.com/l/1", time(10), time(11)),
+            _event("UDC Orientation", None, time(11), time(12)),
+            _event("Recitation", "ROOM 204", time(12), time(13)),
+        ]
+        assert [e.title for e in _filter_campus_events(events)] == ["UDC Orientation", "Recitation"]
+
+    def test_suggestions_bracket_campus_day(self, db_session, bus_schedule, test_user):
+        events = [
+            _event("Lecture", "Room 101", time(8, 30), time(10)),
+            _event("Lab", "Science Building", time(13), time(14, 30)),
+        ]
+        morning, evening = get_bus_suggestions_for_day(db_session, test_user.id, MONDAY, events)
+
+        assert morning.arrival_time == time(8, 15)
+        assert evening.departure_time == time(15, 0)
+
+    def test_suggestions_accept_prefiltered_events(self, db_session, bus_schedule, test_user):
+        events = [_event("Lecture", "Room 101", time(8, 30), time(10))]
+        campus_events = _filter_campus_events(events)
+
+        morning, evening = get_bus_suggestions_for_day(
+            db_session, test_user.id, MONDAY, events, campus_events=campus_events
+        )
+        assert morning.arrival_time == time(8, 15)
+        assert evening.departure_time == time(12, 0)
+
+    def test_suggestions_use_saved_buffers(self, db_session, bus_schedule, test_user):
+        from app.models.user_bus_preferences import UserBusPreferences
+
+        db_session.add(UserBusPreferences(
+            user_id=test_user.id, arrival_buffer_minutes=40, departure_buffer_minutes=60
+        ))
+        db_session.commit()
+
+        events = [_event("Lecture", "Room 101", time(8, 30), time(11, 30))]
+        morning, evening = get_bus_suggestions_for_day(db_session, test_user.id, MONDAY, events)
+
+        # Must arrive by 07:50 and leave no earlier than 12:30
+        assert morning.arrival_time == time(7, 40)
+        assert evening.departure_time == time(15, 0)
+
+    def test_weekend_skips_database(self, db_session, test_user, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("weekend suggestions should not hit the database")
+
+        monkeypatch.setattr(db_session, "execute", fail)
+        saturday = date(2025, 1, 11)
+        events = [_event("Lecture", "Room 101", time(9), time(10))]
+
+        assert get_bus_suggestions_for_day(db_session, test_user.id, saturday, events) == (None, None)
+
+    def test_week_suggestions_one_preferences_query(self, db_session, bus_schedule, test_user):
+        from sqlalchemy import event
+
+        tuesday = date(2025, 1, 7)
+        saturday = date(2025, 1, 11)
+        events_by_date = {
+            MONDAY: [_event("Lecture", "Room 101", time(8, 30), time(14, 30))],
+        }
+        # Warm the timetable so only the preferences query remains
+        get_all_buses_for_day(db_session, MONDAY)
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        bind = db_session.get_bind()
+        event.listen(bind, "before_cursor_execute", record)
+        try:
+            result = get_bus_suggestions_for_week(
+                db_session, test_user.id, [MONDAY, tuesday, saturday], events_by_date
+            )
+        finally:
+            event.remove(bind, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+        assert set(result) == {MONDAY, tuesday}
+        morning, evening = result[MONDAY]
+        assert morning.arrival_time == time(8, 15)
+        assert evening.departure_time == time(15, 0)
+        assert result[tuesday] == (None, None)
+
+    def test_no_campus_events_no_suggestions(self, db_session, bus_schedule, test_user):
+        events = [_event("Zoom standup", None, time(9), time(10))]
+        assert get_bus_suggestions_for_day(db_session, test_user.id, MONDAY, events) == (None, None)
+
+
+def test_fmt_12h_matches_strftime():
+    for hour in range(24):
+        for minute in (0, 5, 59):
+            t = time(hour, minute)
+            assert _fmt_12h(t) == t.strftime("%I:%M %p")
+
+
+class TestScheduleCache:
+    """Test suite for the in-process timetable cache."""
+
+    def test_table_read_once(self, db_session, bus_schedule, monkeypatch):
+        calls = []
+        original = bus_service._load_schedule_cache
+
+        def counting_load(db):
+            calls.append(db)
+            original(db)
+
+        monkeypatch.setattr(bus_service, "_load_schedule_cache", counting_load)
+
+        target = datetime.combine(MONDAY, time(9, 0), tzinfo=EST)
+        find_bus_to_campus(db_session, target)
+        find_bus_from_campus(db_session, target)
+        get_all_buses_for_day(db_session, MONDAY)
+
+        assert len(calls) == 1
+
+    def test_single_select_for_all_routes(self, db_session, bus_schedule):
+        from sqlalchemy import event
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        bind = db_session.get_bind()
+        event.listen(bind, "before_cursor_execute", record)
+        try:
+            get_all_buses_for_day(db_session, MONDAY)
+            get_all_buses_for_day(db_session, MONDAY)
+        finally:
+            event.remove(bind, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+        assert "bus_schedules" in statements[0]
+
+    def test_invalidate_picks_up_new_rows(self, db_session, bus_schedule):
+        target = datetime.combine(MONDAY, time(13, 0), tzinfo=EST)
+        assert find_bus_from_campus(db_session, target).departure_time == time(15, 0)
+
+        db_session.add(_bus(Route.westside, Direction.inbound, time(13, 30), time(13, 40)))
+        db_session.commit()
+        assert find_bus_from_campus(db_session, target).departure_time == time(15, 0)
+
+        invalidate_schedule_cache()
+        assert find_bus_from_campus(db_session, target).departure_time == time(13, 30)
+
+
+class TestGetAllBusesForDay:
+    """Test suite for get_all_buses_for_day."""
+
+    def test_buckets_by_route_and_direction(self, db_session, bus_schedule):
+        schedule = get_all_buses_for_day(db_session, MONDAY)
+
+        to_campus = schedule["westside"]["to_campus"]
+        assert [b["departure_label"] for b in to_campus] == ["07:30 AM", "08:05 AM", "08:50 AM"]
+        assert to_campus[0] == {
+            "route": "westside",
+            "direction": "outbound",
+            "departure_time": "2025-01-06T07:30:00",
+            "arrival_time": "2025-01-06T07:40:00",
+            "departure_label": "07:30 AM",
+            "arrival_label": "07:40 AM",
+            "is_late_night": False
+        }
+        assert len(schedule["westside"]["from_campus"]) == 3
+        assert len(schedule["union"]["to_main_murray"]) == 1
+        assert schedule["union"]["from_main_murray"][0]["route"] == "union"
+
+    def test_overnight_arrival_rolls_to_next_day(self, db_session, bus_schedule):
+        schedule = get_all_buses_for_day(db_session, MONDAY)
+        late = schedule["westside"]["from_campus"][-1]
+
+        assert late["arrival_time"] == "2025-01-07T00:05:00"
+        assert late["is_late_night"] is True
+
+    def test_filters_against_campus_events(self, db_session, bus_schedule):
+        events = [
+            CalendarEvent(
+                id="1", title="Lecture", location="Room 101",
+                start=datetime.combine(MONDAY, time(8, 30)),
+                end=datetime.combine(MONDAY, time(14, 0))
+            ),
+            CalendarEvent(
+                id="2", title="Online office hours", location="https://zoom.us/j/1",
+                start=datetime.combine(MONDAY, time(6, 0)),
+                end=datetime.combine(MONDAY, time(7, 0))
+            ),
+        ]
+        schedule = get_all_buses_for_day(db_session, MONDAY, events=events)
+
+        assert [b["departure_label"] for b in schedule["westside"]["to_campus"]] == ["07:30 AM", "08:05 AM"]
+        assert [b["departure_label"] for b in schedule["westside"]["from_campus"]] == ["03:00 PM", "11:55 PM"]
+        assert schedule["union"]["to_main_murray"][0]["departure_label"] == "07:50 AM"
+
+    def test_overnight_ride_conflicts_with_long_event(self, db_session, bus_schedule):
+        # Only an overnight ride can both pass the first-class cutoff and overlap an event
+        db_session.add(_bus(Route.westside, Direction.outbound, time(23, 50), time(0, 10)))
+        db_session.commit()
+
+        def to_campus(events):
+            invalidate_schedule_cache()
+            schedule = get_all_buses_for_day(db_session, MONDAY, events=events)
+            return [b["departure_label"] for b in schedule["westside"]["to_campus"]]
+
+        lecture = _event("Lecture", "Room 101", time(8, 30), time(10))
+        assert to_campus([lecture]) == ["07:30 AM", "08:05 AM", "11:50 PM"]
+
+        # A long event nested around a short one: the sweep must use the running max end
+        night_lab = _event("Night lab", "Lab Building", time(9), time(23, 59))
+        quiz = _event("Quiz", "Room 5", time(10), time(11))
+        assert to_campus([lecture, night_lab, quiz]) == ["07:30 AM", "08:05 AM"]
+
+    def test_unfiltered_payload_reused_per_date(self, db_session, bus_schedule):
+        first = get_all_buses_for_day(db_session, MONDAY, filter_by_schedule=False)
+        assert get_all_buses_for_day(db_session, MONDAY) is first
+
+        # A different date with the same weekday gets its own dates
+        next_monday = get_all_buses_for_day(db_session, date(2025, 1, 13))
+        assert next_monday["westside"]["to_campus"][0]["departure_time"] == "2025-01-13T07:30:00"
+
+        events = [_event("Lecture", "Room 101", time(8, 30), time(14))]
+        filtered = get_all_buses_for_day(db_session, MONDAY, events=events)
+        assert filtered is not first
+        assert len(filtered["westside"]["to_campus"]) == 2
+
+        invalidate_schedule_cache()
+        assert get_all_buses_for_day(db_session, MONDAY) is not first
+
+    def test_weekend_is_empty(self, db_session, bus_schedule):
+        assert get_all_buses_for_day(db_session, date(2025, 1, 12)) == {"outbound": [], "inbound": []}
@@ -5,7 +5,7 @@ Tests for cache utility functions.
 import pytest
 from datetime import date, timedelta
 
-from app.utils.cache import invalidate_day_plan_cache, cleanup_old_day_plans
+from app.utils.cache import invalidate_day_plan_cache, cleanup_old_day_plans, mark_day_plans_dirty
 from app.models.day_plan import DayPlan
 
 
@@ -394,3 +394,45 @@ class TestCleanupOldDayPlans:
         remaining_dates = {plan.date for plan in remaining}
         assert today in remaining_dates
         assert today + timedelta(days=5) in remaining_dates
+
+
+class TestMarkDayPlansDirty:
+    """Test suite for mark_day_plans_dirty function."""
+
+    def test_only_listed_dates_are_dropped(self, db_session, test_user):
+        """Test that plans outside the dirty dates survive."""
+        today = date.today()
+        for offset in range(3):
+            db_session.add(DayPlan(
+                user_id=test_user.id,
+                date=today + timedelta(days=offset),
+                events=[],
+                free_blocks=[],
+                recommendations={"summary": str(offset)}
+            ))
+        db_session.commit()
+
+        deleted = mark_day_plans_dirty(db_session, test_user.id, (today, today + timedelta(days=1)))
+
+        assert deleted == 2
+        remaining = db_session.query(DayPlan.date).filter(
+            DayPlan.user_id == test_user.id
+        ).all()
+        assert [row.date for row in remaining] == [today + timedelta(days=2)]
+
+    def test_commit_false_joins_caller_transaction(self, db_session, test_user):
+        """Test that commit=False leaves the delete to the caller's transaction."""
+        today = date.today()
+        db_session.add(DayPlan(
+            user_id=test_user.id,
+            date=today,
+            events=[],
+            free_blocks=[],
+            recommendations={"summary": "Today"}
+        ))
+        db_session.commit()
+
+        mark_day_plans_dirty(db_session, test_user.id, [today], commit=False)
+        db_session.rollback()
+
+        assert db_session.query(DayPlan).filter(DayPlan.user_id == test_user.id).count() == 1
@@ -353,6 +353,70 @@ class TestGetDayPlanEndpoint:
         mock_orchestrate.assert_not_called()
         mock_get_events.assert_not_called()
 
+    @staticmethod
+    def _hashed_plan(db_session, test_user, events_hash):
+        from app.models.day_plan import DayPlan
+        from datetime import date
+
+        db_session.add(DayPlan(
+            user_id=test_user.id,
+            date=date.today(),
+            events=[],
+            free_blocks=[],
+            recommendations={
+                "lunch_slots": [],
+                "study_slots": [],
+                "commute_suggestion": None,
+                "summary": "Precomputed plan"
+            },
+            events_hash=events_hash
+        ))
+        db_session.commit()
+
+    @patch('app.routes.calendar.store_day_plan')
+    @patch('app.routes.calendar.orchestrate_day_plan')
+    @patch('app.routes.calendar.get_todays_events', return_value=[])
+    def test_get_day_plan_precomputed_hash_matches(self, mock_get_events, mock_orchestrate, mock_store,
+                                                   client, db_session, test_user, test_user_token):
+        """Test that a precomputed plan is served while today's events still hash the same."""
+        from app.services.nightly_precompute import compute_events_hash
+        self._hashed_plan(db_session, test_user, compute_events_hash([]))
+
+        with patch('app.routes.calendar._get_user_calendar_token', return_value=test_user_token):
+            response = client.get("/calendar/day-plan")
+
+        assert response.status_code == 200
+        assert response.json()["recommendations"]["summary"] == "Precomputed plan"
+        mock_get_events.assert_called_once()
+        mock_orchestrate.assert_not_called()
+
+    @patch('app.routes.calendar.store_day_plan')
+    @patch('app.routes.calendar.orchestrate_day_plan')
+    @patch('app.routes.calendar.get_todays_events', return_value=[])
+    def test_get_day_plan_precomputed_hash_stale(self, mock_get_events, mock_orchestrate, mock_store,
+                                                 client, db_session, test_user, test_user_token):
+        """Test that a precomputed plan is regenerated once the calendar changed."""
+        from app.schemas.calendar import Recommendations
+        self._hashed_plan(db_session, test_user, "hash-before-calendar-edit")
+        mock_orchestrate.return_value = (
+            [],
+            [],
+            Recommendations(
+                lunch_slots=[],
+                study_slots=[],
+                commute_suggestion=None,
+                summary="Fresh plan"
+            )
+        )
+
+        with patch('app.routes.calendar._get_user_calendar_token', return_value=test_user_token):
+            response = client.get("/calendar/day-plan")
+
+        assert response.status_code == 200
+        assert response.json()["recommendations"]["summary"] == "Fresh plan"
+        mock_orchestrate.assert_called_once()
+        mock_store.assert_called_once()
+
     @pytest.mark.skip(reason="Complex orchestrator mocking needed")
     @patch('app.services.google_calendar.get_todays_events')
     @patch('app.services.day_plan_orchestrator.orchestrate_day_plan')
@@ -468,3 +532,58 @@ class TestBusPreferencesEndpoints:
         assert data["auto_create_events"] is True  # Unchanged
         assert data["arrival_buffer_minutes"] == 25  # Updated
         assert data["departure_buffer_minutes"] == 5  # Unchanged
+
+
+class TestWeekBusSuggestionsEndpoint:
+    """Test suite for GET /calendar/week-bus-suggestions endpoint."""
+
+    @patch('app.routes.calendar.get_week_events')
+    def test_week_bus_suggestions(self, mock_get_events, client, db_session, test_user, test_user_token):
+        """Test suggestions are grouped per weekday with events."""
+        from datetime import time
+        from app.models.bus_schedule import BusSchedule, Direction
+        from app.schemas.calendar import CalendarEvent
+        from app.services.bus_service import invalidate_schedule_cache
+
+        est = ZoneInfo("America/New_York")
+        # Monday and Tuesday timetable
+        for day in (1, 2):
+            db_session.add(BusSchedule(
+                direction=Direction.outbound, departure_time=time(8, 0), arrival_time=time(8, 10),
+                day_of_week=day, duration_minutes=10
+            ))
+            db_session.add(BusSchedule(
+                direction=Direction.inbound, departure_time=time(16, 0), arrival_time=time(16, 10),
+                day_of_week=day, duration_minutes=10
+            ))
+        db_session.commit()
+        invalidate_schedule_cache()
+
+        mock_get_events.return_value = [
+            # Monday 2025-01-06, on campus
+            CalendarEvent(id="1", title="Lecture", location="Room 101",
+                          start=datetime(2025, 1, 6, 9, 0, tzinfo=est), end=datetime(2025, 1, 6, 15, 0, tzinfo=est)),
+            # Tuesday, online only
+            CalendarEvent(id="2", title="Online seminar", location=None,
+                          start=datetime(2025, 1, 7, 9, 0, tzinfo=est), end=datetime(2025, 1, 7, 10, 0, tzinfo=est)),
+            # Saturday, no buses
+            CalendarEvent(id="3", title="Campus event", location="Room 5",
+                          start=datetime(2025, 1, 11, 9, 0, tzinfo=est), end=datetime(2025, 1, 11, 10, 0, tzinfo=est)),
+        ]
+
+        try:
+            response = client.get("/calendar/week-bus-suggestions")
+        finally:
+            invalidate_schedule_cache()
+
+        assert response.status_code == 200
+        days = response.json()["days"]
+        assert [d["date"] for d in days] == ["2025-01-06", "2025-01-07"]
+        assert days[0]["morning"]["departure_time"] == "2025-01-06T08:00:00"
+        assert days[0]["evening"]["departure_time"] == "2025-01-06T16:00:00"
+        assert days[1]["morning"] is None and days[1]["evening"] is None
+
+    def test_week_bus_suggestions_no_token(self, client, db_session, test_user):
+        """Test week bus suggestions fail without a Google token."""
+        response = client.get("/calendar/week-bus-suggestions")
+        assert response.status_code == 401
@@ -0,0 +1,246 @@
+"""
+Tests for Gemini response parsing helpers.
+"""
+
+import pytest
+
+from app.services.gemini_service import fix_invalid_escape_sequences, parse_gemini_json_response
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("raw, fixed", [
+    (r'{"a": "C:\path"}', r'{"a": "C:\\path"}'),
+    (r'{"a": "line\nbreak \"quoted\" \u00e9"}', r'{"a": "line\nbreak \"quoted\" \u00e9"}'),
+    (r'{"a": "\\q"}', r'{"a": "\\q"}'),
+    (r'{"a": "\\\q"}', r'{"a": "\\\\q"}'),
+    ('{"a": "\\frac{1}{2} \\alpha"}', '{"a": "\\frac{1}{2} \\\\alpha"}'),
+    ('trailing \\', 'trailing \\'),
+])
+def test_fix_invalid_escape_sequences(raw, fixed):
+    """Test that only backslashes outside valid JSON escape pairs are doubled."""
+    assert fix_invalid_escape_sequences(raw) == fixed
+
+
+@pytest.mark.unit
+def test_parse_repairs_latex_escapes():
+    """Test that LaTeX-style backslashes in model output still parse."""
+    assert parse_gemini_json_response(r'{"answer": "\sqrt{2}"}') == {"answer": r"\sqrt{2}"}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("raw", [
+    '{"summary": "ok"}',
+    '\n  {"summary": "ok"}  \n',
+    '```json\n{"summary": "ok"}\n```',
+    '```\n{"summary": "ok"}\n  ```  ',
+    '```json\n{"summary": "ok"}',
+    'Here is the plan:\n{"summary": "ok"}\nGood luck!',
+])
+def test_parse_handles_fences_and_prose(raw):
+    """Test that the fallback strategies still apply after the fast path misses."""
+    assert parse_gemini_json_response(raw) == {"summary": "ok"}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("raw, expected", [
+    ('Sure! {"summary": "use {braces} and \\"quotes\\""} Hope that helps {:}', {"summary": 'use {braces} and "quotes"'}),
+    ('Plan: {"a": {"b": 1}} then {"c": 2}', {"a": {"b": 1}}),
+])
+def test_parse_extracts_first_balanced_object(raw, expected):
+    """Test that the first complete object is used, ignoring braces in strings and trailing prose."""
+    assert parse_gemini_json_response(raw) == expected
+
+
+@pytest.mark.unit
+def test_find_json_object_unclosed():
+    """Test that a truncated object yields None."""
+    from app.services.gemini_service import _find_json_object
+
+    assert _find_json_object('text {"a": "}') is None
+    assert _find_json_object('no braces') is None
+
+
+@pytest.mark.unit
+def test_parse_failure_raises_with_preview():
+    """Test that unparseable responses raise with a preview of the text."""
+    with pytest.raises(Exception, match="Response preview: not json"):
+        parse_gemini_json_response("not json")
+
+
+@pytest.mark.unit
+def test_sanitize_text_for_prompt():
+    """Test that line endings are normalized and control characters dropped."""
+    from app.services.gemini_service import sanitize_text_for_prompt
+
+    raw = "Title\r\nLine\rNext\x00\x07\tTabbed\x1f é\n"
+
+    assert sanitize_text_for_prompt(raw) == "Title\nLine\nNext\tTabbed é\n"
+    assert sanitize_text_for_prompt("") == ""
+
+
+@pytest.mark.unit
+def test_compress_notes_drops_page_furniture():
+    """Test that repeated headers and page numbers are dropped but content is kept."""
+    from app.services.gemini_service import _compress_notes
+
+    pages = [
+        f"PHYS 201 Lecture 4   \nNewton's law {n}: F = ma\n\n\n\nPage {n} of 5"
+        for n in range(1, 6)
+    ]
+    compressed = _compress_notes("\n".join(pages + ["12", "v = 3 m/s"]))
+
+    assert "PHYS 201" not in compressed
+    assert "Page" not in compressed
+    assert "\n12\n" not in compressed
+    assert compressed.count("Newton's law") == 5
+    assert compressed.endswith("v = 3 m/s")
+    assert "\n\n\n" not in compressed
+
+
+@pytest.mark.unit
+class TestGenerateWeekPlan:
+    """Tests for batching several days into one AI call."""
+
+    DAYS = [
+        {"date": "2025-11-10", "events": [], "free_blocks": [], "morning_bus_time": "08:00 AM"},
+        {"date": "2025-11-11", "events": [], "free_blocks": [], "morning_bus_time": "08:00 AM"},
+    ]
+
+    @staticmethod
+    def _day(summary):
+        return {"lunch_slots": [], "study_slots": [], "commute_suggestion": None, "summary": summary}
+
+    def test_one_call_covers_all_days(self):
+        """Test that every day is answered from the single combined response."""
+        from unittest.mock import patch
+        from app.services import gemini_service
+
+        response = {"2025-11-10": self._day("Mon"), "2025-11-11": self._day("Tue")}
+        with patch.object(gemini_service, "generate_json_completion", return_value=response) as completion, \
+                patch.object(gemini_service, "generate_day_plan") as day_plan:
+            plans = gemini_service.generate_week_plan(self.DAYS)
+
+        completion.assert_called_once()
+        day_plan.assert_not_called()
+        assert {date: plan.summary for date, plan in plans.items()} == {"2025-11-10": "Mon", "2025-11-11": "Tue"}
+        assert "=== 2025-11-11 ===" in completion.call_args.args[0]
+
+    def test_missing_day_falls_back_to_single_call(self):
+        """Test that a day absent from the combined response is planned on its own."""
+        from unittest.mock import patch
+        from app.services import gemini_service
+
+        fallback = gemini_service.Recommendations(**self._day("Fallback"))
+        with patch.object(gemini_service, "generate_json_completion",
+                          return_value={"2025-11-10": self._day("Mon")}), \
+                patch.object(gemini_service, "generate_day_plan", return_value=fallback) as day_plan:
+            plans = gemini_service.generate_week_plan(self.DAYS)
+
+        day_plan.assert_called_once()
+        assert day_plan.call_args.kwargs["date"] == "2025-11-11"
+        assert plans["2025-11-11"].summary == "Fallback"
+
+
+@pytest.mark.unit
+class TestTrivialDayPlan:
+    """Tests for skipping the AI call on days with nothing to plan."""
+
+    def test_empty_day_skips_ai(self):
+        """Test that an empty calendar with nothing due returns a templated plan."""
+        from unittest.mock import patch
+        from app.services import gemini_service
+
+        with patch.object(gemini_service, "generate_json_completion") as completion:
+            plan = gemini_service.generate_day_plan("2025-11-15", [], [])
+
+        completion.assert_not_called()
+        assert [slot.label for slot in plan.lunch_slots] == ["12:00 PM - 1:00 PM"]
+        assert plan.study_slots == [] and plan.commute_suggestion is None
+        assert plan.summary.startswith("Hey Dippi,")
+
+    def test_upcoming_assignment_still_calls_ai(self):
+        """Test that a deadline within two weeks needs the AI to plan study time."""
+        from datetime import datetime
+        from types import SimpleNamespace
+        from unittest.mock import patch
+        from app.services import gemini_service
+
+        essay = SimpleNamespace(completed=False, due_date=datetime(2025, 11, 20), title="Essay",
+                                assignment_type="essay", priority=2)
+        response = {"lunch_slots": [], "study_slots": [], "commute_suggestion": None, "summary": "AI"}
+
+        with patch.object(gemini_service, "generate_json_completion", return_value=response) as completion:
+            plan = gemini_service.generate_day_plan("2025-11-15", [], [], assignments=[essay])
+
+        completion.assert_called_once()
+        assert plan.summary == "AI"
+
+
+@pytest.mark.unit
+def test_study_material_batch_keeps_order():
+    """Test that a batch sends all notes in one call and returns results in order."""
+    import asyncio
+    from unittest.mock import AsyncMock, patch
+    from app.services import gemini_service
+
+    async def answer(prompts, **kwargs):
+        return ['{"summary_short": "%d", "summary_detailed": "", "flashcards": [], "practice_questions": []}'
+                % prompt.count("Krebs") for prompt in prompts]
+
+    notes = [("Glycolysis makes pyruvate.", None), ("The Krebs cycle makes NADH.", "Bio")]
+    with patch.object(gemini_service, "agenerate_completions", AsyncMock(side_effect=answer)) as batch:
+        results = asyncio.run(gemini_service.generate_study_material_batch(notes))
+
+    assert [r["summary_short"] for r in results] == ["0", "1"]
+    batch.assert_awaited_once()
+
+
+@pytest.mark.unit
+def test_study_material_batch_rejects_incomplete_response():
+    """Test that a batch response missing a field raises."""
+    import asyncio
+    from unittest.mock import AsyncMock, patch
+    from app.services import gemini_service
+
+    with patch.object(gemini_service, "agenerate_completions", AsyncMock(return_value=['{"summary_short": ""}'])):
+        with pytest.raises(Exception, match="missing required field"):
+            asyncio.run(gemini_service.generate_study_material_batch([("Enzymes lower activation energy.", None)]))
+
+
+@pytest.mark.unit
+def test_stream_study_material_yields_cards_before_material():
+    """Test that each flashcard is yielded as soon as its chunk arrives."""
+    from unittest.mock import patch
+    from app.services import gemini_service
+
+    chunks = ['{"summary_short": "s", "summary_detailed": "d", "flashcards": [{"question": "Q1", ',
+              '"answer": "A1"}, {"question": "Q2", "answer": "A2"}',
+              '], "practice_questions": []}']
+    seen = []
+
+    def fake_stream(prompt, **kwargs):
+        for chunk in chunks:
+            seen.append(chunk)
+            yield chunk
+
+    with patch.object(gemini_service, "generate_completion_stream", side_effect=fake_stream):
+        events = []
+        for event in gemini_service.stream_study_material("Enzymes lower activation energy."):
+            events.append((len(seen), event))
+
+    assert events[0] == (2, {"flashcard": {"question": "Q1", "answer": "A1"}})
+    assert events[1] == (2, {"flashcard": {"question": "Q2", "answer": "A2"}})
+    assert events[2][0] == 3 and len(events[2][1]["material"]["flashcards"]) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("leave_by", ["7:15 PM", "07:15PM", " 7:15 pm "])
+def test_time_only_leave_by_becomes_eastern_datetime(leave_by):
+    """Test that a bare leave-by time is combined with the plan date in Eastern time."""
+    from app.services.gemini_service import _recommendations_from_result
+
+    result = {"commute_suggestion": {"leave_by": leave_by, "leave_by_label": "7:15 PM", "reason": "Bus"}}
+
+    commute = _recommendations_from_result(result, "2025-11-10").commute_suggestion
+
+    assert commute.leave_by.isoformat() == "2025-11-10T19:15:00-05:00"
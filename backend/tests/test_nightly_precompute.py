@@ -0,0 +1,97 @@
+"""
+Tests for the nightly day plan precompute job.
+"""
+
+import pytest
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+from unittest.mock import patch
+
+from app.models.day_plan import DayPlan
+from app.schemas.calendar import CalendarEvent, Recommendations
+from app.services import nightly_precompute
+from app.services.nightly_precompute import compute_events_hash, precompute_day_plans
+
+EST = ZoneInfo("America/New_York")
+TOMORROW = date.today() + timedelta(days=1)
+
+
+def _event(event_id, title, hour):
+    start = datetime(TOMORROW.year, TOMORROW.month, TOMORROW.day, hour, tzinfo=EST)
+    return CalendarEvent(id=event_id, title=title, start=start, end=start + timedelta(hours=1))
+
+
+def _orchestrated(db, user_id, today, events, assignments):
+    return events, [], Recommendations(lunch_slots=[], study_slots=[], commute_suggestion=None, summary="Precomputed")
+
+
+def test_events_hash_ignores_order_and_ids():
+    """Test that the hash only depends on title, start and end."""
+    a = [_event("1", "Lecture", 9), _event("2", "Lab", 14)]
+    b = [_event("x", "Lab", 14), _event("y", "Lecture", 9)]
+
+    assert compute_events_hash(a) == compute_events_hash(b)
+    assert compute_events_hash(a) != compute_events_hash(a[:1])
+
+
+@pytest.mark.unit
+class TestPrecomputeDayPlans:
+    """Tests for precompute_day_plans."""
+
+    @pytest.fixture(autouse=True)
+    def patched(self):
+        with patch.object(nightly_precompute, "get_valid_user_token", side_effect=lambda token, db: token), \
+             patch.object(nightly_precompute, "get_todays_events",
+                          return_value=[_event("1", "Lecture", 9)]) as get_events, \
+             patch.object(nightly_precompute, "orchestrate_day_plan",
+                          side_effect=_orchestrated) as orchestrate:
+            self.get_events = get_events
+            self.orchestrate = orchestrate
+            yield
+
+    def test_stores_plan_for_tomorrow(self, db_session, test_user, test_user_token):
+        """Test that tomorrow's plan is generated and stored with its events hash."""
+        assert precompute_day_plans(db_session) == 1
+
+        plan = db_session.query(DayPlan).filter(DayPlan.user_id == test_user.id).one()
+        assert plan.date == TOMORROW
+        assert plan.recommendations["summary"] == "Precomputed"
+        assert plan.events_hash == compute_events_hash([_event("1", "Lecture", 9)])
+        assert self.get_events.call_args.args[2] == TOMORROW
+
+    def test_unchanged_calendar_is_skipped(self, db_session, test_user, test_user_token):
+        """Test that a rerun with the same events doesn't call the orchestrator again."""
+        precompute_day_plans(db_session)
+
+        assert precompute_day_plans(db_session) == 0
+        self.orchestrate.assert_called_once()
+
+    def test_changed_calendar_replaces_plan(self, db_session, test_user, test_user_token):
+        """Test that new events regenerate and replace the stored plan."""
+        precompute_day_plans(db_session)
+        self.get_events.return_value = [_event("1", "Lecture", 9), _event("2", "Lab", 14)]
+
+        assert precompute_day_plans(db_session) == 1
+        assert db_session.query(DayPlan).filter(DayPlan.user_id == test_user.id).count() == 1
+
+    def test_failure_for_one_user_is_logged(self, db_session, test_user, test_user_token):
+        """Test that a failing user doesn't abort the batch."""
+        self.orchestrate.side_effect = Exception("AI down")
+
+        assert precompute_day_plans(db_session) == 0
+        assert db_session.query(DayPlan).count() == 0
+
+    def test_removes_week_old_plans(self, db_session, test_user, test_user_token):
+        """Test that the nightly run also prunes stale cached plans."""
+        db_session.add(DayPlan(
+            user_id=test_user.id,
+            date=date.today() - timedelta(days=10),
+            events=[],
+            free_blocks=[],
+            recommendations={"summary": "Old"}
+        ))
+        db_session.commit()
+
+        precompute_day_plans(db_session)
+
+        assert db_session.query(DayPlan.date).filter(DayPlan.user_id == test_user.id).all() == [(TOMORROW,)]
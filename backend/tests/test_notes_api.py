@@ -4,6 +4,7 @@ Unit tests for notes API endpoints.
 
 import pytest
 from unittest.mock import patch, MagicMock
+from uuid import UUID
 from app.models.user import User
 
 
@@ -114,3 +115,214 @@ def test_upload_note_validation_error(client, db_session, test_user):
 
     assert response.status_code == 400
     assert "must be provided" in response.json()["detail"].lower()
+
+
+@pytest.mark.unit
+def test_upload_note_rejects_unsupported_file_type(client, db_session, test_user):
+    """Test that non-image uploads are rejected before touching storage."""
+    with patch('app.routes.notes.save_file_bytes') as mock_save:
+        response = client.post(
+            "/notes/upload",
+            files={"file": ("notes.pdf", b"%PDF-1.4", "application/pdf")},
+            data={"title": "PDF Notes"}
+        )
+
+    assert response.status_code == 400
+    assert "only image files" in response.json()["detail"].lower()
+    mock_save.assert_not_called()
+
+
+
+@pytest.mark.unit
+def test_upload_image_note_saves_and_ocrs_same_bytes(client, db_session, test_user):
+    """Test that storage and OCR both receive the uploaded bytes and the file URL is saved."""
+    from app.models.note_document import NoteDocument
+    image_bytes = b"\x89PNG fake image data"
+
+    with patch('app.routes.notes.save_file_bytes', return_value="notes/abc.png") as mock_save, \
+            patch('app.routes.notes.extract_text_from_bytes', return_value="Mitochondria make ATP for the cell") as mock_ocr:
+        response = client.post(
+            "/notes/upload",
+            files={"file": ("page.png", image_bytes, "image/png")},
+            data={"title": "Scanned Notes"}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["extracted_text"] == "Mitochondria make ATP for the cell"
+    assert mock_save.call_args[0][0] == image_bytes
+    assert mock_ocr.call_args[0][0] == image_bytes
+
+    note = db_session.get(NoteDocument, UUID(response.json()["note_document_id"]))
+    assert note.original_file_url == "notes/abc.png"
+
+
+@pytest.mark.unit
+def test_upload_image_without_text_returns_400_and_removes_file(client, db_session, test_user):
+    """Test that an unreadable image is a 400 (not a 500) and its stored copy is deleted."""
+    with patch('app.routes.notes.save_file_bytes', return_value="notes/abc.png"), \
+            patch('app.routes.notes.extract_text_from_bytes', return_value=""), \
+            patch('app.routes.notes.delete_file') as mock_delete:
+        response = client.post(
+            "/notes/upload",
+            files={"file": ("page.png", b"\x89PNG blank", "image/png")},
+            data={"title": "Blank Page"}
+        )
+
+    assert response.status_code == 400
+    assert "no meaningful text" in response.json()["detail"].lower()
+    mock_delete.assert_called_once_with("notes/abc.png")
+
+
+@pytest.mark.unit
+def test_generate_study_reuses_material_for_reuploaded_notes(client, db_session, test_user,
+                                                           test_note_document, test_study_material):
+    """Test that a re-upload of identical notes copies the earlier material without the AI."""
+    from app.models.note_document import NoteDocument
+    from app.models.study_material import StudyMaterial
+    reupload = NoteDocument(
+        user_id=test_user.id,
+        title="Biochem (again)",
+        extracted_text=test_note_document.extracted_text
+    )
+    db_session.add(reupload)
+    db_session.commit()
+
+    with patch('app.routes.notes.generate_study_material', side_effect=Exception("AI called")) as generate:
+        response = client.post("/notes/generate-study", json={"note_document_id": str(reupload.id)})
+
+    assert response.status_code == 200
+    assert response.json()["summary_short"] == "Enzymes catalyze reactions."
+    generate.assert_not_called()
+    assert db_session.query(StudyMaterial).filter(
+        StudyMaterial.note_document_id == reupload.id
+    ).count() == 1
+
+
+@pytest.mark.unit
+def test_generate_study_stream_sends_cards_then_saves(client, db_session, test_user, test_note_document):
+    """Test that the stream sends flashcards, then the full material, and stores it."""
+    import orjson
+    from app.models.study_material import StudyMaterial
+    material = {
+        "summary_short": "Enzymes", "summary_detailed": "Catalysts",
+        "flashcards": [{"question": "Q1", "answer": "A1"}], "practice_questions": []
+    }
+
+    def fake_stream(text, topic_hint):
+        yield {"flashcard": material["flashcards"][0]}
+        yield {"material": material}
+
+    note_id = test_note_document.id  # the route closes the shared test session
+    with patch('app.routes.notes.stream_study_material', side_effect=fake_stream), \
+            patch.object(db_session, "close", wraps=db_session.close) as close:
+        response = client.post("/notes/generate-study/stream",
+                               json={"note_document_id": str(note_id)})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [orjson.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"flashcard": {"question": "Q1", "answer": "A1"}}, {"material": material}]
+    # The save after the handler returned reopened the session; it must be released
+    close.assert_called()
+    assert db_session.query(StudyMaterial).filter(
+        StudyMaterial.note_document_id == note_id
+    ).count() == 1
+
+
+@pytest.mark.unit
+def test_generate_study_stream_existing_material(client, db_session, test_user,
+                                                 test_note_document, test_study_material):
+    """Test that stored material is sent as a single line without calling the AI."""
+    with patch('app.routes.notes.stream_study_material') as stream:
+        response = client.post("/notes/generate-study/stream",
+                               json={"note_document_id": str(test_note_document.id)})
+
+    assert response.status_code == 200
+    assert '"summary_short":"Enzymes catalyze reactions."' in response.text
+    stream.assert_not_called()
+
+
+def _make_second_note(db_session, test_user):
+    from app.models.note_document import NoteDocument
+    note = NoteDocument(
+        user_id=test_user.id,
+        title="Test Metabolism Notes",
+        extracted_text="Glycolysis breaks glucose down into pyruvate."
+    )
+    db_session.add(note)
+    db_session.commit()
+    return note
+
+
+MOCK_COMBINED_MATERIAL = {
+    "summary_short": "Combined summary",
+    "summary_detailed": "Detailed combined summary",
+    "flashcards": [{"question": "Q1", "answer": "A1"}],
+    "practice_questions": [{
+        "question": "Q1",
+        "options": ["A", "B", "C", "D"],
+        "correct_index": 0,
+        "explanation": "Exp"
+    }]
+}
+
+
+@pytest.mark.unit
+def test_combine_notes_without_saving_inserts_nothing(client, db_session, test_user, test_note_document):
+    """Test that save_to_library=False returns the guide without writing rows."""
+    from app.models.note_document import NoteDocument
+    from app.models.study_material import StudyMaterial
+    second = _make_second_note(db_session, test_user)
+
+    with patch('app.routes.notes.generate_combined_study_guide', return_value=MOCK_COMBINED_MATERIAL):
+        response = client.post(
+            "/notes/combine-notes",
+            json={
+                "note_document_ids": [str(test_note_document.id), str(second.id)],
+                "save_to_library": False
+            }
+        )
+
+    assert response.status_code == 200
+    assert response.json()["summary_short"] == "Combined summary"
+    assert db_session.query(NoteDocument).count() == 2
+    assert db_session.query(StudyMaterial).count() == 0
+
+
+@pytest.mark.unit
+def test_combine_notes_generation_failure_saves_nothing(client, db_session, test_user, test_note_document):
+    """Test that a failed generation leaves no combined note behind."""
+    from app.models.note_document import NoteDocument
+    second = _make_second_note(db_session, test_user)
+
+    with patch('app.routes.notes.generate_combined_study_guide', side_effect=Exception("AI down")):
+        response = client.post(
+            "/notes/combine-notes",
+            json={
+                "note_document_ids": [str(test_note_document.id), str(second.id)],
+                "save_to_library": True
+            }
+        )
+
+    assert response.status_code == 500
+    assert db_session.query(NoteDocument).count() == 2
+
+
+@pytest.mark.unit
+def test_combine_notes_failure_after_flush_rolls_back(client, db_session, test_user, test_note_document):
+    """Test that an error after the combined note is flushed rolls it back."""
+    from app.models.note_document import NoteDocument
+    second = _make_second_note(db_session, test_user)
+
+    with patch('app.routes.notes.generate_combined_study_guide', return_value=MOCK_COMBINED_MATERIAL), \
+            patch('app.routes.notes.StudyMaterial', side_effect=Exception("insert failed")):
+        response = client.post(
+            "/notes/combine-notes",
+            json={
+                "note_document_ids": [str(test_note_document.id), str(second.id)],
+                "save_to_library": True
+            }
+        )
+
+    assert response.status_code == 500
+    assert db_session.query(NoteDocument).count() == 2
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta, date
 from zoneinfo import ZoneInfo
 from unittest.mock import patch, MagicMock
 
+from app.services import planning_agent
 from app.services.planning_agent import (
     agent_filter_schedule_for_today,
     build_planning_prompt,
@@ -16,6 +17,14 @@ from app.schemas.calendar import CalendarEvent, FreeBlock
 from app.models.assignment import Assignment
 
 
+@pytest.fixture(autouse=True)
+def reset_planning_model():
+    """Rebuild the shared model so each test's patched GenerativeModel is used."""
+    planning_agent._planning_model.cache_clear()
+    yield
+    planning_agent._planning_model.cache_clear()
+
+
 @pytest.fixture
 def est():
     """EST timezone for testing."""
@@ -404,6 +413,111 @@ class TestBuildPlanningPrompt:
         assert "2h" in prompt  # Hours format
 
 
+class TestBuildDayContext:
+    """Tests for exam detection in build_day_context."""
+
+    def test_detects_exam_titles_case_insensitively(self, est):
+        """Test that keyword titles count as exams regardless of case or suffix."""
+        from app.services.day_context import build_day_context
+
+        today = date(2025, 11, 10)
+        titles = ["BIO MIDTERMS", "Chem Lecture", "weekly Quiz", "Office hours"]
+        events = [
+            CalendarEvent(
+                id=str(i),
+                title=title,
+                start=datetime(2025, 11, 10 + i, 9, tzinfo=est),
+                end=datetime(2025, 11, 10 + i, 10, tzinfo=est),
+            )
+            for i, title in enumerate(titles)
+        ]
+
+        context = build_day_context(today, events, [], [])
+
+        assert context.days_until_next_exam == 0
+        assert context.has_exam_within_2_days
+
+    def test_no_exam_keywords(self, est):
+        """Test that ordinary events leave the exam fields unset."""
+        from app.services.day_context import build_day_context
+
+        event = CalendarEvent(
+            id="1",
+            title="Lecture",
+            start=datetime(2025, 11, 10, 9, tzinfo=est),
+            end=datetime(2025, 11, 10, 10, tzinfo=est),
+        )
+
+        context = build_day_context(date(2025, 11, 10), [event], [], [])
+
+        assert context.days_until_next_exam is None
+        assert not context.has_exam_within_2_days
+
+    def test_busy_and_study_hours(self, est):
+        """Test that busy hours include candidate blocks and study hours count assignment events."""
+        from app.services.day_context import build_day_context
+
+        def block(hour, hours, event_type="calendar"):
+            return CalendarEvent(
+                id=f"{hour}",
+                title="Block",
+                start=datetime(2025, 11, 10, hour, tzinfo=est),
+                end=datetime(2025, 11, 10, hour + hours, tzinfo=est),
+                event_type=event_type,
+            )
+
+        events = [block(9, 2), block(13, 1, "assignment")]
+        candidates = [block(15, 2, "assignment")]
+
+        context = build_day_context(date(2025, 11, 10), events, candidates, [])
+
+        assert context.total_busy_hours == 5
+        assert context.total_study_hours_if_applied == 3
+        assert context.free_hours_if_applied == 10
+
+    def test_assignments_summary_sorted_by_due_day(self, est):
+        """Test that the summary is ordered by due day, keeping input order on ties."""
+        from types import SimpleNamespace
+        from app.services.day_context import build_day_context
+
+        def assignment(assignment_id, day, hour):
+            return SimpleNamespace(
+                id=assignment_id,
+                title=f"A{assignment_id}",
+                due_date=datetime(2025, 11, day, hour, tzinfo=est),
+                estimated_hours=1.0,
+                priority=2,
+            )
+
+        assignments = [assignment(1, 14, 9), assignment(2, 12, 23), assignment(3, 12, 8)]
+
+        context = build_day_context(date(2025, 11, 10), [], [], assignments)
+
+        assert [a["id"] for a in context.assignments_summary] == [2, 3, 1]
+        assert [a["due_in_days"] for a in context.assignments_summary] == [2, 2, 4]
+
+
+def test_planning_model_is_reused(est, sample_events, sample_free_blocks):
+    """Test that the model is built once and shared across decisions."""
+    from types import SimpleNamespace
+
+    response = MagicMock()
+    response.text = '{"mode": "OFF", "kept_block_ids": [], "reason": "Rest"}'
+    response.candidates = [MagicMock()]
+    assignment = SimpleNamespace(
+        id=1, title="Essay", completed=False, assignment_type="homework",
+        due_date=datetime.now(est) + timedelta(days=2), estimated_hours=2.0, priority=2,
+    )
+
+    with patch.object(planning_agent.genai, "GenerativeModel") as model_class:
+        model_class.return_value.generate_content.return_value = response
+        for _ in range(2):
+            agent_filter_schedule_for_today(date.today(), sample_events, sample_free_blocks, [assignment])
+
+    model_class.assert_called_once()
+    assert model_class.return_value.generate_content.call_count == 2
+
+
 class TestAgentDecisionModel:
     """Test suite for AgentDecision Pydantic model."""
 
@@ -0,0 +1,95 @@
+"""
+Tests for the day plan prompt builder.
+"""
+
+import pytest
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.schemas.calendar import CalendarEvent
+from app.services.prompt_builder import build_day_plan_prompt, _merge_duplicate_events
+
+EST = ZoneInfo("America/New_York")
+
+
+def _event(event_id, title, start_hour, end_hour, start_minute=0):
+    return CalendarEvent(
+        id=event_id,
+        title=title,
+        start=datetime(2025, 11, 10, start_hour, start_minute, tzinfo=EST),
+        end=datetime(2025, 11, 10, end_hour, tzinfo=EST),
+    )
+
+
+@pytest.mark.unit
+class TestMergeDuplicateEvents:
+    """Tests for collapsing multi-calendar copies of an event."""
+
+    def test_exact_duplicates_collapse(self):
+        """Test that the same event from two calendars appears once."""
+        events = [_event("a", "Bio 101", 9, 10), _event("b", "Bio 101", 9, 10)]
+
+        assert _merge_duplicate_events(events) == [
+            ("Bio 101", events[0].start, events[0].end)
+        ]
+
+    def test_overlapping_copies_extend_span(self):
+        """Test that overlapping copies with the same title merge into one span."""
+        events = [_event("a", "Lab", 13, 15), _event("b", "lab ", 14, 16, start_minute=30)]
+
+        merged = _merge_duplicate_events(events)
+
+        assert len(merged) == 1
+        assert merged[0][1].hour == 13 and merged[0][2].hour == 16
+
+    def test_distinct_titles_are_kept(self):
+        """Test that overlapping events with different titles stay separate."""
+        events = [_event("a", "Lecture", 9, 11), _event("b", "Office hours", 10, 11)]
+
+        assert [title for title, _, _ in _merge_duplicate_events(events)] == ["Lecture", "Office hours"]
+
+    def test_repeats_later_in_day_are_kept(self):
+        """Test that a non-overlapping repeat of a title is a separate span."""
+        events = [_event("a", "Study group", 9, 10), _event("b", "Study group", 15, 16)]
+
+        assert len(_merge_duplicate_events(events)) == 2
+
+
+@pytest.mark.unit
+def test_prompt_lists_duplicate_class_once():
+    """Test that the prompt doesn't repeat a class synced from two calendars."""
+    events = [_event("a", "Chem 201", 9, 10), _event("b", "Chem 201", 9, 10)]
+
+    prompt = build_day_plan_prompt("2025-11-10", events, [])
+
+    assert prompt.count("Chem 201") == 1
+
+
+@pytest.mark.unit
+def test_day_prompts_share_static_prefix():
+    """Test that instructions lead every day prompt and are sent once per week plan."""
+    from app.services.prompt_builder import _DAY_PLAN_INSTRUCTIONS, build_week_plan_prompt
+
+    monday = build_day_plan_prompt("2025-11-10", [_event("a", "Chem 201", 9, 10)], [])
+    tuesday = build_day_plan_prompt("2025-11-11", [], [], morning_bus_time="8:05 AM")
+
+    assert monday.startswith(_DAY_PLAN_INSTRUCTIONS) and tuesday.startswith(_DAY_PLAN_INSTRUCTIONS)
+    assert "2025-11-10" not in _DAY_PLAN_INSTRUCTIONS
+
+    week = build_week_plan_prompt({"2025-11-10": monday, "2025-11-11": tuesday})
+
+    assert week.count(_DAY_PLAN_INSTRUCTIONS) == 1
+    assert "Chem 201" in week and "8:05 AM" in week
+
+
+@pytest.mark.unit
+def test_prompt_separates_classes_from_study_blocks():
+    """Test that scheduled study blocks are listed apart from classes with their due hint."""
+    study = _event("s", "Study: Orgo exam", 14, 16).model_copy(
+        update={"event_type": "assignment", "description": "Prep for exam in 3 days"}
+    )
+
+    prompt = build_day_plan_prompt("2025-11-10", [_event("a", "Chem 201", 9, 10), study], [])
+
+    assert "**Classes:** Chem 201" in prompt
+    assert "**Scheduled Study:** Study: Orgo exam 02:00PM-04:00PM (due 3d)" in prompt
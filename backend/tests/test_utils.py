@@ -99,3 +99,88 @@ def test_error_handler():
     key = get_user_id_or_ip(request)
     assert not key.startswith("user:")
     assert key == "192.168.1.1"  # Verify it returns the IP
+
+
+@pytest.mark.unit
+def test_lazy_import_defers_execution():
+    """Test that a lazily imported module only runs on first attribute access."""
+    import sys
+    from app.utils.lazy_import import lazy_import
+
+    sys.modules.pop("colorsys", None)
+    module = lazy_import("colorsys")
+
+    try:
+        # type() doesn't go through the module's attribute hook, so it stays unloaded
+        assert type(module).__name__ == "_LazyModule"
+        assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        assert type(module).__name__ == "module"
+        assert lazy_import("colorsys") is sys.modules["colorsys"]
+    finally:
+        sys.modules.pop("colorsys", None)
+
+
+@pytest.mark.unit
+def test_clock_label_matches_strftime():
+    """Test that table-based labels equal strftime for every minute of the day."""
+    from app.utils.time_utils import clock_label, format_time_slot
+
+    for minute in range(1440):
+        t = datetime(2025, 11, 10, minute // 60, minute % 60)
+        assert clock_label(t) == t.strftime("%I:%M %p")
+        assert clock_label(t, compact=True) == t.strftime("%I:%M%p")
+
+    start, end = datetime(2025, 11, 10, 9, 5), datetime(2025, 11, 10, 12, 30)
+    assert format_time_slot(start, end) == "9:05 AM - 12:30 PM"
+
+
+@pytest.mark.unit
+def test_free_blocks_memoized_per_schedule_and_zone():
+    """Test that identical schedules reuse blocks but other time zones don't."""
+    from datetime import timezone
+    from zoneinfo import ZoneInfo
+    from app.utils.time_utils import _free_blocks_for_spans
+
+    est = ZoneInfo("America/New_York")
+
+    def lecture(tz):
+        start = datetime(2025, 11, 10, 14, tzinfo=est).astimezone(tz)
+        return [CalendarEvent(id="1", title="Lecture", start=start, end=start.replace(hour=start.hour + 1))]
+
+    _free_blocks_for_spans.cache_clear()
+    first = calculate_free_blocks(lecture(est))
+    second = calculate_free_blocks(lecture(est))
+    utc = calculate_free_blocks(lecture(timezone.utc))
+
+    assert first == second and first is not second
+    assert _free_blocks_for_spans.cache_info().hits == 1
+    assert first[0].start.hour == 8 and utc[0].start.hour == 8
+    assert first[0].start != utc[0].start
+
+
+@pytest.mark.unit
+def test_is_token_expired_handles_naive_and_aware_expiry():
+    """Test that naive UTC and offset-aware expiries are compared on the same clock."""
+    from datetime import timedelta, timezone
+    from types import SimpleNamespace
+    from zoneinfo import ZoneInfo
+    from app.utils.token_refresh import is_token_expired
+
+    now = datetime.now(timezone.utc)
+    naive_utc = (now + timedelta(hours=1)).replace(tzinfo=None)
+    eastern = (now + timedelta(hours=1)).astimezone(ZoneInfo("America/New_York"))
+
+    assert not is_token_expired(SimpleNamespace(token_expiry=naive_utc))
+    assert not is_token_expired(SimpleNamespace(token_expiry=eastern))
+    assert is_token_expired(SimpleNamespace(token_expiry=now + timedelta(minutes=2)))
+    assert is_token_expired(SimpleNamespace(token_expiry=None))
+
+
+@pytest.mark.unit
+def test_preview_text_truncates_long_text():
+    """Test that previews are cut at the limit and marked with an ellipsis."""
+    from app.utils.logger import preview_text
+
+    assert preview_text("short") == "short"
+    assert preview_text("x" * 500) == "x" * 500
+    assert preview_text("x" * 501) == "x" * 500 + "..."
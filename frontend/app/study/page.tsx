@@ -164,7 +164,7 @@ export default function StudyPage() {
                     <input
                       ref={fileInputRef}
                       type="file"
-                      accept="image/*"
+                      accept="image/png,image/jpeg,image/webp,image/tiff,image/bmp"
                       onChange={handleFileUpload}
                       className="hidden"
                     />